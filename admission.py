@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Admission Control Module
+Bounded job queue with per-client caps and memory-aware scheduling
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from dashboard_config import (ADMISSION_MEMORY_BUDGET_MB, ADMISSION_MEMORY_FACTOR, ADMISSION_MIN_JOB_MB,
+                              ADMISSION_PER_CLIENT, ADMISSION_QUEUE_DEPTH, MAX_WORKERS)
+
+# Initial guess for job duration before any job has finished (seconds)
+DEFAULT_JOB_SECONDS = 10.0
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; carries a Retry-After hint"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_job_memory(paths: List[str]) -> int:
+    """
+    Estimate the peak memory a job needs from its input file sizes
+
+    Args:
+        paths: Input file paths processed by the job
+
+    Returns:
+        Estimated bytes
+    """
+    size = sum(Path(p).stat().st_size for p in paths if Path(p).exists())
+    return max(int(size * ADMISSION_MEMORY_FACTOR), ADMISSION_MIN_JOB_MB * 1024 * 1024)
+
+
+class AdmissionController:
+    """
+    Decides which jobs may enter the queue and when queued jobs may start
+
+    Jobs are admitted into a bounded FIFO queue; a client may hold at most
+    per_client queued or running jobs. Queued jobs start when a worker slot is
+    free and their estimated memory fits the remaining budget. A job larger
+    than the whole budget still runs, but only on an otherwise idle system.
+    """
+
+    def __init__(self, queue_depth: int = ADMISSION_QUEUE_DEPTH, per_client: int = ADMISSION_PER_CLIENT,
+                 memory_budget: int = ADMISSION_MEMORY_BUDGET_MB * 1024 * 1024, workers: int = MAX_WORKERS):
+        self.queue_depth = queue_depth
+        self.per_client = per_client
+        self.memory_budget = memory_budget
+        self.workers = max(1, workers)
+
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._running: Dict[str, Dict[str, Any]] = {}
+        self._client_jobs: Dict[str, int] = {}
+        self._memory_in_use = 0
+        self._avg_seconds = DEFAULT_JOB_SECONDS
+
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely to free up, from the average job duration"""
+        waves = (len(self._queue) + len(self._running)) / self.workers
+        return max(1, math.ceil(self._avg_seconds * max(waves, 1.0)))
+
+    def admit(self, jobs: List[Dict[str, Any]]):
+        """
+        Admit a batch of jobs atomically, or reject the whole batch
+
+        Args:
+            jobs: Job dictionaries with 'id', 'client' and 'memory' keys
+
+        Raises:
+            AdmissionRejected: If the queue or the client's quota is full
+        """
+        with self._lock:
+            if len(self._queue) + len(jobs) > self.queue_depth:
+                raise AdmissionRejected('Processing queue is full', self._retry_after())
+
+            per_client = {}
+            for job in jobs:
+                per_client[job['client']] = per_client.get(job['client'], 0) + 1
+            for client, count in per_client.items():
+                if self._client_jobs.get(client, 0) + count > self.per_client:
+                    raise AdmissionRejected(
+                        f'Too many concurrent jobs for client {client} (limit {self.per_client})',
+                        self._retry_after())
+
+            for job in jobs:
+                job['queued_at'] = time.time()
+                self._queue.append(job)
+                self._client_jobs[job['client']] = self._client_jobs.get(job['client'], 0) + 1
+
+    def next_runnable(self) -> List[Dict[str, Any]]:
+        """
+        Move every queued job that fits the free slots and memory budget to running
+
+        Jobs are considered in FIFO order; a job that does not fit the memory
+        budget is skipped so smaller jobs behind it can use the free memory.
+
+        Returns:
+            Jobs that should be started now
+        """
+        started = []
+        with self._lock:
+            skipped = deque()
+            while self._queue and len(self._running) < self.workers:
+                job = self._queue.popleft()
+                fits = self._memory_in_use + job['memory'] <= self.memory_budget
+                if fits or not self._running:
+                    job['started_at'] = time.time()
+                    self._running[job['id']] = job
+                    self._memory_in_use += job['memory']
+                    started.append(job)
+                else:
+                    skipped.append(job)
+            skipped.extend(self._queue)
+            self._queue = skipped
+        return started
+
+    def _release_client(self, client: str):
+        """Decrement a client's job count (lock must be held)"""
+        self._client_jobs[client] -= 1
+        if self._client_jobs[client] <= 0:
+            del self._client_jobs[client]
+
+    def remove_queued(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Drop a job that has not started yet
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            The removed job, or None if it was not queued
+        """
+        with self._lock:
+            for job in self._queue:
+                if job['id'] == job_id:
+                    self._queue.remove(job)
+                    self._release_client(job['client'])
+                    return job
+        return None
+
+    def release(self, job_id: str):
+        """
+        Mark a running job as finished and free its slot and memory
+
+        Args:
+            job_id: Job id
+        """
+        with self._lock:
+            job = self._running.pop(job_id, None)
+            if job is None:
+                return
+            self._memory_in_use -= job['memory']
+            self._release_client(job['client'])
+
+            # Exponentially weighted average keeps Retry-After hints current
+            elapsed = time.time() - job.get('started_at', time.time())
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue, running and memory figures"""
+        with self._lock:
+            return {
+                'queued': len(self._queue),
+                'running': len(self._running),
+                'queue_depth': self.queue_depth,
+                'memory_in_use_mb': round(self._memory_in_use / (1024 * 1024), 1),
+                'memory_budget_mb': round(self.memory_budget / (1024 * 1024), 1),
+                'avg_job_seconds': round(self._avg_seconds, 2)
+            }
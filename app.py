@@ -7,9 +7,11 @@ Flask-based web interface for financial data analysis
 import os
 import sys
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash, Response, stream_with_context
 from werkzeug.utils import secure_filename
 import pandas as pd
+import gzip
+import io
 import json
 import traceback
 from datetime import datetime
@@ -19,23 +21,43 @@ import logging
 try:
     from dashboard_config import *
     from get_company_info import get_company_info
-    from get_index import get_index_info
+    from get_index import get_index
     from get_package_name import get_package_name
+    from bundle_stream import select_bundle_files, iter_zip_stream
+    from thumbnails import get_thumbnail, is_previewable
+    import catalog
+    import macro_history
+    import backtest
+    import package_diff
+    from package_index import get_package_index, parse_date
+    from dashboard_cache import get_dashboard_state, get_fragment_cache
+    import chunked_upload
+    from result_cache import cached_result, config_value, get_result_cache
+    from downsampling import downsample_frame
+    from charts import plot_width, render_line_chart
+    import heatmap_data
+    from admission import AdmissionRejected
+    from jobs import get_job_manager
+    from work_queue import start_work_node
+    from logging_config import setup_logging, init_request_logging
 except ImportError as e:
     print(f"Warning: Could not import some modules: {e}")
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (queued background writer, rotating LOG_FILE in LOG_DIR).
+# Under the debug reloader only the serving child rotates the shared file;
+# the watching parent just appends to it.
+setup_logging(rotate=__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true')
 logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
+init_request_logging(app)
 app.secret_key = 'your-secret-key-change-this-in-production'
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'xls', 'xlsx', 'csv'}
-MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+MAX_CONTENT_LENGTH = MAX_FILE_SIZE  # Single-request uploads and upload chunks; larger files use /api/uploads
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
@@ -47,70 +69,116 @@ def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def get_input_files():
-    """Get list of input files"""
-    input_dir = Path("Input")
-    if not input_dir.exists():
+def get_input_files(**filters):
+    """Get list of input files from the catalog"""
+    try:
+        return catalog.query_files('input', **filters)
+    except Exception as e:
+        logger.error(f"Error querying input files: {e}")
         return []
-    
-    files = []
-    for file_path in input_dir.glob("*.xls*"):
-        try:
-            stat = file_path.stat()
-            files.append({
-                'name': file_path.name,
-                'size': stat.st_size,
-                'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                'path': str(file_path)
-            })
-        except Exception as e:
-            logger.error(f"Error reading file {file_path}: {e}")
-    
-    return sorted(files, key=lambda x: x['modified'], reverse=True)
 
-def get_output_files():
-    """Get list of output files"""
-    output_dir = Path("Output")
-    if not output_dir.exists():
+def get_thumbnail_url(subdir, file_info):
+    """Get the preview URL for an output image, or None for other files"""
+    if not is_previewable(file_info['name']):
+        return None
+    # The catalog fingerprint changes with the content, so it versions the URL
+    return url_for('thumbnail', subdir=subdir, filename=file_info['name'], v=file_info['fingerprint'][:12])
+
+def get_output_files(**filters):
+    """Get list of output files from the catalog"""
+    try:
+        output_files = catalog.list_output_files(**filters)
+    except Exception as e:
+        logger.error(f"Error querying output files: {e}")
         return {}
     
-    output_files = {}
-    for subdir in ['spreadsheets', 'heatmaps', 'charts', 'summaries']:
-        subdir_path = output_dir / subdir
-        if subdir_path.exists():
-            files = list(subdir_path.glob("*"))
-            output_files[subdir] = [
-                {
-                    'name': f.name,
-                    'size': f.stat().st_size if f.is_file() else 0,
-                    'modified': datetime.fromtimestamp(f.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S') if f.is_file() else ''
-                }
-                for f in files
-            ]
+    for subdir, files in output_files.items():
+        for file_info in files:
+            file_info['thumbnail'] = get_thumbnail_url(subdir, file_info)
     
     return output_files
 
+# Lazily loaded dashboard sections: name -> (catalog area, template, context builder)
+DASHBOARD_FRAGMENTS = {
+    'input-files': ('input', 'fragments/input_files.html', lambda: {'input_files': get_input_files()}),
+    'output-files': ('output', 'fragments/output_files.html', lambda: {'output_files': get_output_files()})
+}
+
+def get_client_id():
+    """Identify the caller for per-client admission limits"""
+    return request.headers.get('X-Client-Id') or request.remote_addr or 'anonymous'
+
+def get_downsample_method():
+    """Chart downsampling method from the query string ('none' plots every point)"""
+    method = request.args.get('downsample', CHART_DOWNSAMPLE_METHOD or 'none')
+    return None if method == 'none' else method
+
+def get_listing_filters():
+    """
+    Read catalog listing filters from the query string
+
+    Raises:
+        ValueError: If limit or offset is not a non-negative integer
+    """
+    filters = {
+        'package': request.args.get('package'),
+        'name_contains': request.args.get('q'),
+        'sort': request.args.get('sort', 'modified'),
+        'descending': request.args.get('order', 'desc') != 'asc'
+    }
+    if request.args.get('limit'):
+        try:
+            filters['limit'] = int(request.args['limit'])
+            filters['offset'] = int(request.args.get('offset', 0))
+        except ValueError:
+            raise ValueError("limit and offset must be integers")
+        if filters['limit'] < 0 or filters['offset'] < 0:
+            raise ValueError("limit and offset must not be negative")
+    return filters
+
 @app.route('/')
 def index():
     """Main dashboard page"""
     try:
-        input_files = get_input_files()
-        output_files = get_output_files()
+        # Counters are maintained from catalog file events, not recounted per view
+        summary = get_dashboard_state().summary()
         
-        # Get system stats
-        total_input_files = len(input_files)
-        total_output_files = sum(len(files) for files in output_files.values())
+        if DASHBOARD_LAZY_SECTIONS:
+            # The shell only renders counters; listings load from /fragments/<name>
+            return render_template('dashboard_shell.html',
+                                 summary=summary,
+                                 fragments=list(DASHBOARD_FRAGMENTS))
         
         return render_template('dashboard.html',
-                             input_files=input_files,
-                             output_files=output_files,
-                             total_input_files=total_input_files,
-                             total_output_files=total_output_files)
+                             input_files=get_input_files(),
+                             output_files=get_output_files(),
+                             total_input_files=summary['total_input_files'],
+                             total_output_files=summary['total_output_files'])
     except Exception as e:
         logger.error(f"Error in index route: {e}")
         flash(f"Error loading dashboard: {str(e)}", 'error')
         return render_template('error.html', error=str(e))
 
+@app.route('/fragments/<name>')
+def dashboard_fragment(name):
+    """Dashboard section, rendered once per listing version"""
+    try:
+        if name not in DASHBOARD_FRAGMENTS:
+            return Response('Unknown fragment', status=404, mimetype='text/plain')
+        
+        area, template, build_context = DASHBOARD_FRAGMENTS[name]
+        version = get_dashboard_state().version(area)
+        html, etag = get_fragment_cache().get_or_render(name, version,
+                                                        lambda: render_template(template, **build_context()))
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=304, headers={'ETag': etag})
+        
+        # Clients revalidate every time; the content-hashed ETag makes unchanged sections free
+        return Response(html, mimetype='text/html', headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+    except Exception as e:
+        logger.error(f"Error rendering fragment {name}: {e}")
+        return Response('Could not load this section', status=500, mimetype='text/plain')
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     """Handle file uploads"""
@@ -133,6 +201,7 @@ def upload_file():
             
             file_path = input_dir / filename
             file.save(file_path)
+            catalog.record_file(file_path)
             
             flash(f'File {filename} uploaded successfully!', 'success')
             logger.info(f"File uploaded: {filename}")
@@ -146,6 +215,83 @@ def upload_file():
         flash(f'Upload failed: {str(e)}', 'error')
         return redirect(url_for('index'))
 
+@app.route('/api/uploads', methods=['POST'])
+def api_upload_init():
+    """API endpoint to start a resumable chunked upload"""
+    try:
+        data = request.get_json(silent=True) or {}
+        filename = secure_filename(data.get('filename', ''))
+        if not filename or not allowed_file(filename):
+            return jsonify({'status': 'error', 'message': 'Invalid file type. Please upload .xls, .xlsx, or .csv files.'}), 400
+        
+        upload = chunked_upload.init_upload(filename, int(data.get('size', 0)), data.get('sha256'))
+        return jsonify({'status': 'success', 'upload': upload}), 201
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"API upload init error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['GET', 'PUT', 'DELETE'])
+def api_upload(upload_id):
+    """API endpoint to resume (GET), send a chunk to (PUT) or abort (DELETE) an upload"""
+    try:
+        if request.method == 'GET':
+            return jsonify({'status': 'success', 'upload': chunked_upload.get_upload(upload_id)})
+        if request.method == 'DELETE':
+            chunked_upload.abort_upload(upload_id)
+            return jsonify({'status': 'success', 'aborted': upload_id})
+        
+        # The body is read from the raw stream, so Werkzeug never buffers the chunk
+        upload = chunked_upload.write_chunk(upload_id,
+                                            int(request.args.get('offset', 0)),
+                                            request.stream,
+                                            request.content_length or 0,
+                                            request.headers.get('X-Chunk-SHA256', ''))
+        return jsonify({'status': 'success', 'upload': upload})
+    except chunked_upload.UploadNotFound as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except chunked_upload.ChunkRejected as e:
+        # The client resumes from the offset the server has stored
+        return jsonify({'status': 'error', 'message': str(e), 'received': e.received}), 409
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"API upload chunk error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>/finalize', methods=['POST'])
+def api_upload_finalize(upload_id):
+    """API endpoint to finish an upload and optionally start processing it"""
+    try:
+        data = request.get_json(silent=True) or {}
+        file_path = chunked_upload.finalize_upload(upload_id)
+        catalog.record_file(file_path)
+        logger.info(f"File uploaded in chunks: {file_path.name}")
+        
+        result = {'status': 'success', 'file': file_path.name}
+        if data.get('process'):
+            try:
+                result['jobs'] = get_job_manager().submit_files([str(file_path)], get_client_id(),
+                                                                profile=data.get('profile'))
+            except AdmissionRejected as e:
+                # The file is stored; only processing has to be retried
+                result.update(status='uploaded', message=str(e), retry_after=e.retry_after)
+                response = jsonify(result)
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response, 429
+            return jsonify(result), 202
+        return jsonify(result)
+    except chunked_upload.UploadNotFound as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except chunked_upload.ChunkRejected as e:
+        return jsonify({'status': 'error', 'message': str(e), 'received': e.received}), 409
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"API upload finalize error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @app.route('/process', methods=['POST'])
 def process_files():
     """Process uploaded files"""
@@ -156,15 +302,15 @@ def process_files():
             flash('No files to process', 'error')
             return redirect(url_for('index'))
         
-        # For now, just show success message
-        # In a real implementation, you would call your processing functions here
-        flash(f'Processing {len(input_files)} files...', 'info')
-        
-        # TODO: Implement actual file processing
-        # This would call your existing processing functions
+        paths = [f['path'] for f in input_files]
+        job_ids = get_job_manager().submit_files(paths, get_client_id())
+        flash(f'Processing {len(job_ids)} files...', 'info')
         
         return redirect(url_for('index'))
         
+    except AdmissionRejected as e:
+        flash(f'Server busy: {e}. Try again in {e.retry_after} seconds.', 'error')
+        return redirect(url_for('index'))
     except Exception as e:
         logger.error(f"Processing error: {e}")
         flash(f'Processing failed: {str(e)}', 'error')
@@ -174,14 +320,17 @@ def process_files():
 def api_files():
     """API endpoint to get file information"""
     try:
-        input_files = get_input_files()
-        output_files = get_output_files()
+        filters = get_listing_filters()
+        input_files = get_input_files(**filters)
+        output_files = get_output_files(**filters)
         
         return jsonify({
             'input_files': input_files,
             'output_files': output_files,
             'status': 'success'
         })
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
         logger.error(f"API error: {e}")
         return jsonify({
@@ -189,24 +338,56 @@ def api_files():
             'message': str(e)
         }), 500
 
+@app.route('/api/files/<path:filename>', methods=['DELETE'])
+def api_delete_input(filename):
+    """API endpoint to delete an input file"""
+    try:
+        file_path = Path("Input") / Path(filename).name
+        if not file_path.is_file():
+            return jsonify({'status': 'error', 'message': 'File not found'}), 404
+        
+        file_path.unlink()
+        catalog.forget_file(file_path)
+        logger.info(f"File deleted: {file_path.name}")
+        return jsonify({'status': 'success', 'deleted': file_path.name})
+    except Exception as e:
+        logger.error(f"API delete error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @app.route('/api/process', methods=['POST'])
 def api_process():
     """API endpoint to process files"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         file_list = data.get('files', [])
         
         if not file_list:
             return jsonify({'status': 'error', 'message': 'No files specified'}), 400
         
-        # TODO: Implement actual processing
-        # For now, return success
+        paths = []
+        for name in file_list:
+            file_path = Path("Input") / secure_filename(name)
+            if not file_path.is_file():
+                return jsonify({'status': 'error', 'message': f'File not found: {name}'}), 404
+            paths.append(str(file_path))
+        
+        job_ids = get_job_manager().submit_files(paths, get_client_id(), profile=data.get('profile'))
+        
         return jsonify({
-            'status': 'success',
+            'status': 'accepted',
             'message': f'Processing {len(file_list)} files',
-            'files_processed': file_list
-        })
+            'files_processed': file_list,
+            'jobs': job_ids
+        }), 202
         
+    except AdmissionRejected as e:
+        response = jsonify({
+            'status': 'error',
+            'message': str(e),
+            'retry_after': e.retry_after
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
     except Exception as e:
         logger.error(f"API processing error: {e}")
         return jsonify({
@@ -214,6 +395,299 @@ def api_process():
             'message': str(e)
         }), 500
 
+@app.route('/api/jobs')
+def api_jobs():
+    """API endpoint to list recent jobs and queue state"""
+    try:
+        limit = int(request.args.get('limit', 50))
+        return jsonify({
+            'status': 'success',
+            'jobs': catalog.list_jobs(status=request.args.get('status'), limit=limit),
+            'queue': get_job_manager().controller.stats()
+        })
+    except Exception as e:
+        logger.error(f"API jobs error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>')
+def api_job(job_id):
+    """API endpoint to get one job"""
+    job = catalog.get_job(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+    return jsonify({'status': 'success', 'job': job})
+
+@app.route('/api/jobs/<job_id>/profile')
+def api_job_profile(job_id):
+    """API endpoint to get a profiled job's per-stage memory and CPU figures"""
+    job = catalog.get_job(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+    
+    profile = (job.get('metadata') or {}).get('profile')
+    if profile is None:
+        return jsonify({'status': 'error', 'message': 'Job was not profiled'}), 404
+    
+    # ?download=1 returns the full profiler output (.prof for cProfile, .html for pyinstrument)
+    if request.args.get('download'):
+        artifact = (profile.get('cpu_profile') or {}).get('artifact')
+        if not artifact or not Path(artifact).exists():
+            return jsonify({'status': 'error', 'message': 'No CPU profile stored for this job'}), 404
+        return send_file(Path(artifact).resolve(), as_attachment=True)
+    
+    return jsonify({'status': 'success', 'job_id': job_id, 'job_status': job['status'], 'profile': profile})
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def api_cancel_job(job_id):
+    """API endpoint to cancel a queued or running job"""
+    try:
+        job = catalog.get_job(job_id)
+        if job is None:
+            return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+        
+        outcome = get_job_manager().cancel(job_id)
+        if outcome == 'cancelled':
+            return jsonify({'status': 'success', 'job_id': job_id, 'state': 'cancelled'})
+        if outcome == 'cancelling':
+            return jsonify({'status': 'success', 'job_id': job_id, 'state': 'cancelling'}), 202
+        
+        return jsonify({'status': 'error', 'message': f"Job already {job['status']}"}), 409
+    except Exception as e:
+        logger.error(f"API cancel job error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/dashboard/summary')
+def api_dashboard_summary():
+    """API endpoint to get dashboard counters and listing versions"""
+    try:
+        return jsonify({'status': 'success', 'summary': get_dashboard_state().summary()})
+    except Exception as e:
+        logger.error(f"API dashboard summary error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/cache', methods=['GET', 'DELETE'])
+def api_result_cache():
+    """API endpoint to inspect (GET) or clear (DELETE, optional ?namespace=) the analytics result cache"""
+    try:
+        cache = get_result_cache()
+        if request.method == 'DELETE':
+            dropped = cache.invalidate(request.args.get('namespace'))
+            return jsonify({'status': 'success', 'dropped': dropped})
+        return jsonify({'status': 'success', 'cache': cache.stats()})
+    except Exception as e:
+        logger.error(f"API result cache error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/macro/series')
+def api_macro_series_list():
+    """API endpoint to list stored macro indicator series"""
+    try:
+        return jsonify({'status': 'success', 'series': macro_history.list_series()})
+    except Exception as e:
+        logger.error(f"API macro series list error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/macro/series/<indicator>/<region>')
+def api_macro_series(indicator, region):
+    """API endpoint to get one macro indicator series for charting"""
+    try:
+        series = macro_history.get_series(indicator, region, request.args.get('start'), request.args.get('end'))
+        if series.empty:
+            return jsonify({'status': 'error', 'message': 'Series not found'}), 404
+        
+        # Reduce to about one point per pixel of the client's chart before serializing
+        width = min(int(request.args.get('width', plot_width())), CHART_MAX_POINTS)
+        method = get_downsample_method()
+        total_points = len(series)
+        series = downsample_frame(series, 'date', 'value', width, method)
+        
+        # Column-oriented arrays keep the payload compact for charting
+        data = series.astype(object).where(series.notna(), None)
+        return jsonify({
+            'status': 'success',
+            'indicator': indicator,
+            'region': region,
+            'total_points': total_points,
+            'downsampling': method,
+            'series': {column: data[column].tolist() for column in data.columns}
+        })
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"API macro series error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/macro/series/<indicator>/<region>/chart.png')
+def api_macro_series_chart(indicator, region):
+    """Line chart image of one macro indicator series"""
+    try:
+        series = macro_history.get_series(indicator, region, request.args.get('start'), request.args.get('end'))
+        if series.empty:
+            return jsonify({'status': 'error', 'message': 'Series not found'}), 404
+        
+        series = series.assign(date=pd.to_datetime(series['date']))
+        image = render_line_chart(series, 'date', ['value'], io.BytesIO(),
+                                  title=f"{indicator} ({region})", method=get_downsample_method())
+        image.seek(0)
+        return send_file(image, mimetype='image/png')
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"API macro chart error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/backtest')
+def api_backtest():
+    """API endpoint to get forecast accuracy by horizon, asset or sector"""
+    try:
+        horizon = request.args.get('horizon')
+        results = backtest.get_results(
+            request.args.get('dimension', 'horizon'),
+            key=request.args.get('key'),
+            horizon_days=int(horizon) if horizon else None,
+            by_horizon=request.args.get('pooled', 'false').lower() != 'true'
+        )
+        return jsonify({'status': 'success', 'results': results})
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"API backtest error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/packages')
+def api_packages():
+    """API endpoint to list packages with their dated version spans"""
+    try:
+        return jsonify({'status': 'success', 'packages': get_package_index().packages()})
+    except Exception as e:
+        logger.error(f"API packages error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/packages/<package>/latest')
+def api_package_latest(package):
+    """API endpoint to resolve the current version of a package (optionally as of a date)"""
+    try:
+        as_of = parse_date(request.args.get('as_of'))
+        version = get_package_index().latest(package, as_of)
+        if version is None:
+            return jsonify({'status': 'error', 'message': 'No version of this package found'}), 404
+        
+        return jsonify({'status': 'success', 'package': package, 'as_of': as_of, 'version': version})
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f"Invalid date: {e}"}), 400
+    except Exception as e:
+        logger.error(f"API package latest error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/packages/<package>/versions')
+def api_package_versions(package):
+    """API endpoint to list the dated versions of a package within a date range"""
+    try:
+        start = parse_date(request.args.get('start'))
+        end = parse_date(request.args.get('end'))
+        versions = get_package_index().versions(package, start, end)
+        return jsonify({'status': 'success', 'package': package, 'start': start, 'end': end,
+                        'versions': versions})
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f"Invalid date: {e}"}), 400
+    except Exception as e:
+        logger.error(f"API package versions error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/packages/diff')
+def api_package_diff():
+    """API endpoint to diff a package version against another (default: its predecessor)"""
+    try:
+        new_name = request.args.get('new')
+        if not new_name:
+            return jsonify({'status': 'error', 'message': 'Missing "new" package file'}), 400
+        
+        new_path = Path("Input") / Path(new_name).name
+        if not new_path.exists():
+            return jsonify({'status': 'error', 'message': 'Package file not found'}), 404
+        
+        if request.args.get('old'):
+            old_path = Path("Input") / Path(request.args['old']).name
+            if not old_path.exists():
+                return jsonify({'status': 'error', 'message': 'Package file not found'}), 404
+        else:
+            predecessor = catalog.find_predecessor(new_path)
+            if predecessor is None:
+                return jsonify({'status': 'error', 'message': 'No previous version of this package'}), 404
+            old_path = Path(predecessor['path'])
+        
+        limit = int(request.args.get('limit', 500))
+        tolerance = config_value('PACKAGE_DIFF_TOLERANCE')
+        # Reused until either file or the tolerance changes; the cached dict is shared, so copy out of it
+        diff = cached_result('package_diff', {'old': str(old_path), 'new': str(new_path), 'tolerance': tolerance},
+                             lambda: package_diff.diff_packages(old_path, new_path, tolerance),
+                             files=[old_path, new_path], config=['PACKAGE_DIFF_TOLERANCE'])
+        changes = diff['changes']
+        rows = changes.head(limit).astype(object)
+        rows = rows.where(rows.notna(), None)
+        return jsonify({
+            'status': 'success',
+            **{k: v for k, v in diff.items() if k != 'changes'},
+            'changes': rows.to_dict(orient='records'),
+            'truncated': len(changes) > limit
+        })
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"API package diff error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/heatmap')
+def api_heatmap():
+    """API endpoint returning heatmap data for client-side rendering"""
+    try:
+        kind = request.args.get('kind', 'forecast')
+        value = request.args.get('value', 'Forecast_Return')
+        encoding = request.args.get('encoding', 'json')
+        colormap = request.args.get('colormap', HEATMAP_COLORMAP)
+        package = request.args.get('package')
+        
+        if kind == 'forecast':
+            if request.args.get('file'):
+                file_path = Path("Input") / Path(request.args['file']).name
+                version = None
+                if file_path.is_file():
+                    version = {'name': file_path.name, 'path': str(file_path),
+                               'fingerprint': catalog.file_fingerprint(file_path)}
+            elif package:
+                version = get_package_index().latest(package, parse_date(request.args.get('as_of')))
+            else:
+                return jsonify({'status': 'error', 'message': 'Give a "file" or a "package"'}), 400
+            if version is None:
+                return jsonify({'status': 'error', 'message': 'Forecast file not found'}), 404
+            tag, body = heatmap_data.forecast_heatmap(version, value, encoding, colormap)
+        elif kind == 'correlation':
+            if not package or not request.args.get('period'):
+                return jsonify({'status': 'error', 'message': 'Give a "package" and a "period"'}), 400
+            versions = get_package_index().versions(package, parse_date(request.args.get('start')),
+                                                    parse_date(request.args.get('end')))
+            tag, body = heatmap_data.correlation_heatmap(versions, request.args['period'], value,
+                                                         encoding, colormap)
+        else:
+            return jsonify({'status': 'error', 'message': f"Unknown heatmap kind: {kind}"}), 400
+        
+        # The tag changes with the underlying data, so clients can revalidate cheaply
+        etag = f"{tag}-{encoding}"
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
+        
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+        if 'gzip' in request.accept_encodings:
+            headers['Content-Encoding'] = 'gzip'
+        else:
+            body = gzip.decompress(body)
+        return Response(body, mimetype='application/json', headers=headers)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"API heatmap error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @app.route('/download/<path:filename>')
 def download_file(filename):
     """Download a file"""
@@ -221,12 +695,12 @@ def download_file(filename):
         # Look in Output directory first
         output_path = Path("Output") / filename
         if output_path.exists():
-            return send_file(output_path, as_attachment=True)
+            return send_file(output_path.resolve(), as_attachment=True)
         
         # Look in Input directory
         input_path = Path("Input") / filename
         if input_path.exists():
-            return send_file(input_path, as_attachment=True)
+            return send_file(input_path.resolve(), as_attachment=True)
         
         flash('File not found', 'error')
         return redirect(url_for('index'))
@@ -236,6 +710,54 @@ def download_file(filename):
         flash(f'Download failed: {str(e)}', 'error')
         return redirect(url_for('index'))
 
+@app.route('/download-bundle/<subdir>')
+def download_bundle(subdir):
+    """Stream a ZIP bundle of an Output subdirectory"""
+    try:
+        date = request.args.get('date')
+        package = request.args.get('package')
+        files = select_bundle_files(subdir, date=date, package=package)
+        
+        if not files:
+            flash('No files match the requested bundle', 'error')
+            return redirect(url_for('index'))
+        
+        filters = '_'.join(value for value in (package, date) if value)
+        bundle_name = secure_filename(f"{subdir}_{filters}.zip" if filters else f"{subdir}.zip")
+        
+        logger.info(f"Streaming bundle {bundle_name} with {len(files)} files")
+        response = Response(stream_with_context(iter_zip_stream(files)), mimetype='application/zip')
+        response.headers['Content-Disposition'] = f'attachment; filename="{bundle_name}"'
+        return response
+        
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('index'))
+    except Exception as e:
+        logger.error(f"Bundle download error: {e}")
+        flash(f'Bundle download failed: {str(e)}', 'error')
+        return redirect(url_for('index'))
+
+@app.route('/thumbnail/<subdir>/<path:filename>')
+def thumbnail(subdir, filename):
+    """Serve a cached thumbnail of an output image"""
+    try:
+        if subdir not in OUTPUT_SUBDIRS:
+            return jsonify({'status': 'error', 'message': 'Unknown output directory'}), 404
+        
+        source = Path("Output") / subdir / secure_filename(filename)
+        thumbnail_path = get_thumbnail(source)
+        if thumbnail_path is None:
+            return jsonify({'status': 'error', 'message': 'No preview available'}), 404
+        
+        # Versioned URLs point at immutable content, so let browsers keep them
+        max_age = 365 * 24 * 3600 if request.args.get('v') else CACHE_TIMEOUT
+        return send_file(thumbnail_path, max_age=max_age)
+        
+    except Exception as e:
+        logger.error(f"Thumbnail error: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
@@ -258,6 +780,10 @@ if __name__ == '__main__':
     print("📊 Web interface will be available at: http://localhost:5000")
     print("💡 Press Ctrl+C to stop the server")
     
+    # Only the reloader's serving process joins the shared work queue
+    if WORK_QUEUE_ENABLED and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_work_node(get_job_manager())
+    
     try:
         app.run(debug=True, host='0.0.0.0', port=5000)
     except KeyboardInterrupt:
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Backtest Module
+Incremental forecast accuracy against realized returns from dated packages
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from dashboard_config import (BACKTEST_CONFIDENCE_BINS, BACKTEST_DB, BACKTEST_ERROR_BINS, BACKTEST_ERROR_RANGE,
+                              BACKTEST_MATCH_WINDOW)
+from macro_history import snapshot_date
+from monte_carlo import parse_horizon
+from schema_detection import combine_sheets
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS forecasts (
+    asset TEXT NOT NULL,
+    horizon_days INTEGER NOT NULL,
+    issued TEXT NOT NULL,
+    target TEXT NOT NULL,
+    forecast REAL,
+    confidence REAL,
+    source TEXT,
+    status INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (asset, horizon_days, issued)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_forecasts_pending ON forecasts (status, target);
+
+CREATE TABLE IF NOT EXISTS realized (
+    symbol TEXT NOT NULL,
+    horizon_days INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    value REAL,
+    sector TEXT,
+    source TEXT,
+    PRIMARY KEY (symbol, horizon_days, date)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_realized_date ON realized (date);
+
+CREATE TABLE IF NOT EXISTS stats (
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    horizon_days INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    hits INTEGER NOT NULL,
+    sum_error REAL NOT NULL,
+    sum_abs_error REAL NOT NULL,
+    sum_sq_error REAL NOT NULL,
+    histogram BLOB NOT NULL,
+    calibration BLOB NOT NULL,
+    PRIMARY KEY (dimension, key, horizon_days)
+) WITHOUT ROWID;
+"""
+
+# Forecast states
+PENDING, SCORED, EXPIRED = 0, 1, 2
+
+# Result dimensions and the pair column keying them (None: one row per horizon)
+DIMENSIONS = {'horizon': None, 'asset': 'asset', 'sector': 'sector'}
+ALL_KEY = 'all'
+UNKNOWN_SECTOR = 'Unknown'
+
+# Realized return columns of top performer sheets, e.g. Return_1D, Return_3M
+RETURN_COLUMN = re.compile(r'^Return_(\d+)([DWMY])$', re.IGNORECASE)
+RETURN_UNITS = {'D': 'day', 'W': 'week', 'M': 'month', 'Y': 'year'}
+
+_local = threading.local()
+
+
+def _reset_after_fork():
+    global _local
+    _local = threading.local()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_connection() -> sqlite3.Connection:
+    """Get this thread's backtest connection, creating the schema on first use"""
+    connection = getattr(_local, 'connection', None)
+    if connection is None:
+        Path(BACKTEST_DB).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(BACKTEST_DB, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA busy_timeout=30000')
+        connection.executescript(SCHEMA)
+        _local.connection = connection
+    return connection
+
+
+def _horizon_days(label: Any) -> Optional[int]:
+    try:
+        return parse_horizon(label)
+    except ValueError:
+        return None
+
+
+def _target_dates(issued: pd.Series, horizon: pd.Series) -> pd.Series:
+    """Business day on which each forecast's horizon ends"""
+    days = np.busday_offset(issued.to_numpy(dtype='datetime64[D]'), horizon.to_numpy(dtype=np.int64),
+                            roll='forward')
+    return pd.Series(np.datetime_as_string(days, unit='D'), index=issued.index)
+
+
+def ingest_forecasts(path: Path, frame: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Store the forecasts of one dated forecast package
+
+    Repeated Asset x Time_Period rows are averaged. Re-ingesting a package
+    is a no-op, so stored forecasts are never scored twice.
+
+    Args:
+        path: Source workbook path (its package date is the issue date)
+        frame: Forecast rows (Asset, Time_Period, Forecast_Return, optionally Confidence)
+
+    Returns:
+        Dictionary with the issue date and the number of forecasts stored
+    """
+    issued = snapshot_date(path, frame)
+    rows = pd.DataFrame({
+        'asset': frame['Asset'].astype(str),
+        'horizon_days': frame['Time_Period'].map(_horizon_days),
+        'forecast': pd.to_numeric(frame['Forecast_Return'], errors='coerce'),
+        'confidence': pd.to_numeric(frame['Confidence'], errors='coerce') if 'Confidence' in frame else np.nan
+    }).dropna(subset=['horizon_days', 'forecast'])
+    rows = rows.groupby(['asset', 'horizon_days'], as_index=False).mean()
+    rows['horizon_days'] = rows['horizon_days'].astype(int)
+    rows['issued'] = issued
+    rows['target'] = _target_dates(rows['issued'], rows['horizon_days'])
+
+    cursor = get_connection().executemany(
+        """INSERT OR IGNORE INTO forecasts (asset, horizon_days, issued, target, forecast, confidence, source)
+           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        [(r.asset, int(r.horizon_days), r.issued, r.target, float(r.forecast),
+          None if pd.isna(r.confidence) else float(r.confidence), Path(path).name)
+         for r in rows.itertuples(index=False)]
+    )
+    return {'issued': issued, 'forecasts': cursor.rowcount}
+
+
+def ingest_realized(path: Path, frame: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Store the trailing returns of one dated top performer package
+
+    Each Return_<n><D|W|M|Y> column is the realized return over that horizon
+    ending on the package date.
+
+    Args:
+        path: Source workbook path
+        frame: Rows with Symbol, Return_* columns and optionally Sector
+
+    Returns:
+        Dictionary with the observation date and the number of returns stored
+    """
+    date = snapshot_date(path, frame)
+    columns = {}
+    for column in frame.columns:
+        match = RETURN_COLUMN.match(str(column))
+        if match:
+            columns[column] = parse_horizon(f"{match.group(1)}_{RETURN_UNITS[match.group(2).upper()]}")
+
+    wide = pd.DataFrame({column: pd.to_numeric(frame[column], errors='coerce') for column in columns})
+    wide['symbol'] = frame['Symbol'].astype(str)
+    wide['sector'] = frame['Sector'].astype(str) if 'Sector' in frame else None
+    rows = wide.melt(id_vars=['symbol', 'sector'], var_name='column', value_name='value').dropna(subset=['value'])
+    rows['horizon_days'] = rows['column'].map(columns)
+
+    cursor = get_connection().executemany(
+        'INSERT OR IGNORE INTO realized (symbol, horizon_days, date, value, sector, source) VALUES (?, ?, ?, ?, ?, ?)',
+        [(r.symbol, int(r.horizon_days), date, float(r.value), r.sector, Path(path).name)
+         for r in rows.itertuples(index=False)]
+    )
+    return {'date': date, 'returns': cursor.rowcount}
+
+
+def _error_bins(error: np.ndarray) -> np.ndarray:
+    """Histogram bin of each error: 0 is underflow, BACKTEST_ERROR_BINS + 1 overflow"""
+    edges = np.linspace(-BACKTEST_ERROR_RANGE, BACKTEST_ERROR_RANGE, BACKTEST_ERROR_BINS + 1)
+    return np.searchsorted(edges, error, side='right')
+
+
+def _confidence_bins(confidence: np.ndarray) -> np.ndarray:
+    """Calibration bucket of each confidence (percent); -1 where it is missing"""
+    width = 100.0 / BACKTEST_CONFIDENCE_BINS
+    with np.errstate(invalid='ignore'):
+        bins = np.clip(np.floor(confidence / width), 0, BACKTEST_CONFIDENCE_BINS - 1)
+    return np.where(np.isnan(confidence), -1, bins).astype(np.int64)
+
+
+def _fold(connection: sqlite3.Connection, pairs: pd.DataFrame):
+    """Add scored forecast/realized pairs to the running statistics of every dimension"""
+    error = (pairs['value'] - pairs['forecast']).to_numpy(dtype=float)
+    hits = (np.sign(pairs['value'].to_numpy(dtype=float)) == np.sign(pairs['forecast'].to_numpy(dtype=float)))
+    error_bins = _error_bins(error)
+    confidence = pairs['confidence'].to_numpy(dtype=float)
+    confidence_bins = _confidence_bins(confidence)
+    calibrated = confidence_bins >= 0
+
+    for dimension, column in DIMENSIONS.items():
+        keys = (pd.Series(ALL_KEY, index=pairs.index) if column is None
+                else pairs[column].fillna(UNKNOWN_SECTOR).astype(str))
+        grouping = pd.DataFrame({'key': keys, 'horizon_days': pairs['horizon_days']})
+        groups = grouping.groupby(['key', 'horizon_days'], sort=False).ngroup().to_numpy()
+        labels = grouping.drop_duplicates().reset_index(drop=True)
+        count = len(labels)
+
+        n = np.bincount(groups, minlength=count)
+        hit_count = np.bincount(groups, weights=hits, minlength=count)
+        sums = [np.bincount(groups, weights=w, minlength=count) for w in (error, np.abs(error), error ** 2)]
+        histogram = np.zeros((count, BACKTEST_ERROR_BINS + 2), dtype=np.int64)
+        np.add.at(histogram, (groups, error_bins), 1)
+        calibration = np.zeros((count, 3, BACKTEST_CONFIDENCE_BINS))
+        for row, weights in enumerate((np.ones_like(confidence), hits.astype(float), confidence)):
+            np.add.at(calibration[:, row, :], (groups[calibrated], confidence_bins[calibrated]),
+                      weights[calibrated])
+
+        for g, (key, horizon) in enumerate(labels.itertuples(index=False)):
+            previous = connection.execute(
+                'SELECT * FROM stats WHERE dimension = ? AND key = ? AND horizon_days = ?',
+                (dimension, key, int(horizon))
+            ).fetchone()
+            totals = [int(n[g]), int(hit_count[g]), float(sums[0][g]), float(sums[1][g]), float(sums[2][g])]
+            hist = histogram[g]
+            calib = calibration[g]
+            if previous is not None:
+                totals = [totals[0] + previous['n'], totals[1] + previous['hits'],
+                          totals[2] + previous['sum_error'], totals[3] + previous['sum_abs_error'],
+                          totals[4] + previous['sum_sq_error']]
+                hist = hist + np.frombuffer(previous['histogram'], dtype=np.int64)
+                calib = calib + np.frombuffer(previous['calibration'], dtype=np.float64).reshape(calib.shape)
+            connection.execute(
+                """INSERT OR REPLACE INTO stats (dimension, key, horizon_days, n, hits, sum_error, sum_abs_error,
+                       sum_sq_error, histogram, calibration) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (dimension, key, int(horizon), *totals, hist.astype(np.int64).tobytes(),
+                 calib.astype(np.float64).tobytes())
+            )
+
+
+def extend() -> Dict[str, int]:
+    """
+    Score every pending forecast whose realized return has arrived
+
+    Only pending forecasts whose target date has been reached are read, and
+    only the realized returns dated inside their match windows, so each new
+    package costs time proportional to what it can resolve rather than to
+    the stored history. A forecast is matched to the first realized return
+    of the same asset and horizon dated within BACKTEST_MATCH_WINDOW days of
+    its target date; forecasts whose window has passed without one expire.
+
+    Returns:
+        Counts of scored and expired forecasts
+    """
+    connection = get_connection()
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        latest = connection.execute('SELECT MAX(date) FROM realized').fetchone()[0]
+        if latest is None:
+            connection.execute('COMMIT')
+            return {'scored': 0, 'expired': 0}
+
+        pending = pd.DataFrame(
+            [tuple(r) for r in connection.execute(
+                """SELECT asset, horizon_days, issued, target, forecast, confidence FROM forecasts
+                   WHERE status = ? AND target <= ?""", (PENDING, latest))],
+            columns=['asset', 'horizon_days', 'issued', 'target', 'forecast', 'confidence'])
+        if pending.empty:
+            connection.execute('COMMIT')
+            return {'scored': 0, 'expired': 0}
+
+        window = pd.Timedelta(days=BACKTEST_MATCH_WINDOW)
+        pending['target_date'] = pd.to_datetime(pending['target'])
+        last = (pending['target_date'].max() + window).strftime('%Y-%m-%d')
+        realized = pd.DataFrame(
+            [tuple(r) for r in connection.execute(
+                'SELECT symbol, horizon_days, date, value, sector FROM realized WHERE date >= ? AND date <= ?',
+                (pending['target'].min(), last))],
+            columns=['asset', 'horizon_days', 'date', 'value', 'sector'])
+        realized['realized_date'] = pd.to_datetime(realized['date'])
+        realized['horizon_days'] = realized['horizon_days'].astype(np.int64)
+        pending['horizon_days'] = pending['horizon_days'].astype(np.int64)
+
+        matched = pd.merge_asof(
+            pending.sort_values('target_date'), realized.sort_values('realized_date'),
+            left_on='target_date', right_on='realized_date', by=['asset', 'horizon_days'],
+            direction='forward', tolerance=window
+        )
+        scored = matched[matched['value'].notna()]
+        expired = matched[matched['value'].isna() & (matched['target_date'] + window < pd.Timestamp(latest))]
+
+        if not scored.empty:
+            _fold(connection, scored)
+        for status, rows in ((SCORED, scored), (EXPIRED, expired)):
+            connection.executemany(
+                'UPDATE forecasts SET status = ? WHERE asset = ? AND horizon_days = ? AND issued = ?',
+                [(status, r.asset, int(r.horizon_days), r.issued) for r in rows.itertuples(index=False)]
+            )
+        connection.execute('COMMIT')
+    except Exception:
+        connection.execute('ROLLBACK')
+        raise
+
+    return {'scored': len(scored), 'expired': len(expired)}
+
+
+def ingest_workbook(path: Path, sheets: Dict[str, pd.DataFrame], schema: str) -> Optional[Dict[str, Any]]:
+    """
+    Store a processed forecast or top performer package and score what it resolves
+
+    Args:
+        path: Source workbook path
+        sheets: Sheets matching the schema
+        schema: Workbook schema ('forecast' or 'top30'; others are ignored)
+
+    Returns:
+        Ingest and scoring counts, or None for other schemas
+    """
+    if schema not in ('forecast', 'top30'):
+        return None
+    frame = combine_sheets(sheets, schema)
+    if frame.empty:
+        return None
+    result = ingest_forecasts(path, frame) if schema == 'forecast' else ingest_realized(path, frame)
+    result.update(extend())
+    return result
+
+
+def _quantile(histogram: np.ndarray, q: float) -> Optional[float]:
+    """Error quantile from the histogram (bin midpoint; clamped to the histogram range)"""
+    total = histogram.sum()
+    if total == 0:
+        return None
+    edges = np.linspace(-BACKTEST_ERROR_RANGE, BACKTEST_ERROR_RANGE, BACKTEST_ERROR_BINS + 1)
+    centers = np.concatenate(([-BACKTEST_ERROR_RANGE], (edges[:-1] + edges[1:]) / 2, [BACKTEST_ERROR_RANGE]))
+    position = int(np.searchsorted(np.cumsum(histogram), q * total))
+    return round(float(centers[min(position, len(centers) - 1)]), 4)
+
+
+def _summary(n: int, hits: float, sum_error: float, sum_abs_error: float, sum_sq_error: float,
+             histogram: np.ndarray, calibration: np.ndarray) -> Dict[str, Any]:
+    width = 100.0 / BACKTEST_CONFIDENCE_BINS
+    buckets = []
+    gap = 0.0
+    for b in range(BACKTEST_CONFIDENCE_BINS):
+        count = calibration[0, b]
+        if count == 0:
+            continue
+        hit_rate = calibration[1, b] / count
+        mean_confidence = calibration[2, b] / count
+        gap += count * abs(hit_rate - mean_confidence / 100.0)
+        buckets.append({'confidence_low': b * width, 'confidence_high': (b + 1) * width, 'n': int(count),
+                        'mean_confidence': round(mean_confidence, 2), 'hit_rate': round(hit_rate, 4)})
+    calibrated = calibration[0].sum()
+    return {
+        'n': int(n),
+        'hit_rate': round(hits / n, 4),
+        'bias': round(sum_error / n, 4),
+        'mae': round(sum_abs_error / n, 4),
+        'rmse': round(float(np.sqrt(sum_sq_error / n)), 4),
+        'error_p10': _quantile(histogram, 0.10),
+        'error_p50': _quantile(histogram, 0.50),
+        'error_p90': _quantile(histogram, 0.90),
+        'calibration': buckets,
+        # Count-weighted gap between hit rate and stated confidence
+        'calibration_error': round(gap / calibrated, 4) if calibrated else None
+    }
+
+
+def get_results(dimension: str = 'horizon', key: Optional[str] = None, horizon_days: Optional[int] = None,
+                by_horizon: bool = True) -> List[Dict[str, Any]]:
+    """
+    Accuracy statistics for scored forecasts
+
+    Args:
+        dimension: 'horizon', 'asset' or 'sector'
+        key: Only this asset or sector
+        horizon_days: Only this horizon (trading days)
+        by_horizon: One row per key and horizon; False pools every horizon per key
+
+    Returns:
+        List of dictionaries with n, hit rate, bias, MAE, RMSE, error
+        percentiles and confidence calibration
+    """
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Unknown backtest dimension: {dimension}")
+    clauses = ['dimension = ?']
+    params: List[Any] = [dimension]
+    if key is not None:
+        clauses.append('key = ?')
+        params.append(key)
+    if horizon_days is not None:
+        clauses.append('horizon_days = ?')
+        params.append(int(horizon_days))
+
+    pooled: Dict[tuple, List[Any]] = {}
+    for row in get_connection().execute(
+            f"SELECT * FROM stats WHERE {' AND '.join(clauses)} ORDER BY key, horizon_days", params):
+        group = (row['key'], row['horizon_days'] if by_horizon else None)
+        values = [row['n'], row['hits'], row['sum_error'], row['sum_abs_error'], row['sum_sq_error'],
+                  np.frombuffer(row['histogram'], dtype=np.int64),
+                  np.frombuffer(row['calibration'], dtype=np.float64).reshape(3, BACKTEST_CONFIDENCE_BINS)]
+        # Every statistic is a sum, so pooling horizons is element-wise addition
+        pooled[group] = [a + b for a, b in zip(pooled[group], values)] if group in pooled else values
+
+    results = []
+    for (group_key, horizon), values in pooled.items():
+        entry = {'key': group_key, 'horizon_days': horizon}
+        entry.update(_summary(*values))
+        results.append(entry)
+    return results
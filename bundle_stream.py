@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Bundle Stream Module
+Streams ZIP archives of output files without temporary files
+"""
+
+import io
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from dashboard_config import BUNDLE_CHUNK_SIZE, BUNDLE_STORED_EXTENSIONS, DEFAULT_OUTPUT_DIR, OUTPUT_SUBDIRS
+from get_package_name import get_package_info
+
+
+class _StreamBuffer(io.RawIOBase):
+    """
+    Write-only, non-seekable sink that hands written bytes back to the caller
+
+    zipfile detects that it cannot seek and switches to data descriptors,
+    so every member is written in a single forward pass.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        """Return and forget everything written since the last drain"""
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def select_bundle_files(subdir: str, date: Optional[str] = None,
+                        package: Optional[str] = None) -> List[Tuple[Path, str]]:
+    """
+    Select output files for a bundle
+
+    Args:
+        subdir: Output subdirectory name (spreadsheets, heatmaps, ...)
+        date: Optional YYYY-MM-DD filter, matched against the package date in
+            the filename or, failing that, the modification date
+        package: Optional package name filter (case-insensitive)
+
+    Returns:
+        List of (path, archive name) tuples sorted by name
+    """
+    if subdir not in OUTPUT_SUBDIRS:
+        raise ValueError(f"Unknown output directory: {subdir}")
+
+    subdir_path = Path(DEFAULT_OUTPUT_DIR) / subdir
+    if not subdir_path.exists():
+        return []
+
+    selected = []
+    for path in sorted(subdir_path.iterdir()):
+        if not path.is_file() or path.name.startswith('.'):
+            continue
+
+        if date or package:
+            info = get_package_info(path.name)
+            if package and info['package_name'].lower() != package.lower():
+                continue
+            if date:
+                file_date = info['date_info'].get('date') or \
+                    datetime.fromtimestamp(path.stat().st_mtime).strftime('%Y-%m-%d')
+                if file_date != date:
+                    continue
+
+        selected.append((path, f"{subdir}/{path.name}"))
+
+    return selected
+
+
+def iter_zip_stream(files: List[Tuple[Path, str]], chunk_size: int = BUNDLE_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive of the given files piece by piece
+
+    Members whose format is already compressed (PNG, xlsx, ...) are stored
+    as-is; everything else is deflated. At most one read chunk plus its
+    compressed output is held in memory at any time.
+
+    Args:
+        files: List of (path, archive name) tuples
+        chunk_size: Bytes read from each file per step
+
+    Returns:
+        Iterator over archive bytes
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, mode='w') as archive:
+        for path, arcname in files:
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            extension = path.suffix.lower().lstrip('.')
+            info.compress_type = zipfile.ZIP_STORED if extension in BUNDLE_STORED_EXTENSIONS \
+                else zipfile.ZIP_DEFLATED
+
+            with open(path, 'rb') as source, archive.open(info, mode='w') as target:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+
+    # Central directory is written when the archive closes
+    data = buffer.drain()
+    if data:
+        yield data
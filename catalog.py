@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+"""
+Catalog Module
+SQLite metadata catalog for input/output files, packages, jobs and lineage
+"""
+
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from dashboard_config import (CATALOG_DB, CATALOG_RECONCILE_INTERVAL, DEFAULT_INPUT_DIR, DEFAULT_OUTPUT_DIR,
+                              INPUT_FILE_PATTERN, OUTPUT_SUBDIRS)
+from get_package_name import get_package_info
+
+logger = logging.getLogger(__name__)
+
+# Bytes hashed from the start and end of a file for its fingerprint
+FINGERPRINT_SAMPLE = 64 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    area TEXT NOT NULL,
+    subdir TEXT NOT NULL DEFAULT '',
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    fingerprint TEXT NOT NULL,
+    package_name TEXT,
+    package_date TEXT,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_area_mtime ON files (area, subdir, mtime DESC);
+CREATE INDEX IF NOT EXISTS idx_files_area_name ON files (area, subdir, name);
+CREATE INDEX IF NOT EXISTS idx_files_package ON files (package_name, package_date);
+CREATE INDEX IF NOT EXISTS idx_files_fingerprint ON files (fingerprint);
+
+CREATE TABLE IF NOT EXISTS generations (
+    area TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS packages (
+    name TEXT PRIMARY KEY,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    params TEXT,
+    metadata TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at DESC);
+
+CREATE TABLE IF NOT EXISTS lineage (
+    job_id TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    input_fingerprint TEXT,
+    output_path TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (job_id, input_path, output_path)
+);
+CREATE INDEX IF NOT EXISTS idx_lineage_input ON lineage (input_path);
+CREATE INDEX IF NOT EXISTS idx_lineage_output ON lineage (output_path);
+
+CREATE TABLE IF NOT EXISTS schema_decisions (
+    fingerprint TEXT PRIMARY KEY,
+    schema TEXT NOT NULL,
+    sheets TEXT NOT NULL,
+    detected_at REAL NOT NULL
+);
+"""
+
+SORT_COLUMNS = {
+    'modified': 'mtime',
+    'name': 'name COLLATE NOCASE',
+    'size': 'size',
+    'package': 'package_name'
+}
+
+_local = threading.local()
+_reconcile_lock = threading.Lock()
+_last_reconcile = {'at': 0.0}
+_file_listeners: List[Callable[[str, str, str, Optional[Dict[str, Any]]], None]] = []
+
+
+def _reset_after_fork():
+    """Worker processes must not reuse connections inherited from their parent"""
+    global _local
+    _local = threading.local()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def add_file_listener(callback: Callable[[str, str, str, Optional[Dict[str, Any]]], None]):
+    """
+    Register a callback run after this process changes file rows
+
+    Args:
+        callback: Called with (event, area, path, row): event is 'upsert'
+            (row is the file dictionary) or 'remove' (row is None)
+    """
+    _file_listeners.append(callback)
+
+
+def _notify_files(events: List[tuple]):
+    for event in events:
+        for callback in _file_listeners:
+            try:
+                callback(*event)
+            except Exception as e:
+                logger.error(f"Catalog file listener failed for {event[2]}: {e}")
+
+
+def _file_event(connection: sqlite3.Connection, area: str, path: str) -> tuple:
+    row = connection.execute('SELECT * FROM files WHERE path = ?', (path,)).fetchone()
+    return ('upsert', area, path, _row_to_dict(row) if row else None)
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Get this thread's catalog connection, creating the schema on first use
+
+    Returns:
+        SQLite connection in WAL mode with dict-like rows
+    """
+    connection = getattr(_local, 'connection', None)
+    if connection is None:
+        Path(CATALOG_DB).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(CATALOG_DB, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('PRAGMA busy_timeout=30000')
+        connection.executescript(SCHEMA)
+        _local.connection = connection
+    return connection
+
+
+def file_fingerprint(path: Path, size: Optional[int] = None) -> str:
+    """
+    Cheap content fingerprint: file size plus hashes of its first and last blocks
+
+    Args:
+        path: File to fingerprint
+        size: File size if already known
+
+    Returns:
+        Hex digest identifying the file version
+    """
+    size = path.stat().st_size if size is None else size
+    digest = hashlib.sha1(str(size).encode('ascii'))
+    with open(path, 'rb') as handle:
+        digest.update(handle.read(FINGERPRINT_SAMPLE))
+        if size > FINGERPRINT_SAMPLE:
+            handle.seek(max(FINGERPRINT_SAMPLE, size - FINGERPRINT_SAMPLE))
+            digest.update(handle.read(FINGERPRINT_SAMPLE))
+    return digest.hexdigest()
+
+
+def _bump_generation(connection: sqlite3.Connection, area: str):
+    """Mark an area's file rows as changed (after the change, so readers never see the mark first)"""
+    connection.execute(
+        """INSERT INTO generations (area, generation) VALUES (?, 1)
+           ON CONFLICT(area) DO UPDATE SET generation = generation + 1""",
+        (area,)
+    )
+
+
+def file_generations() -> Dict[str, int]:
+    """
+    Change counters of the input and output file rows
+
+    Every process writing the catalog bumps an area's counter when it adds,
+    changes or removes one of its rows, so comparing counters tells a
+    process about changes it received no file events for (rows written by
+    workers are already current when this process reconciles).
+
+    Returns:
+        Dictionary of area to generation (0 before any change)
+    """
+    generations = {'input': 0, 'output': 0}
+    for row in get_connection().execute('SELECT area, generation FROM generations'):
+        generations[row['area']] = row['generation']
+    return generations
+
+
+def _area_dirs() -> List[tuple]:
+    """Directories tracked by the catalog as (area, subdir, path, pattern)"""
+    dirs = [('input', '', Path(DEFAULT_INPUT_DIR), INPUT_FILE_PATTERN)]
+    for subdir in OUTPUT_SUBDIRS:
+        dirs.append(('output', subdir, Path(DEFAULT_OUTPUT_DIR) / subdir, '*'))
+    return dirs
+
+
+def _upsert_file(connection: sqlite3.Connection, area: str, subdir: str, path: Path,
+                 stat: os.stat_result, fingerprint: Optional[str] = None):
+    """Insert or refresh one file row (and its package for inputs)"""
+    now = time.time()
+    info = get_package_info(path.name)
+    package_name = info['package_name']
+    fingerprint = fingerprint or file_fingerprint(path, stat.st_size)
+
+    connection.execute(
+        """INSERT INTO files (path, area, subdir, name, size, mtime, fingerprint, package_name, package_date, seen_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT(path) DO UPDATE SET size=excluded.size, mtime=excluded.mtime,
+               fingerprint=excluded.fingerprint, package_name=excluded.package_name,
+               package_date=excluded.package_date, seen_at=excluded.seen_at""",
+        (str(path), area, subdir, path.name, stat.st_size, stat.st_mtime, fingerprint,
+         package_name, info['date_info'].get('date'), now)
+    )
+    _bump_generation(connection, area)
+    if area == 'input':
+        connection.execute(
+            """INSERT INTO packages (name, first_seen, last_seen) VALUES (?, ?, ?)
+               ON CONFLICT(name) DO UPDATE SET last_seen=excluded.last_seen""",
+            (package_name, now, now)
+        )
+
+
+def reconcile(force: bool = False) -> Dict[str, int]:
+    """
+    Bring the catalog in line with the directories on disk
+
+    Unchanged files (same size and mtime) are skipped without hashing. Passes
+    are throttled to one per CATALOG_RECONCILE_INTERVAL unless forced.
+
+    Args:
+        force: Run even if a pass happened recently
+
+    Returns:
+        Counts of added, updated and removed rows
+    """
+    counts = {'added': 0, 'updated': 0, 'removed': 0}
+    events = []
+    with _reconcile_lock:
+        if not force and time.time() - _last_reconcile['at'] < CATALOG_RECONCILE_INTERVAL:
+            return counts
+
+        connection = get_connection()
+        for area, subdir, directory, pattern in _area_dirs():
+            known = {
+                row['path']: (row['size'], row['mtime'])
+                for row in connection.execute(
+                    'SELECT path, size, mtime FROM files WHERE area = ? AND subdir = ?', (area, subdir))
+            }
+
+            connection.execute('BEGIN')
+            try:
+                if directory.exists():
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            if not entry.is_file() or entry.name.startswith('.') \
+                                    or not fnmatch.fnmatch(entry.name, pattern):
+                                continue
+                            path = directory / entry.name
+                            stat = entry.stat()
+                            previous = known.pop(str(path), None)
+                            if previous == (stat.st_size, stat.st_mtime):
+                                continue
+                            _upsert_file(connection, area, subdir, path, stat)
+                            counts['updated' if previous else 'added'] += 1
+                            if _file_listeners:
+                                events.append(_file_event(connection, area, str(path)))
+
+                for stale_path in known:
+                    connection.execute('DELETE FROM files WHERE path = ?', (stale_path,))
+                    _bump_generation(connection, area)
+                    counts['removed'] += 1
+                    events.append(('remove', area, stale_path, None))
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+
+        _last_reconcile['at'] = time.time()
+    _notify_files(events)
+    return counts
+
+
+def record_file(path: Path, area: str = 'input', subdir: str = '') -> Optional[Dict[str, Any]]:
+    """
+    Record a single new or changed file immediately (e.g. after an upload)
+
+    Args:
+        path: File path on disk
+        area: 'input' or 'output'
+        subdir: Output subdirectory name ('' for inputs)
+
+    Returns:
+        Catalog row for the file, or None if the catalog does not track it
+    """
+    path = Path(path)
+    if area == 'input' and not fnmatch.fnmatch(path.name, INPUT_FILE_PATTERN):
+        return None
+    connection = get_connection()
+    _upsert_file(connection, area, subdir, path, path.stat())
+    event = _file_event(connection, area, str(path))
+    _notify_files([event])
+    return event[3]
+
+
+def forget_file(path: Path) -> bool:
+    """
+    Remove a file row (e.g. after a delete)
+
+    Args:
+        path: File path on disk
+
+    Returns:
+        True if a row was removed
+    """
+    connection = get_connection()
+    row = connection.execute('SELECT area FROM files WHERE path = ?', (str(path),)).fetchone()
+    if row is None:
+        return False
+    connection.execute('DELETE FROM files WHERE path = ?', (str(path),))
+    _bump_generation(connection, row['area'])
+    _notify_files([('remove', row['area'], str(path), None)])
+    return True
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    """Shape a files row like the dictionaries the listing routes return"""
+    return {
+        'name': row['name'],
+        'size': row['size'],
+        'modified': datetime.fromtimestamp(row['mtime']).strftime('%Y-%m-%d %H:%M:%S'),
+        'path': row['path'],
+        'package': row['package_name'],
+        'package_date': row['package_date'],
+        'fingerprint': row['fingerprint']
+    }
+
+
+def query_files(area: str, subdir: Optional[str] = None, package: Optional[str] = None,
+                name_contains: Optional[str] = None, sort: str = 'modified', descending: bool = True,
+                limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Query catalogued files with indexed filters and sorts
+
+    Args:
+        area: 'input' or 'output'
+        subdir: Output subdirectory filter
+        package: Package name filter
+        name_contains: Case-insensitive substring filter on the file name
+        sort: One of 'modified', 'name', 'size', 'package'
+        descending: Sort direction
+        limit: Maximum number of rows
+        offset: Rows to skip
+
+    Returns:
+        List of file dictionaries
+    """
+    reconcile()
+
+    clauses = ['area = ?']
+    params: List[Any] = [area]
+    if subdir is not None:
+        clauses.append('subdir = ?')
+        params.append(subdir)
+    if package:
+        clauses.append('package_name = ?')
+        params.append(package)
+    if name_contains:
+        clauses.append('name LIKE ?')
+        params.append(f'%{name_contains}%')
+
+    order = SORT_COLUMNS.get(sort, 'mtime') + (' DESC' if descending else ' ASC')
+    sql = f"SELECT * FROM files WHERE {' AND '.join(clauses)} ORDER BY {order}"
+    if limit is not None:
+        sql += ' LIMIT ? OFFSET ?'
+        params.extend([int(limit), int(offset)])
+
+    return [_row_to_dict(row) for row in get_connection().execute(sql, params)]
+
+
+def list_output_files(**filters) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Get catalogued output files grouped by subdirectory
+
+    Args:
+        **filters: Passed through to query_files
+
+    Returns:
+        Dictionary mapping subdirectory name to file dictionaries
+    """
+    output_files = {}
+    for subdir in OUTPUT_SUBDIRS:
+        if (Path(DEFAULT_OUTPUT_DIR) / subdir).exists():
+            output_files[subdir] = query_files('output', subdir=subdir, **filters)
+    return output_files
+
+
+def list_packages() -> List[Dict[str, Any]]:
+    """
+    Get packages with their input file counts and latest dated version
+
+    Returns:
+        List of package dictionaries sorted by name
+    """
+    reconcile()
+    rows = get_connection().execute(
+        """SELECT p.name, p.first_seen, p.last_seen, COUNT(f.path) AS files, MAX(f.package_date) AS latest_date
+           FROM packages p LEFT JOIN files f ON f.package_name = p.name AND f.area = 'input'
+           GROUP BY p.name ORDER BY p.name"""
+    )
+    return [dict(row) for row in rows]
+
+
+def find_predecessor(path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Get the previous dated version of an input file's package
+
+    Args:
+        path: Input file path (its name carries the package and date)
+
+    Returns:
+        File dictionary of the latest input of the same package dated
+        before this one, or None
+    """
+    info = get_package_info(Path(path).name)
+    date = info['date_info'].get('date')
+    if not date:
+        return None
+    reconcile()
+    row = get_connection().execute(
+        """SELECT * FROM files WHERE area = 'input' AND package_name = ? AND package_date < ?
+           ORDER BY package_date DESC, name DESC LIMIT 1""",
+        (info['package_name'], date)
+    ).fetchone()
+    return _row_to_dict(row) if row else None
+
+
+def create_job(kind: str, params: Optional[Dict[str, Any]] = None, job_id: Optional[str] = None) -> str:
+    """
+    Record a new job in the catalog
+
+    Args:
+        kind: Job type, e.g. 'process'
+        params: JSON-serialisable job parameters
+        job_id: Explicit id (generated when omitted)
+
+    Returns:
+        The job id
+    """
+    job_id = job_id or uuid.uuid4().hex
+    get_connection().execute(
+        'INSERT INTO jobs (id, kind, status, created_at, params) VALUES (?, ?, ?, ?, ?)',
+        (job_id, kind, 'queued', time.time(), json.dumps(params or {}))
+    )
+    return job_id
+
+
+def update_job(job_id: str, status: Optional[str] = None, error: Optional[str] = None,
+               metadata: Optional[Dict[str, Any]] = None):
+    """
+    Update a job's status, error and/or merge extra metadata
+
+    Args:
+        job_id: Job id
+        status: New status ('queued', 'running', 'succeeded', 'failed', ...)
+        error: Error message for failed jobs
+        metadata: Keys merged into the job's stored metadata
+    """
+    connection = get_connection()
+    now = time.time()
+    if status is not None:
+        connection.execute(
+            """UPDATE jobs SET status = ?,
+                   started_at = CASE WHEN ? = 'running' AND started_at IS NULL THEN ? ELSE started_at END,
+                   finished_at = CASE WHEN ? IN ('succeeded', 'failed', 'rejected', 'cancelled', 'timeout') THEN ? ELSE finished_at END
+               WHERE id = ?""",
+            (status, status, now, status, now, job_id)
+        )
+    if error is not None:
+        connection.execute('UPDATE jobs SET error = ? WHERE id = ?', (error, job_id))
+    if metadata:
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT metadata FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            merged = json.loads(row['metadata'] or '{}') if row else {}
+            merged.update(metadata)
+            connection.execute('UPDATE jobs SET metadata = ? WHERE id = ?', (json.dumps(merged), job_id))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+
+def _job_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    """Decode a jobs row"""
+    job = dict(row)
+    job['params'] = json.loads(job['params'] or '{}')
+    job['metadata'] = json.loads(job['metadata'] or '{}')
+    return job
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a job with its lineage
+
+    Args:
+        job_id: Job id
+
+    Returns:
+        Job dictionary, or None if unknown
+    """
+    connection = get_connection()
+    row = connection.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = _job_to_dict(row)
+    job['lineage'] = [dict(r) for r in connection.execute(
+        'SELECT input_path, input_fingerprint, output_path FROM lineage WHERE job_id = ?', (job_id,))]
+    return job
+
+
+def list_jobs(status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Get the most recent jobs
+
+    Args:
+        status: Optional status filter
+        limit: Maximum number of jobs
+
+    Returns:
+        List of job dictionaries, newest first
+    """
+    connection = get_connection()
+    if status:
+        rows = connection.execute(
+            'SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?', (status, limit))
+    else:
+        rows = connection.execute('SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,))
+    return [_job_to_dict(row) for row in rows]
+
+
+def record_lineage(job_id: str, input_path: Path, output_path: Path, input_fingerprint: Optional[str] = None):
+    """
+    Record that a job produced an output from an input
+
+    Args:
+        job_id: Job id
+        input_path: Input file path
+        output_path: Output file path
+        input_fingerprint: Fingerprint of the input version used
+    """
+    if input_fingerprint is None and Path(input_path).exists():
+        input_fingerprint = file_fingerprint(Path(input_path))
+    get_connection().execute(
+        """INSERT OR REPLACE INTO lineage (job_id, input_path, input_fingerprint, output_path, created_at)
+           VALUES (?, ?, ?, ?, ?)""",
+        (job_id, str(input_path), input_fingerprint, str(output_path), time.time())
+    )
+
+
+def get_lineage(path: Path) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Get the lineage of a file in both directions
+
+    Args:
+        path: Input or output file path
+
+    Returns:
+        Dictionary with 'produced' (outputs made from this file) and
+        'sources' (inputs this file was made from)
+    """
+    connection = get_connection()
+    path = str(path)
+    return {
+        'produced': [dict(r) for r in connection.execute(
+            'SELECT job_id, output_path, input_fingerprint, created_at FROM lineage WHERE input_path = ?', (path,))],
+        'sources': [dict(r) for r in connection.execute(
+            'SELECT job_id, input_path, input_fingerprint, created_at FROM lineage WHERE output_path = ?', (path,))]
+    }
+
+
+def get_schema_decision(fingerprint: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the cached schema routing decision for a file version
+
+    Args:
+        fingerprint: File fingerprint
+
+    Returns:
+        Dictionary with schema and per-sheet layouts, or None
+    """
+    row = get_connection().execute(
+        'SELECT schema, sheets FROM schema_decisions WHERE fingerprint = ?', (fingerprint,)
+    ).fetchone()
+    if row is None:
+        return None
+    return {'schema': row['schema'], 'sheets': json.loads(row['sheets'])}
+
+
+def record_schema_decision(fingerprint: str, schema: str, sheets: Dict[str, Optional[str]]):
+    """
+    Cache the schema routing decision for a file version
+
+    Args:
+        fingerprint: File fingerprint
+        schema: Workbook schema name
+        sheets: Mapping of sheet name to matched layout (None if unmatched)
+    """
+    get_connection().execute(
+        'INSERT OR REPLACE INTO schema_decisions (fingerprint, schema, sheets, detected_at) VALUES (?, ?, ?, ?)',
+        (fingerprint, schema, json.dumps(sheets), time.time())
+    )
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Chart Module
+Renders time series line charts, downsampled to the figure's pixel width
+"""
+
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Union
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from dashboard_config import CHART_DOWNSAMPLE_METHOD, DEFAULT_OUTPUT_DIR, DPI, FIGURE_SIZE
+from downsampling import downsample_frame
+
+CHART_DIR = Path(DEFAULT_OUTPUT_DIR) / "charts"
+
+
+def plot_width() -> int:
+    """Width of a chart figure in pixels"""
+    return int(FIGURE_SIZE[0] * DPI)
+
+
+def render_line_chart(frame: pd.DataFrame, x_column: str, y_columns: List[str],
+                      output: Union[str, Path, BinaryIO], title: str = '',
+                      method: Optional[str] = CHART_DOWNSAMPLE_METHOD) -> Union[str, BinaryIO]:
+    """
+    Render one or more series as a line chart image
+
+    Each series is reduced to about one point per horizontal pixel before
+    plotting, so multi-year daily histories draw as fast as short ones and
+    keep their peaks and troughs.
+
+    Args:
+        frame: Rows ordered by the x column
+        x_column: X column (dates or numbers)
+        y_columns: Columns drawn as lines
+        output: Destination image path or writable binary file
+        title: Optional chart title
+        method: Downsampling method ('lttb', 'minmax' or None)
+
+    Returns:
+        Path of the written image, or the file object written to
+    """
+    if isinstance(output, (str, Path)):
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+    width = plot_width()
+
+    fig, ax = plt.subplots(figsize=FIGURE_SIZE, dpi=DPI)
+    try:
+        for column in y_columns:
+            points = downsample_frame(frame, x_column, column, width, method)
+            ax.plot(points[x_column], points[column], label=column, linewidth=1)
+        if len(y_columns) > 1:
+            ax.legend()
+        if title:
+            ax.set_title(title)
+        fig.autofmt_xdate()
+        fig.tight_layout()
+        fig.savefig(output, format='png')
+    finally:
+        plt.close(fig)
+
+    return str(output) if isinstance(output, (str, Path)) else output
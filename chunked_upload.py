@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Chunked Upload Module
+Resumable uploads written to disk chunk by chunk, verified by checksum
+"""
+
+import errno
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+from dashboard_config import (DEFAULT_INPUT_DIR, UPLOAD_CHUNK_SIZE, UPLOAD_MAX_SIZE, UPLOAD_SESSION_DIR,
+                              UPLOAD_SESSION_TTL)
+
+logger = logging.getLogger(__name__)
+
+# Block size for streaming request bodies and hashing files
+COPY_BLOCK = 1024 * 1024
+UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadNotFound(LookupError):
+    """Raised for an unknown, finished or expired upload session"""
+
+
+class ChunkRejected(ValueError):
+    """Raised when a chunk is not stored; carries the offset to resume from"""
+
+    def __init__(self, message: str, received: int):
+        super().__init__(message)
+        self.received = received
+
+
+def _paths(upload_id: str) -> Dict[str, Path]:
+    if not UPLOAD_ID.match(upload_id or ''):
+        raise UploadNotFound(f"Unknown upload: {upload_id}")
+    directory = Path(UPLOAD_SESSION_DIR)
+    return {
+        'meta': directory / f"{upload_id}.json",
+        'part': directory / f"{upload_id}.part",
+        'lock': directory / f"{upload_id}.lock"
+    }
+
+
+def _save(path: Path, meta: Dict[str, Any]):
+    """Replace the session metadata atomically"""
+    temp = path.with_suffix('.tmp')
+    temp.write_text(json.dumps(meta))
+    os.replace(temp, path)
+
+
+@contextmanager
+def _session(upload_id: str) -> Iterator[Dict[str, Any]]:
+    """
+    Hold a session's lock and yield its metadata
+
+    The lock is a file lock, so web processes sharing the upload directory
+    never interleave writes to the same upload.
+    """
+    paths = _paths(upload_id)
+    if not paths['meta'].exists():
+        raise UploadNotFound(f"Unknown upload: {upload_id}")
+    with open(paths['lock'], 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            try:
+                meta = json.loads(paths['meta'].read_text())
+            except FileNotFoundError:
+                # Finalized or aborted while we waited for the lock
+                raise UploadNotFound(f"Unknown upload: {upload_id}")
+            yield meta
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _move_into(source: Path, destination: Path):
+    """
+    Move a finished upload to its destination without exposing a partial file
+
+    A rename when both are on one filesystem; otherwise (a session directory
+    configured on another mount) a copy to a hidden name beside the
+    destination, renamed into place.
+    """
+    try:
+        os.replace(source, destination)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    temp = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}")
+    try:
+        shutil.copyfile(source, temp)
+        os.replace(temp, destination)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+    source.unlink()
+
+
+def _status(meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'upload_id': meta['upload_id'],
+        'filename': meta['filename'],
+        'size': meta['size'],
+        'received': meta['received'],
+        'complete': meta['received'] == meta['size'],
+        'chunk_size': UPLOAD_CHUNK_SIZE
+    }
+
+
+def _remove_session(paths: Dict[str, Path]):
+    for key in ('part', 'meta', 'lock'):
+        paths[key].unlink(missing_ok=True)
+
+
+def purge_expired(now: Optional[float] = None) -> int:
+    """
+    Delete sessions untouched for UPLOAD_SESSION_TTL seconds
+
+    Returns:
+        Number of sessions removed
+    """
+    now = time.time() if now is None else now
+    directory = Path(UPLOAD_SESSION_DIR)
+    if not directory.exists():
+        return 0
+    removed = 0
+    for meta_path in directory.glob('*.json'):
+        try:
+            if now - meta_path.stat().st_mtime < UPLOAD_SESSION_TTL:
+                continue
+            _remove_session(_paths(meta_path.stem))
+            removed += 1
+        except (OSError, UploadNotFound):
+            continue
+    if removed:
+        logger.info(f"Removed {removed} expired upload sessions")
+    return removed
+
+
+def init_upload(filename: str, size: int, sha256: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Start a resumable upload
+
+    Args:
+        filename: Sanitized destination file name in the input directory
+        size: Total size in bytes
+        sha256: Optional hex digest of the whole file, checked on finalize
+
+    Returns:
+        Upload status with the new upload id and the chunk size to use
+    """
+    if size <= 0:
+        raise ValueError("Upload size must be positive")
+    if size > UPLOAD_MAX_SIZE:
+        raise ValueError(f"File exceeds the {UPLOAD_MAX_SIZE} byte upload limit")
+    purge_expired()
+
+    upload_id = uuid.uuid4().hex
+    paths = _paths(upload_id)
+    paths['meta'].parent.mkdir(parents=True, exist_ok=True)
+    # Reserve the full size up front so chunks are written in place
+    with open(paths['part'], 'wb') as handle:
+        handle.truncate(size)
+    meta = {
+        'upload_id': upload_id,
+        'filename': filename,
+        'size': size,
+        'sha256': sha256.lower() if sha256 else None,
+        'received': 0,
+        'created': time.time()
+    }
+    _save(paths['meta'], meta)
+    return _status(meta)
+
+
+def get_upload(upload_id: str) -> Dict[str, Any]:
+    """Status of an upload; 'received' is the offset to resume from"""
+    with _session(upload_id) as meta:
+        return _status(meta)
+
+
+def write_chunk(upload_id: str, offset: int, stream: BinaryIO, length: int, checksum: str) -> Dict[str, Any]:
+    """
+    Write one chunk at its offset, straight from the request stream to disk
+
+    Chunks must arrive in order. Re-sending a chunk that was already stored
+    (e.g. after a lost response) is acknowledged without rewriting it. The
+    upload only advances once the chunk's SHA-256 matches, so a corrupted
+    or truncated chunk is simply sent again.
+
+    Args:
+        upload_id: Upload id from init_upload
+        offset: Byte offset of the chunk
+        stream: Readable request body
+        length: Chunk length in bytes
+        checksum: Hex SHA-256 of the chunk
+
+    Returns:
+        Upload status after the chunk
+    """
+    if not checksum:
+        raise ValueError("Chunk checksum is required")
+    if length <= 0 or length > UPLOAD_CHUNK_SIZE:
+        raise ValueError(f"Chunk length must be between 1 and {UPLOAD_CHUNK_SIZE} bytes")
+
+    with _session(upload_id) as meta:
+        received = meta['received']
+        if offset + length <= received:
+            return _status(meta)
+        if offset != received:
+            raise ChunkRejected(f"Expected a chunk at offset {received}", received)
+        if offset + length > meta['size']:
+            raise ValueError("Chunk extends past the declared file size")
+
+        digest = hashlib.sha256()
+        written = 0
+        descriptor = os.open(_paths(upload_id)['part'], os.O_WRONLY)
+        try:
+            while written < length:
+                block = stream.read(min(COPY_BLOCK, length - written))
+                if not block:
+                    break
+                os.pwrite(descriptor, block, offset + written)
+                digest.update(block)
+                written += len(block)
+        finally:
+            os.close(descriptor)
+
+        if written != length:
+            raise ChunkRejected(f"Chunk ended after {written} of {length} bytes", received)
+        if digest.hexdigest() != checksum.lower():
+            raise ChunkRejected("Chunk checksum mismatch", received)
+
+        meta['received'] = offset + length
+        _save(_paths(upload_id)['meta'], meta)
+        return _status(meta)
+
+
+def finalize_upload(upload_id: str, input_dir: str = DEFAULT_INPUT_DIR) -> Path:
+    """
+    Move a complete upload into the input directory
+
+    Args:
+        upload_id: Upload id from init_upload
+        input_dir: Destination directory
+
+    Returns:
+        Path of the finished file
+    """
+    paths = _paths(upload_id)
+    with _session(upload_id) as meta:
+        if meta['received'] != meta['size']:
+            raise ChunkRejected(f"Upload incomplete: {meta['received']} of {meta['size']} bytes",
+                                meta['received'])
+        if meta['sha256']:
+            digest = hashlib.sha256()
+            with open(paths['part'], 'rb') as handle:
+                for block in iter(lambda: handle.read(COPY_BLOCK), b''):
+                    digest.update(block)
+            if digest.hexdigest() != meta['sha256']:
+                # Chunk checksums passed, so the declared digest was wrong; start over
+                _remove_session(paths)
+                raise ValueError("File checksum mismatch")
+
+        destination = Path(input_dir) / meta['filename']
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        _move_into(paths['part'], destination)
+        paths['meta'].unlink(missing_ok=True)
+    paths['lock'].unlink(missing_ok=True)
+    return destination
+
+
+def abort_upload(upload_id: str):
+    """Discard an upload and its partial data"""
+    with _session(upload_id):
+        _remove_session(_paths(upload_id))
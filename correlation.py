@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Correlation Module
+Blocked pairwise correlation and covariance for cross-asset analysis
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from dashboard_config import CORRELATION_BLOCK_SIZE, CORRELATION_CACHE_SIZE, CORRELATION_MIN_PERIODS
+
+
+def pivot_returns(data: pd.DataFrame, date_col: str = 'Date', asset_col: str = 'Asset',
+                  value_col: str = 'Return') -> pd.DataFrame:
+    """
+    Pivot long-format observations into a dates x assets matrix
+
+    Args:
+        data: Long DataFrame with one row per date and asset
+        date_col: Column holding the observation date
+        asset_col: Column holding the asset identifier
+        value_col: Column holding the observed value
+
+    Returns:
+        Wide DataFrame indexed by date with one column per asset
+    """
+    return data.pivot_table(index=date_col, columns=asset_col, values=value_col, aggfunc='last').sort_index()
+
+
+def dataset_version(data: pd.DataFrame) -> str:
+    """
+    Compute a content hash identifying a returns matrix
+
+    Args:
+        data: Wide returns DataFrame
+
+    Returns:
+        Hex digest that changes whenever values, index or columns change
+    """
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    digest.update('|'.join(map(str, data.columns)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class CorrelationEngine:
+    """
+    Pairwise-complete correlation/covariance built from sufficient statistics
+
+    For every asset pair the engine keeps the overlap count, the sums and the
+    sums of squares of each side over the overlap, and the cross-product sum.
+    These are accumulated with blocked matrix multiplies (one BLAS call per
+    block pair) and can be extended by a single new row in O(N^2), so a daily
+    update never rescans history.
+    """
+
+    def __init__(self, labels: List[str], block_size: int = CORRELATION_BLOCK_SIZE,
+                 min_periods: int = CORRELATION_MIN_PERIODS):
+        self.labels = [str(label) for label in labels]
+        self.block_size = max(1, int(block_size))
+        self.min_periods = max(2, int(min_periods))
+
+        size = len(self.labels)
+        self.count = np.zeros((size, size))
+        self.sum_x = np.zeros((size, size))    # sum of asset i over rows where i and j are present
+        self.sum_xx = np.zeros((size, size))   # sum of squares of asset i over the same rows
+        self.sum_xy = np.zeros((size, size))   # cross-product over the same rows
+        self.rows = 0
+
+    @classmethod
+    def from_frame(cls, returns: pd.DataFrame, **kwargs) -> 'CorrelationEngine':
+        """
+        Build an engine from a dates x assets DataFrame
+
+        Args:
+            returns: Wide returns DataFrame (NaN marks missing observations)
+            **kwargs: Passed through to the constructor
+
+        Returns:
+            Populated CorrelationEngine
+        """
+        engine = cls(list(returns.columns), **kwargs)
+        engine.add_rows(returns.to_numpy(dtype=float, na_value=np.nan))
+        return engine
+
+    def add_rows(self, values: np.ndarray):
+        """
+        Accumulate a block of rows into the pairwise statistics
+
+        Args:
+            values: Array of shape (rows, assets) with NaN for missing data
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=float))
+        if values.shape[1] != len(self.labels):
+            raise ValueError(f"Expected {len(self.labels)} columns, got {values.shape[1]}")
+        if values.shape[0] == 0:
+            return
+
+        mask = np.isfinite(values).astype(float)
+        filled = np.where(mask > 0, values, 0.0)
+        squared = filled * filled
+        size = len(self.labels)
+        step = self.block_size
+
+        for i in range(0, size, step):
+            bi = slice(i, min(i + step, size))
+            mask_i, x_i, xx_i = mask[:, bi], filled[:, bi], squared[:, bi]
+            for j in range(i, size, step):
+                bj = slice(j, min(j + step, size))
+                mask_j, x_j, xx_j = mask[:, bj], filled[:, bj], squared[:, bj]
+
+                count = mask_i.T @ mask_j
+                cross = x_i.T @ x_j
+                self.count[bi, bj] += count
+                self.sum_xy[bi, bj] += cross
+                self.sum_x[bi, bj] += x_i.T @ mask_j
+                self.sum_xx[bi, bj] += xx_i.T @ mask_j
+                if j != i:
+                    # Mirror block: the same products seen from asset j's side
+                    self.count[bj, bi] += count.T
+                    self.sum_xy[bj, bi] += cross.T
+                    self.sum_x[bj, bi] += x_j.T @ mask_i
+                    self.sum_xx[bj, bi] += xx_j.T @ mask_i
+
+        self.rows += values.shape[0]
+
+    def add_row(self, row: pd.Series):
+        """
+        Fold one new date row into the statistics with rank-1 updates
+
+        Args:
+            row: Series indexed by asset label (missing assets are treated as NaN)
+        """
+        values = pd.Series(row, dtype=float).reindex(self.labels).to_numpy(dtype=float, na_value=np.nan)
+        mask = np.isfinite(values).astype(float)
+        filled = np.where(mask > 0, values, 0.0)
+
+        self.count += np.outer(mask, mask)
+        self.sum_x += np.outer(filled, mask)
+        self.sum_xx += np.outer(filled * filled, mask)
+        self.sum_xy += np.outer(filled, filled)
+        self.rows += 1
+
+    def covariance(self) -> np.ndarray:
+        """Pairwise-complete sample covariance matrix (NaN below min_periods)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = (self.sum_xy - self.sum_x * self.sum_x.T / self.count) / (self.count - 1)
+        cov[self.count < self.min_periods] = np.nan
+        return cov
+
+    def correlation(self) -> np.ndarray:
+        """Pairwise-complete Pearson correlation matrix (NaN below min_periods)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            centered_xy = self.sum_xy - self.sum_x * self.sum_x.T / self.count
+            centered_xx = self.sum_xx - self.sum_x * self.sum_x / self.count
+            corr = centered_xy / np.sqrt(centered_xx * centered_xx.T)
+        corr[self.count < self.min_periods] = np.nan
+        np.clip(corr, -1.0, 1.0, out=corr)
+        return corr
+
+    def result(self, version: Optional[str] = None) -> Dict[str, object]:
+        """
+        Package the current matrices for the heatmap renderer and APIs
+
+        Args:
+            version: Dataset version the statistics correspond to
+
+        Returns:
+            Dictionary with labelled correlation, covariance and overlap matrices
+        """
+        return {
+            'version': version,
+            'labels': list(self.labels),
+            'rows': self.rows,
+            'correlation': pd.DataFrame(self.correlation(), index=self.labels, columns=self.labels),
+            'covariance': pd.DataFrame(self.covariance(), index=self.labels, columns=self.labels),
+            'observations': pd.DataFrame(self.count.astype(int), index=self.labels, columns=self.labels)
+        }
+
+
+# Engines kept per dataset version, most recently used last
+_engine_cache: 'OrderedDict[str, CorrelationEngine]' = OrderedDict()
+_engine_lock = threading.Lock()
+
+
+def _remember(version: str, engine: CorrelationEngine):
+    """Store an engine in the version cache, evicting the oldest entries"""
+    _engine_cache[version] = engine
+    _engine_cache.move_to_end(version)
+    while len(_engine_cache) > CORRELATION_CACHE_SIZE:
+        _engine_cache.popitem(last=False)
+
+
+def get_correlation(returns: pd.DataFrame, version: Optional[str] = None) -> Dict[str, object]:
+    """
+    Get correlation results for a returns matrix, reusing cached statistics
+
+    Args:
+        returns: Wide dates x assets DataFrame
+        version: Dataset version key (computed from the data when omitted)
+
+    Returns:
+        Result dictionary from CorrelationEngine.result
+    """
+    version = version or dataset_version(returns)
+    with _engine_lock:
+        engine = _engine_cache.get(version)
+        if engine is not None:
+            _engine_cache.move_to_end(version)
+            return engine.result(version)
+
+    engine = CorrelationEngine.from_frame(returns)
+    with _engine_lock:
+        _remember(version, engine)
+    return engine.result(version)
+
+
+def update_correlation(version: str, new_row: pd.Series, new_version: str) -> Optional[Dict[str, object]]:
+    """
+    Extend a cached dataset version by one date row
+
+    Args:
+        version: Version key of the cached statistics to extend
+        new_row: Observations for the new date, indexed by asset
+        new_version: Version key for the extended dataset
+
+    Returns:
+        Updated result dictionary, or None if the base version is not cached
+    """
+    with _engine_lock:
+        engine = _engine_cache.pop(version, None)
+        if engine is None:
+            return None
+        engine.add_row(new_row)
+        _remember(new_version, engine)
+        return engine.result(new_version)
+
+
+def clear_correlation_cache():
+    """Drop all cached correlation statistics"""
+    with _engine_lock:
+        _engine_cache.clear()
@@ -9,6 +9,8 @@ import numpy as np
 from datetime import datetime, timedelta
 import os
 
+from dataframe_engine import get_engine
+
 def create_demo_forecast():
     """Create a demo forecast Excel file"""
     
@@ -49,11 +51,11 @@ def create_demo_forecast():
         df.to_excel(writer, sheet_name='3-7-14days', index=False)
         
         # Summary sheet
-        summary_data = df.groupby('Asset').agg({
+        summary_data = get_engine().group_aggregate(df, 'Asset', {
             'Forecast_Return': 'mean',
             'Confidence': 'mean',
             'Risk_Score': 'mean'
-        }).round(2)
+        }).round(2).set_index('Asset')
         summary_data.to_excel(writer, sheet_name='Summary')
         
         # Risk analysis sheet
@@ -102,10 +104,10 @@ def create_demo_macro():
         df.to_excel(writer, sheet_name='Macro_Data', index=False)
         
         # Add summary sheet
-        summary = df.groupby('Indicator').agg({
+        summary = get_engine().group_aggregate(df, 'Indicator', {
             'Current_Value': 'mean',
             'Change': 'mean'
-        }).round(2)
+        }).round(2).set_index('Indicator')
         summary.to_excel(writer, sheet_name='Summary')
     
     print(f"✅ Created demo macro analysis file: {output_file}")
@@ -151,10 +153,10 @@ def create_demo_top30():
         df.to_excel(writer, sheet_name='Top30', index=False)
         
         # Add sector summary
-        sector_summary = df.groupby('Sector').agg({
+        sector_summary = get_engine().group_aggregate(df, 'Sector', {
             'Return_1Y': 'mean',
             'Market_Cap': 'sum'
-        }).round(2)
+        }).round(2).set_index('Sector')
         sector_summary.to_excel(writer, sheet_name='Sector_Summary')
     
     print(f"✅ Created demo top 30 performance file: {output_file}")
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Dashboard Cache Module
+Listing versions, summary counters and rendered fragment cache for the dashboard page
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import catalog
+from dashboard_config import DASHBOARD_FRAGMENT_CACHE_SIZE, OUTPUT_SUBDIRS
+
+AREAS = ('input', 'output')
+
+
+class DashboardState:
+    """
+    Per-area listing versions and summary counters kept current from catalog file events
+
+    Each area's version increases whenever one of its files is added, changed
+    or removed, so (fragment, version) identifies a rendered section exactly.
+    Counters are adjusted per event instead of being recounted per page view;
+    an area is reloaded from the catalog when its generation shows changes
+    made by another process. Versions are local to this process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files: Dict[str, Tuple[str, str, int, Optional[str]]] = {}
+        self._versions = {area: 0 for area in AREAS}
+        self._counts = {area: 0 for area in AREAS}
+        self._bytes = {area: 0 for area in AREAS}
+        self._subdirs = {subdir: 0 for subdir in OUTPUT_SUBDIRS}
+        self._packages: Dict[str, int] = {}
+        self._generations: Dict[str, Optional[int]] = {area: None for area in AREAS}
+
+    def _add(self, area: str, path: str, row: Dict[str, Any]):
+        subdir = Path(path).parent.name if area == 'output' else ''
+        self._files[path] = (area, subdir, row['size'], row['package'] if area == 'input' else None)
+        self._counts[area] += 1
+        self._bytes[area] += row['size']
+        if area == 'output':
+            self._subdirs[subdir] = self._subdirs.get(subdir, 0) + 1
+        else:
+            self._packages[row['package']] = self._packages.get(row['package'], 0) + 1
+
+    def _remove(self, path: str) -> bool:
+        entry = self._files.pop(path, None)
+        if entry is None:
+            return False
+        area, subdir, size, package = entry
+        self._counts[area] -= 1
+        self._bytes[area] -= size
+        if area == 'output':
+            self._subdirs[subdir] -= 1
+        else:
+            self._packages[package] -= 1
+            if not self._packages[package]:
+                del self._packages[package]
+        return True
+
+    def load(self, files: Dict[str, List[Dict[str, Any]]], generations: Optional[Dict[str, int]] = None):
+        """
+        Replace the counters of some areas with catalog file dictionaries
+
+        Args:
+            files: Catalog file dictionaries per area to reload
+            generations: Catalog generations read before querying the files
+        """
+        with self._lock:
+            for path, entry in list(self._files.items()):
+                if entry[0] in files:
+                    self._remove(path)
+            for area, rows in files.items():
+                for row in rows:
+                    self._add(area, row['path'], row)
+                self._versions[area] += 1
+                if generations is not None:
+                    self._generations[area] = generations[area]
+
+    def stale_areas(self, generations: Dict[str, int]) -> List[str]:
+        """Areas whose catalog generation moved since they were last loaded"""
+        with self._lock:
+            return [area for area in AREAS if self._generations[area] != generations[area]]
+
+    def on_catalog_event(self, event: str, area: str, path: str, row: Optional[Dict[str, Any]]):
+        """catalog.add_file_listener callback"""
+        if area not in AREAS:
+            return
+        with self._lock:
+            changed = self._remove(path)
+            if event == 'upsert' and row is not None:
+                self._add(area, path, row)
+                changed = True
+            if changed:
+                self._versions[area] += 1
+
+    def version(self, area: str) -> int:
+        """Current listing version of an area"""
+        with self._lock:
+            return self._versions[area]
+
+    def summary(self) -> Dict[str, Any]:
+        """Summary counters and listing versions for the page header"""
+        with self._lock:
+            return {
+                'total_input_files': self._counts['input'],
+                'total_output_files': self._counts['output'],
+                'input_bytes': self._bytes['input'],
+                'output_bytes': self._bytes['output'],
+                'output_counts': dict(self._subdirs),
+                'packages': len(self._packages),
+                'versions': dict(self._versions)
+            }
+
+
+class FragmentCache:
+    """
+    Rendered HTML fragments keyed by (fragment name, listing version)
+
+    A fragment is re-rendered only after its area's version moves; older
+    versions simply age out of the LRU. Each fragment carries an ETag
+    hashed from its HTML, so validators stay correct across restarts and
+    between processes whose versions differ.
+    """
+
+    def __init__(self, capacity: int = DASHBOARD_FRAGMENT_CACHE_SIZE):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Tuple[str, int], Tuple[str, str]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, name: str, version: int, render: Callable[[], str]) -> Tuple[str, str]:
+        """
+        Get a cached fragment, rendering and storing it on a miss
+
+        Args:
+            name: Fragment name
+            version: Listing version the fragment reflects
+            render: Produces the fragment HTML
+
+        Returns:
+            (fragment HTML, quoted ETag)
+        """
+        key = (name, version)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        html = render()
+        cached = (html, f'"{name}-{hashlib.sha1(html.encode("utf-8")).hexdigest()[:20]}"')
+        with self._lock:
+            self._entries[key] = cached
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return cached
+
+    def clear(self):
+        """Drop every cached fragment"""
+        with self._lock:
+            self._entries.clear()
+
+
+_instances: Dict[str, Any] = {'state': None, 'fragments': None}
+_instances_lock = threading.Lock()
+
+
+def get_dashboard_state() -> DashboardState:
+    """
+    Get the process-wide dashboard state, loading it from the catalog on first use
+
+    Each call runs the catalog's throttled reconciliation and then reloads
+    any area whose catalog generation moved, so files written by workers or
+    other processes (which this process gets no file events for) move the
+    versions too.
+
+    Returns:
+        DashboardState instance
+    """
+    with _instances_lock:
+        state = _instances['state']
+        if state is None:
+            state = DashboardState()
+            catalog.add_file_listener(state.on_catalog_event)
+            _instances['state'] = state
+    catalog.reconcile()
+    generations = catalog.file_generations()
+    stale = state.stale_areas(generations)
+    if stale:
+        state.load({area: catalog.query_files(area) for area in stale}, generations)
+    return state
+
+
+def get_fragment_cache() -> FragmentCache:
+    """Get the process-wide rendered fragment cache"""
+    with _instances_lock:
+        if _instances['fragments'] is None:
+            _instances['fragments'] = FragmentCache()
+        return _instances['fragments']
@@ -14,32 +14,100 @@ WEB_HOST = "localhost"
 WEB_PORT = 5000
 WEB_DEBUG = True
 WEB_THREADED = True
+DASHBOARD_LAZY_SECTIONS = True  # Serve a light page shell and load the file listings as cached fragments
+DASHBOARD_FRAGMENT_CACHE_SIZE = 16  # Rendered listing fragments kept in memory
 
 # File Upload Settings
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
 ALLOWED_EXTENSIONS = {'xls', 'xlsx'}
 UPLOAD_FOLDER = "uploads"
+UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024  # Largest file accepted through chunked uploads (2GB)
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # Largest chunk per request; must stay below MAX_FILE_SIZE
+UPLOAD_SESSION_DIR = "Input/.uploads"  # Partial uploads; inside the input directory so finishing one is a rename
+UPLOAD_SESSION_TTL = 24 * 3600  # Seconds an idle upload can be resumed before it is purged
 
 # Processing Settings
 DEFAULT_INPUT_DIR = "Input"
 DEFAULT_OUTPUT_DIR = "Output"
 BATCH_SIZE = 10  # Number of files to process at once
+OUTPUT_SUBDIRS = ['spreadsheets', 'heatmaps', 'charts', 'summaries']
+DATAFRAME_ENGINE = 'pandas'  # 'pandas', 'polars' or 'arrow' for filters, groupbys and joins
+DATAFRAME_ENGINE_THREADS = 0  # Threads for the polars/arrow engines (0 = library default)
+
+# Catalog Settings
+CATALOG_DB = "Output/.catalog.db"  # SQLite metadata catalog (WAL mode)
+CATALOG_RECONCILE_INTERVAL = 30  # Seconds between filesystem reconciliation passes
+INPUT_FILE_PATTERN = "*.xls*"
 
 # Display Settings
 HEATMAP_COLORMAP = "RdYlGn"  # Red-Yellow-Green
+HEATMAP_COLOR_STOPS = 11  # Color stops sent with heatmap data for client-side rendering
 CHART_STYLE = "seaborn-v0_8"
 FIGURE_SIZE = (12, 8)
 DPI = 100
 
+# Preview Settings
+THUMBNAIL_SIZE = (360, 240)  # Maximum thumbnail width and height in pixels
+THUMBNAIL_FORMAT = 'webp'  # 'webp' or 'png'
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_DIR = ".thumbnails"  # Cache directory inside the output directory
+THUMBNAIL_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
+
 # Logging Settings
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 LOG_FILE = "dashboard.log"
+LOG_DIR = "logs"  # LOG_FILE is written here
+LOG_JSON = True  # Structured JSON lines in LOG_FILE (console keeps LOG_FORMAT)
+LOG_ROTATION = "size"  # 'size' (LOG_MAX_BYTES) or a time interval such as 'midnight' or 'H'
+LOG_MAX_BYTES = 10 * 1024 * 1024  # 10MB
+LOG_BACKUP_COUNT = 5
+LOG_QUEUE_SIZE = 10000  # Records buffered for the background writer; overflow is dropped, never blocks
+LOG_DEBUG_SAMPLE = 100  # Keep 1 in N DEBUG records
 
 # Performance Settings
 CACHE_TIMEOUT = 300  # 5 minutes
 MAX_WORKERS = 4
-TIMEOUT = 30  # seconds
+TIMEOUT = 30  # seconds, enforced per processing job
+JOB_STAGE_TIMEOUTS = {'load': 20, 'summarize': 10, 'write': 20}  # Per-stage deadlines in seconds
+JOB_KILL_GRACE = 5  # Seconds a worker gets to stop cooperatively before it is terminated
+SHEET_PARSE_WORKERS = 1  # Concurrent sheet parser processes per workbook (1 disables; time it with workbook_loader.py)
+SHEET_PARSE_MIN_BYTES = 1024 * 1024  # Smaller workbooks are parsed in process
+
+# Profiling Settings
+PROFILING_ENABLED = False  # Profile every job; otherwise only jobs submitted with "profile": true
+PROFILE_TRACEMALLOC = True  # Record top Python allocation sites per stage
+PROFILE_TOP_ALLOCATIONS = 10  # Allocation sites kept per stage
+PROFILE_CPU_PROFILER = 'cprofile'  # 'cprofile', 'pyinstrument' or None
+PROFILE_TOP_FUNCTIONS = 25  # Functions kept in the stored CPU profile summary
+PROFILE_DIR = "Output/.profiles"  # Full profiler output per job
+
+# Admission Control Settings
+ADMISSION_QUEUE_DEPTH = 20  # Jobs waiting for a worker before new work is rejected
+ADMISSION_PER_CLIENT = 4  # Queued plus running jobs allowed per client
+ADMISSION_MEMORY_BUDGET_MB = 2048  # Estimated memory all running jobs may use
+ADMISSION_MEMORY_FACTOR = 15  # Estimated in-memory size per byte of workbook
+ADMISSION_MIN_JOB_MB = 32  # Floor for a single job's memory estimate
+
+# Work Distribution Settings
+WORK_QUEUE_ENABLED = False  # Let the web app claim Input files from the shared work queue
+WORK_QUEUE_DB = "Output/.work_queue.db"  # Lease table shared by every node on the volume
+WORK_LEASE_TTL = 120  # Seconds a claim stays valid without renewal
+WORK_POLL_INTERVAL = 10  # Seconds between scans for new work and lease renewals
+WORK_MAX_ATTEMPTS = 3  # Claims per file before it is marked failed
+
+# Package Diff Settings
+PACKAGE_DIFF_ENABLED = True  # Diff each dated package against its predecessor while processing
+PACKAGE_DIFF_TOLERANCE = 1e-9  # Numeric changes at or below this are ignored
+PACKAGE_DIFF_CACHE_SIZE = 8  # Processed packages kept per worker for incremental recomputation
+
+# Load Test Settings
+LOAD_TEST_CONCURRENCY = 8  # Concurrent simulated clients
+LOAD_TEST_DURATION = 30  # Seconds per run
+LOAD_TEST_MIX = {'index': 1, 'files': 4, 'download': 4, 'process': 1}  # Relative request weights
+LOAD_TEST_DATA_COPIES = 10  # Copies of each demo workbook in the generated data set
+LOAD_TEST_BASELINE = "loadtest_baseline.json"
+LOAD_TEST_TOLERANCE = 0.2  # Allowed slowdown vs. baseline before a run fails (20%)
 
 # Security Settings
 SECRET_KEY = "your-secret-key-change-this-in-production"
@@ -49,9 +117,50 @@ SESSION_TIMEOUT = 3600  # 1 hour
 SUPPORTED_OUTPUT_FORMATS = ['xlsx', 'png', 'jpg', 'pdf', 'csv']
 DEFAULT_OUTPUT_FORMAT = 'xlsx'
 
+# Report Writer Settings
+REPORT_CHUNK_ROWS = 50000  # Rows buffered per chunk when streaming reports
+REPORT_COMPANION_FORMAT = 'csv'  # 'csv', 'parquet' or None
+
+# Result Cache Settings
+RESULT_CACHE_MEMORY_BYTES = 256 * 1024 * 1024  # Memory budget for cached analytics results
+RESULT_CACHE_EVICTION_SAMPLE = 8  # Least recently used entries weighed by recompute cost when evicting
+RESULT_CACHE_DISK_DIR = None  # e.g. "Output/.result_cache" to share results between worker processes
+RESULT_CACHE_DISK_BYTES = 1024 * 1024 * 1024  # Disk tier budget, oldest entries deleted first
+
+# Download Settings
+BUNDLE_CHUNK_SIZE = 64 * 1024  # Bytes read per step when streaming ZIP bundles
+BUNDLE_STORED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp', 'xlsx', 'pdf', 'zip', 'gz', 'parquet'}
+
+# Analytics Settings
+CORRELATION_BLOCK_SIZE = 256  # Assets per block in blocked matrix products
+CORRELATION_MIN_PERIODS = 2  # Minimum overlapping observations per pair
+CORRELATION_CACHE_SIZE = 8  # Dataset versions kept in memory
+MONTE_CARLO_PATHS = 100000  # Simulated paths per Asset x Time_Period
+MONTE_CARLO_CHUNK_PATHS = 10000  # Paths generated per chunk
+MONTE_CARLO_BINS = 2000  # Histogram bins used for percentile estimates
+MONTE_CARLO_PERCENTILES = [5, 25, 50, 75, 95]
+MONTE_CARLO_SEED = 42
+RISK_CONFIDENCE_LEVEL = 0.95  # VaR/CVaR confidence level
+RISK_ROLLING_WINDOW = 63  # Observations in rolling risk windows (~3 months)
+RISK_FREE_RATE = 0.0  # Annual risk-free rate used for Sharpe ratios
+TRADING_DAYS_PER_YEAR = 252
+
+# Macro History Settings
+MACRO_HISTORY_DB = "Output/.macro_history.db"  # Daily macro snapshots per Indicator x Region
+MACRO_ZSCORE_MIN_PERIODS = 3  # Prior changes required before a change z-score is reported
+
+# Backtest Settings
+BACKTEST_DB = "Output/.backtest.db"  # Stored forecasts, realized returns and running accuracy statistics
+BACKTEST_MATCH_WINDOW = 7  # Calendar days after a forecast's target date a realized return may be dated
+BACKTEST_ERROR_RANGE = 50.0  # Error histogram covers +/- this many percentage points
+BACKTEST_ERROR_BINS = 200  # Error histogram resolution (plus one underflow and one overflow bin)
+BACKTEST_CONFIDENCE_BINS = 10  # Calibration buckets over Confidence 0-100
+
 # Chart Settings
 CHART_TYPES = ['line', 'bar', 'heatmap', 'scatter', 'pie']
 DEFAULT_CHART_TYPE = 'line'
+CHART_DOWNSAMPLE_METHOD = 'lttb'  # 'lttb', 'minmax' or None to plot every point of long series
+CHART_MAX_POINTS = 4000  # Upper bound on points per series requested from the chart data API
 
 # Data Processing
 DEFAULT_DATE_FORMAT = "%Y-%m-%d"
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+DataFrame Engine Module
+Pluggable backends (pandas, Polars, Arrow) for filtering, grouping and joining
+"""
+
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from dashboard_config import DATAFRAME_ENGINE, DATAFRAME_ENGINE_THREADS
+
+logger = logging.getLogger(__name__)
+
+Keys = Union[str, Sequence[str]]
+
+# Aggregations every engine supports, keyed by the names callers pass
+AGGREGATIONS = ('mean', 'sum', 'min', 'max', 'count', 'first')
+JOIN_TYPES = ('inner', 'left', 'outer')
+
+
+def _key_list(keys: Keys) -> List[str]:
+    return [keys] if isinstance(keys, str) else list(keys)
+
+
+def _where_mask(frame: pd.DataFrame, where: Dict[str, Any]) -> pd.Series:
+    mask = pd.Series(True, index=frame.index)
+    for column, value in where.items():
+        mask &= frame[column] == value
+    return mask
+
+
+def _check_aggregations(aggregations: Dict[str, str]):
+    unknown = sorted(set(aggregations.values()) - set(AGGREGATIONS))
+    if unknown:
+        raise ValueError(f"Unsupported aggregation(s): {', '.join(unknown)}")
+
+
+class PandasEngine:
+    """
+    Default engine; operations run directly on the pandas frames
+
+    Every engine takes and returns pandas DataFrames so callers do not
+    depend on the backend. Group keys come back as ordinary columns, sorted.
+    """
+
+    name = 'pandas'
+
+    def filter_eq(self, frame: pd.DataFrame, column: str, value: Any) -> pd.DataFrame:
+        """Rows where `column` equals `value`"""
+        return frame[frame[column] == value]
+
+    def partition_by(self, frame: pd.DataFrame, column: str) -> Dict[Any, pd.DataFrame]:
+        """
+        Split a frame into one frame per distinct value of a column
+
+        One grouping pass replaces a boolean-mask scan per value. Rows with a
+        missing key are dropped; values keep first-seen order.
+
+        Args:
+            frame: Source data
+            column: Partition column
+
+        Returns:
+            Mapping of value to its rows
+        """
+        return {key: group for key, group in frame.groupby(column, sort=False, dropna=True)}
+
+    def group_aggregate(self, frame: pd.DataFrame, keys: Keys, aggregations: Dict[str, str],
+                        where: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """
+        Aggregate columns per group
+
+        Args:
+            frame: Source data
+            keys: Group key column(s)
+            aggregations: Column to aggregation name (see AGGREGATIONS)
+            where: Only rows where each column equals its value; filtered
+                in the same plan as the grouping by the lazy engines
+
+        Returns:
+            One row per group, keys first, aggregated columns keep their names
+        """
+        _check_aggregations(aggregations)
+        if where:
+            frame = frame[_where_mask(frame, where)]
+        return frame.groupby(_key_list(keys), sort=True, dropna=True).agg(aggregations).reset_index()
+
+    def join(self, left: pd.DataFrame, right: pd.DataFrame, on: Keys, how: str = 'inner') -> pd.DataFrame:
+        """Join two frames on shared key column(s) ('inner', 'left' or 'outer')"""
+        return left.merge(right, on=_key_list(on), how=how)
+
+    def pivot(self, frame: pd.DataFrame, index: str, columns: str, values: str,
+              aggregation: str = 'mean', where: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """
+        Wide table of `values` with one row per `index` and one column per `columns` value
+
+        Returns:
+            Pivoted frame with the index as its first column
+        """
+        _check_aggregations({values: aggregation})
+        if where:
+            frame = frame[_where_mask(frame, where)]
+        matrix = frame.pivot_table(index=index, columns=columns, values=values, aggfunc=aggregation).reset_index()
+        matrix.columns.name = None
+        return matrix
+
+
+class PolarsEngine(PandasEngine):
+    """
+    Polars backend; each operation runs as one lazy query plan
+
+    Frames are converted from and to pandas (through Arrow) at the edges
+    of every call, so work that should be planned together is passed to a
+    single call (e.g. group_aggregate's `where` filter, or pivot's
+    aggregation). The plan is optimised (predicate and projection pushdown)
+    and executed on Polars' thread pool when collected.
+    """
+
+    name = 'polars'
+
+    def __init__(self, threads: int = DATAFRAME_ENGINE_THREADS):
+        if threads:
+            # Read once when Polars is first imported
+            os.environ.setdefault('POLARS_MAX_THREADS', str(threads))
+        try:
+            import polars
+            # from_pandas and to_pandas convert through Arrow
+            import pyarrow
+        except ImportError:
+            raise ImportError("polars and pyarrow are required for the 'polars' dataframe engine")
+        self.pl = polars
+        self._full_join = 'full' if int(polars.__version__.split('.')[0]) >= 1 else 'outer'
+
+    def _lazy(self, frame: pd.DataFrame):
+        return self.pl.from_pandas(frame).lazy()
+
+    def filter_eq(self, frame: pd.DataFrame, column: str, value: Any) -> pd.DataFrame:
+        pl = self.pl
+        return self._lazy(frame).filter(pl.col(column) == value).collect().to_pandas()
+
+    def partition_by(self, frame: pd.DataFrame, column: str) -> Dict[Any, pd.DataFrame]:
+        pl = self.pl
+        data = self._lazy(frame).filter(pl.col(column).is_not_null()).collect()
+        parts = data.partition_by(column, maintain_order=True, as_dict=True)
+        # Polars 1.x keys partitions by tuple even for a single column
+        return {key[0] if isinstance(key, tuple) else key: part.to_pandas() for key, part in parts.items()}
+
+    def group_aggregate(self, frame: pd.DataFrame, keys: Keys, aggregations: Dict[str, str],
+                        where: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        _check_aggregations(aggregations)
+        pl = self.pl
+        keys = _key_list(keys)
+        expressions = [getattr(pl.col(column), aggregation)() for column, aggregation in aggregations.items()]
+        conditions = [pl.col(k).is_not_null() for k in keys]
+        conditions += [pl.col(column) == value for column, value in (where or {}).items()]
+        plan = (self._lazy(frame)
+                .filter(pl.all_horizontal(conditions))
+                .group_by(keys)
+                .agg(expressions)
+                .sort(keys))
+        return plan.collect().to_pandas()
+
+    def join(self, left: pd.DataFrame, right: pd.DataFrame, on: Keys, how: str = 'inner') -> pd.DataFrame:
+        if how not in JOIN_TYPES:
+            raise ValueError(f"Unsupported join type: {how}")
+        plan = self._lazy(left).join(self._lazy(right), on=_key_list(on),
+                                     how=self._full_join if how == 'outer' else how,
+                                     **({'coalesce': True} if how == 'outer' else {}))
+        return plan.collect().to_pandas()
+
+    def pivot(self, frame: pd.DataFrame, index: str, columns: str, values: str,
+              aggregation: str = 'mean', where: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        # Filter and aggregate in the lazy plan; only the small grouped result is reshaped
+        grouped = self.group_aggregate(frame, [index, columns], {values: aggregation}, where)
+        return super().pivot(grouped, index, columns, values, 'first')
+
+
+class ArrowEngine(PandasEngine):
+    """
+    Apache Arrow backend; uses pyarrow.compute kernels and Acero's
+    multi-threaded hash group-by and hash join
+    """
+
+    name = 'arrow'
+
+    _AGGREGATIONS = {'mean': 'mean', 'sum': 'sum', 'min': 'min', 'max': 'max', 'count': 'count', 'first': 'first'}
+    _JOINS = {'inner': 'inner', 'left': 'left outer', 'outer': 'full outer'}
+
+    def __init__(self, threads: int = DATAFRAME_ENGINE_THREADS):
+        try:
+            import pyarrow
+            import pyarrow.compute
+        except ImportError:
+            raise ImportError("pyarrow is required for the 'arrow' dataframe engine")
+        self.pa = pyarrow
+        self.pc = pyarrow.compute
+        if threads:
+            pyarrow.set_cpu_count(threads)
+
+    def _table(self, frame: pd.DataFrame):
+        return self.pa.Table.from_pandas(frame, preserve_index=False)
+
+    def filter_eq(self, frame: pd.DataFrame, column: str, value: Any) -> pd.DataFrame:
+        table = self._table(frame)
+        return table.filter(self.pc.equal(table[column], value)).to_pandas()
+
+    def partition_by(self, frame: pd.DataFrame, column: str) -> Dict[Any, pd.DataFrame]:
+        table = self._table(frame)
+        table = table.filter(self.pc.is_valid(table[column]))
+        if table.num_rows == 0:
+            return {}
+        # A stable sort groups equal keys into runs; each run is a zero-copy slice
+        order = self.pc.sort_indices(table[column])
+        ordered = table.take(order)
+        keys = ordered[column].to_numpy(zero_copy_only=False)
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        ends = np.append(starts[1:], len(keys))
+        # Restore first-seen order to match the pandas engine
+        first_seen = order.to_numpy()[starts]
+        parts = {}
+        for run in np.argsort(first_seen, kind='stable'):
+            start, end = starts[run], ends[run]
+            parts[keys[start]] = ordered.slice(start, end - start).to_pandas()
+        return parts
+
+    def group_aggregate(self, frame: pd.DataFrame, keys: Keys, aggregations: Dict[str, str],
+                        where: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        _check_aggregations(aggregations)
+        keys = _key_list(keys)
+        where = where or {}
+        needed = keys + [c for c in aggregations if c not in keys]
+        table = self._table(frame[needed + [c for c in where if c not in needed]])
+        for key in keys:
+            table = table.filter(self.pc.is_valid(table[key]))
+        for column, value in where.items():
+            table = table.filter(self.pc.equal(table[column], value))
+        specs = [(column, self._AGGREGATIONS[aggregation]) for column, aggregation in aggregations.items()]
+        # 'first' needs an ordered (single-threaded) group-by to be deterministic
+        ordered = 'first' in aggregations.values()
+        grouped = table.group_by(keys, use_threads=not ordered).aggregate(specs)
+        # Acero names results '<column>_<aggregation>'
+        result = grouped.to_pandas().rename(columns={f"{column}_{aggregation}": column for column, aggregation in specs})
+        return result[keys + list(aggregations)].sort_values(keys).reset_index(drop=True)
+
+    def join(self, left: pd.DataFrame, right: pd.DataFrame, on: Keys, how: str = 'inner') -> pd.DataFrame:
+        if how not in JOIN_TYPES:
+            raise ValueError(f"Unsupported join type: {how}")
+        joined = self._table(left).join(self._table(right), keys=_key_list(on), join_type=self._JOINS[how],
+                                        coalesce_keys=True)
+        return joined.to_pandas()
+
+    def pivot(self, frame: pd.DataFrame, index: str, columns: str, values: str,
+              aggregation: str = 'mean', where: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        grouped = self.group_aggregate(frame, [index, columns], {values: aggregation}, where)
+        return super().pivot(grouped, index, columns, values, 'first')
+
+
+ENGINES = {'pandas': PandasEngine, 'polars': PolarsEngine, 'arrow': ArrowEngine}
+
+_engines: Dict[str, PandasEngine] = {}
+
+
+def get_engine(name: Optional[str] = None) -> PandasEngine:
+    """
+    Get a dataframe engine
+
+    When the configured engine's library is not installed the pandas engine
+    is used instead (with a warning); an explicitly requested engine raises.
+
+    Args:
+        name: Engine name ('pandas', 'polars' or 'arrow'); DATAFRAME_ENGINE if None
+
+    Returns:
+        Engine instance (shared per process)
+    """
+    explicit = name is not None
+    name = (name or DATAFRAME_ENGINE or 'pandas').lower()
+    if name in _engines:
+        return _engines[name]
+    if name not in ENGINES:
+        raise ValueError(f"Unknown dataframe engine: {name}")
+    try:
+        engine = ENGINES[name]()
+    except ImportError as e:
+        if explicit:
+            raise
+        logger.warning(f"{e}; falling back to the pandas engine")
+        engine = get_engine('pandas')
+    _engines[name] = engine
+    return engine
+
+
+def available_engines() -> List[str]:
+    """Names of the engines whose libraries are installed"""
+    names = []
+    for name in ENGINES:
+        try:
+            get_engine(name)
+            names.append(name)
+        except ImportError:
+            continue
+    return names
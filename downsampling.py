@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Downsampling Module
+Reduces long time series to about one point per pixel while keeping their visual shape
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dashboard_config import CHART_DOWNSAMPLE_METHOD
+
+METHODS = ('lttb', 'minmax')
+
+
+def _as_numeric(x: np.ndarray) -> np.ndarray:
+    """Numeric x coordinates (datetimes become nanoseconds)"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    if x.dtype == object:
+        return pd.to_datetime(x).to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def _bucket_edges(n: int, buckets: int) -> np.ndarray:
+    return np.linspace(0, n, buckets + 1).astype(np.int64)
+
+
+def _padded(values: np.ndarray, starts: np.ndarray, ends: np.ndarray, fill: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gather variable-length buckets into a (buckets, longest) matrix
+
+    Returns:
+        (matrix with `fill` past each bucket's end, matrix of source indices)
+    """
+    width = int((ends - starts).max())
+    index = starts[:, None] + np.arange(width)[None, :]
+    inside = index < ends[:, None]
+    index = np.minimum(index, len(values) - 1)
+    return np.where(inside, values[index], fill), index
+
+
+def minmax_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of each bucket's minimum and maximum (min/max decimation)
+
+    Args:
+        y: Values, finite
+        threshold: Target number of points (two per bucket)
+
+    Returns:
+        Sorted unique indices, always including the first and last point
+    """
+    n = len(y)
+    if threshold >= n or n < 3:
+        return np.arange(n)
+    buckets = max(1, threshold // 2)
+    edges = _bucket_edges(n, buckets)
+    low, index = _padded(y, edges[:-1], edges[1:], np.inf)
+    high = np.where(np.isinf(low), -np.inf, low)
+    rows = np.arange(buckets)
+    chosen = np.concatenate(([0, n - 1], index[rows, low.argmin(axis=1)], index[rows, high.argmax(axis=1)]))
+    return np.unique(chosen)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices chosen by Largest-Triangle-Three-Buckets
+
+    The first and last points are kept; every bucket in between keeps the
+    point forming the largest triangle with the point kept from the
+    previous bucket and the average of the next bucket. Bucket averages and
+    triangle areas are computed for all buckets at once; only the chain of
+    chosen points is walked bucket by bucket, over a precomputed matrix.
+
+    Args:
+        x: Numeric x coordinates, increasing
+        y: Values, finite
+        threshold: Target number of points (at least 3)
+
+    Returns:
+        Sorted indices, one per bucket plus the two end points
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Inner points [1, n - 1) split into threshold - 2 buckets
+    edges = 1 + _bucket_edges(n - 2, threshold - 2)
+    starts, ends = edges[:-1], edges[1:]
+    sizes = (ends - starts).astype(np.float64)
+    x_sum = np.add.reduceat(x[1:n - 1], starts - 1)
+    y_sum = np.add.reduceat(y[1:n - 1], starts - 1)
+    # Average of the bucket after each bucket; the last bucket looks at the final point
+    next_x = np.append(x_sum[1:] / sizes[1:], x[n - 1])
+    next_y = np.append(y_sum[1:] / sizes[1:], y[n - 1])
+
+    bucket_x, index = _padded(x, starts, ends, np.nan)
+    bucket_y = y[index]
+    # Twice the triangle area is |(ax - cx)(by - ay) - (ax - bx)(cy - ay)| for anchor a, candidate b, average c;
+    # expanded so the anchor (known only while walking) multiplies per-bucket precomputed terms
+    dx = bucket_x - next_x[:, None]
+    dy = bucket_y - next_y[:, None]
+    cross = bucket_x * next_y[:, None] - bucket_y * next_x[:, None]
+
+    chosen = np.empty(threshold, dtype=np.int64)
+    chosen[0], chosen[-1] = 0, n - 1
+    anchor_x, anchor_y = x[0], y[0]
+    for bucket in range(threshold - 2):
+        area = np.abs(anchor_x * dy[bucket] - anchor_y * dx[bucket] + cross[bucket])
+        best = int(np.nanargmax(area))
+        chosen[bucket + 1] = index[bucket, best]
+        anchor_x, anchor_y = bucket_x[bucket, best], bucket_y[bucket, best]
+    return chosen
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, threshold: int,
+                       method: Optional[str] = CHART_DOWNSAMPLE_METHOD) -> np.ndarray:
+    """
+    Row indices to keep when drawing a series about `threshold` points wide
+
+    Every row is kept when no downsampling is needed, including rows with
+    missing values. When downsampling, missing values are skipped when
+    choosing points, so gaps are bridged rather than dragging extremes
+    toward them.
+
+    Args:
+        x: X values (numbers or datetimes), increasing
+        y: Y values
+        threshold: Target number of points, e.g. the plot width in pixels
+        method: 'lttb', 'minmax' or None to keep every point
+
+    Returns:
+        Sorted row indices into the original arrays
+    """
+    if method is not None and method not in METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.flatnonzero(np.isfinite(y))
+    if method is None or len(finite) <= threshold:
+        return np.arange(len(y))
+    if method == 'minmax':
+        return finite[minmax_indices(y[finite], threshold)]
+    return finite[lttb_indices(_as_numeric(x)[finite], y[finite], threshold)]
+
+
+def downsample_frame(frame: pd.DataFrame, x_column: str, y_column: str, threshold: int,
+                     method: Optional[str] = CHART_DOWNSAMPLE_METHOD) -> pd.DataFrame:
+    """
+    Keep the rows that draw `y_column` against `x_column` at the target width
+
+    Other columns come along with the kept rows.
+
+    Args:
+        frame: Rows ordered by x
+        x_column: X column
+        y_column: Column whose shape is preserved
+        threshold: Target number of points
+        method: 'lttb', 'minmax' or None
+
+    Returns:
+        Subset of the frame's rows, in order
+    """
+    keep = downsample_indices(frame[x_column].to_numpy(), frame[y_column].to_numpy(dtype=np.float64),
+                              threshold, method)
+    return frame.iloc[keep]
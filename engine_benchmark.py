@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Engine Benchmark Module
+Compares the dataframe engines on identical filter, groupby and join workloads
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dataframe_engine import ENGINES, available_engines, get_engine
+
+DEFAULT_ROWS = 1_000_000
+DEFAULT_SYMBOLS = 2000
+DEFAULT_REPEAT = 5
+TIME_PERIODS = ['3_days', '7_days', '14_days', '1_month', '3_months', '1_year']
+SECTORS = ['Technology', 'Healthcare', 'Finance', 'Energy', 'Consumer']
+
+
+def build_dataset(rows: int = DEFAULT_ROWS, symbols: int = DEFAULT_SYMBOLS,
+                  seed: int = 42) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Forecast-shaped rows and a symbol reference table
+
+    Args:
+        rows: Forecast rows
+        symbols: Distinct symbols
+        seed: Random seed, so every run benchmarks the same data
+
+    Returns:
+        (forecasts, reference) frames
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array([f"SYM_{i:05d}" for i in range(symbols)])
+    forecasts = pd.DataFrame({
+        'symbol': names[rng.integers(0, symbols, rows)],
+        'Time_Period': np.array(TIME_PERIODS)[rng.integers(0, len(TIME_PERIODS), rows)],
+        'Forecast_Return': rng.normal(2.0, 8.0, rows).round(2),
+        'Confidence': rng.uniform(60, 95, rows).round(1),
+        'Volatility': rng.uniform(10, 40, rows).round(1),
+        'Risk_Score': rng.uniform(1, 10, rows).round(1)
+    })
+    reference = pd.DataFrame({
+        'symbol': names,
+        'sector': np.array(SECTORS)[rng.integers(0, len(SECTORS), symbols)],
+        'Market_Cap': rng.uniform(1, 100, symbols).round(1)
+    })
+    return forecasts, reference
+
+
+def workloads(forecasts: pd.DataFrame, reference: pd.DataFrame) -> Dict[str, Callable[[Any], Any]]:
+    """Workload name to a function running it on an engine"""
+    symbol = forecasts['symbol'].iloc[0]
+    return {
+        'filter': lambda engine: engine.filter_eq(forecasts, 'symbol', symbol),
+        'partition': lambda engine: engine.partition_by(forecasts, 'symbol'),
+        'groupby': lambda engine: engine.group_aggregate(
+            forecasts, ['symbol', 'Time_Period'],
+            {'Forecast_Return': 'mean', 'Confidence': 'max', 'Risk_Score': 'min', 'Volatility': 'count'}),
+        'filter_agg': lambda engine: engine.group_aggregate(
+            forecasts, 'symbol', {'Forecast_Return': 'mean'}, where={'Time_Period': '1_month'}),
+        'join': lambda engine: engine.join(forecasts, reference, 'symbol', 'left'),
+        'pivot': lambda engine: engine.pivot(forecasts, 'symbol', 'Time_Period', 'Forecast_Return')
+    }
+
+
+def _canonical(result: Any) -> Any:
+    """Order-independent form of a workload result for comparing engines"""
+    if isinstance(result, dict):
+        return {key: _canonical(value) for key, value in sorted(result.items())}
+    frame = result.reset_index(drop=True)
+    frame = frame[sorted(frame.columns, key=str)]
+    return frame.sort_values(list(frame.columns)).reset_index(drop=True)
+
+
+def _same(left: Any, right: Any) -> bool:
+    if isinstance(left, dict):
+        return left.keys() == right.keys() and all(_same(left[k], right[k]) for k in left)
+    try:
+        pd.testing.assert_frame_equal(left, right, check_dtype=False, check_exact=False, rtol=1e-9)
+        return True
+    except AssertionError:
+        return False
+
+
+def run_benchmark(engines: List[str], rows: int = DEFAULT_ROWS, symbols: int = DEFAULT_SYMBOLS,
+                  repeat: int = DEFAULT_REPEAT, only: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Time every workload on every engine
+
+    Each engine runs the same workloads on the same data; results are
+    checked against the pandas engine so a faster engine cannot win by
+    computing something different.
+
+    Args:
+        engines: Engine names to compare
+        rows: Forecast rows in the data set
+        symbols: Distinct symbols in the data set
+        repeat: Timed runs per workload (the median is reported)
+        only: Workload names to run (all if None)
+
+    Returns:
+        Report dictionary keyed by workload, then engine
+    """
+    forecasts, reference = build_dataset(rows, symbols)
+    jobs = {name: job for name, job in workloads(forecasts, reference).items() if not only or name in only}
+    reference_engine = get_engine('pandas')
+
+    report = {'rows': rows, 'symbols': symbols, 'repeat': repeat, 'engines': engines, 'workloads': {}}
+    for name, job in jobs.items():
+        expected = _canonical(job(reference_engine))
+        figures = {}
+        for engine_name in engines:
+            engine = get_engine(engine_name)
+            result = job(engine)  # Warm-up run, also used for the parity check
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                job(engine)
+                timings.append(time.perf_counter() - started)
+            figures[engine_name] = {
+                'median_ms': round(statistics.median(timings) * 1000, 2),
+                'min_ms': round(min(timings) * 1000, 2),
+                'matches_pandas': _same(expected, _canonical(result))
+            }
+        report['workloads'][name] = figures
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    """Print the median time per workload and engine, with speed-up over pandas"""
+    print(f"\n⏱️  {report['rows']:,} rows, {report['symbols']:,} symbols, median of {report['repeat']} runs")
+    print(f"{'workload':<10} " + ' '.join(f"{name:>18}" for name in report['engines']))
+    for workload, figures in report['workloads'].items():
+        base = figures.get('pandas', {}).get('median_ms')
+        cells = []
+        for name in report['engines']:
+            entry = figures[name]
+            cell = f"{entry['median_ms']:.1f}ms"
+            if base and name != 'pandas':
+                cell += f" x{base / entry['median_ms']:.1f}" if entry['median_ms'] else ''
+            if not entry['matches_pandas']:
+                cell += ' ❌'
+            cells.append(f"{cell:>18}")
+        print(f"{workload:<10} " + ' '.join(cells))
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Compare dataframe engines on identical workloads")
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help="Comma-separated engines; ones that are not installed are skipped")
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    parser.add_argument('--symbols', type=int, default=DEFAULT_SYMBOLS)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--workloads', help="Comma-separated subset of filter,partition,groupby,join,pivot")
+    parser.add_argument('--output', help="Write the report as JSON")
+    args = parser.parse_args()
+
+    installed = set(available_engines())
+    engines = []
+    for name in (n.strip() for n in args.engines.split(',') if n.strip()):
+        if name in installed:
+            engines.append(name)
+        else:
+            print(f"⚠️  Skipping {name}: not installed")
+    if 'pandas' not in engines:
+        engines.insert(0, 'pandas')
+
+    only = [w.strip() for w in args.workloads.split(',')] if args.workloads else None
+    report = run_benchmark(engines, args.rows, args.symbols, args.repeat, only)
+    print_report(report)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    return 0 if all(e['matches_pandas'] for f in report['workloads'].values() for e in f.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
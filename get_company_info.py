@@ -8,6 +8,8 @@ import pandas as pd
 from typing import Dict, Optional, List
 import re
 
+from dataframe_engine import get_engine
+
 def get_company_info(symbol: str, data: pd.DataFrame = None) -> Dict[str, str]:
     """
     Get company information for a given symbol
@@ -53,10 +55,8 @@ def get_company_list(data: pd.DataFrame) -> List[Dict[str, str]]:
     
     if data is not None and not data.empty:
         if 'symbol' in data.columns:
-            symbols = data['symbol'].unique()
-            for symbol in symbols:
-                if pd.notna(symbol) and str(symbol).strip():
-                    company_data = data[data['symbol'] == symbol]
+            for symbol, company_data in get_engine().partition_by(data, 'symbol').items():
+                if str(symbol).strip():
                     companies.append(get_company_info(symbol, company_data))
     
     return companies
@@ -9,6 +9,9 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple
 import re
 
+from dataframe_engine import get_engine
+from risk_analytics import compute_risk_report
+
 def get_index(symbol: str, data: pd.DataFrame = None) -> Dict[str, any]:
     """
     Get index information for a given symbol
@@ -95,6 +98,42 @@ def get_index_performance(symbol: str, data: pd.DataFrame = None) -> Dict[str, f
     
     return performance
 
+def get_index_risk(symbol: str, data: pd.DataFrame = None) -> Dict[str, float]:
+    """
+    Get risk metrics (VaR, CVaR, drawdown, Sharpe) for a given index
+
+    Args:
+        symbol: Index symbol
+        data: Optional DataFrame with a 'return' column or a 'close' price column
+
+    Returns:
+        Dictionary with risk metrics
+    """
+    risk = {
+        'var_historical': 0.0,
+        'cvar_historical': 0.0,
+        'var_parametric': 0.0,
+        'cvar_parametric': 0.0,
+        'max_drawdown': 0.0,
+        'volatility': 0.0,
+        'rolling_sharpe': 0.0
+    }
+
+    if data is not None and not data.empty:
+        if 'return' in data.columns:
+            returns = pd.to_numeric(data['return'], errors='coerce')
+        elif 'close' in data.columns:
+            returns = pd.to_numeric(data['close'], errors='coerce').pct_change().iloc[1:]
+        else:
+            return risk
+
+        report = compute_risk_report(returns.to_frame(symbol))
+        for metric, value in report.iloc[0].items():
+            if pd.notna(value):
+                risk[metric.lower()] = float(value)
+
+    return risk
+
 def get_index_list(data: pd.DataFrame) -> List[Dict[str, any]]:
     """
     Get list of all indices from data
@@ -115,9 +154,12 @@ def get_index_list(data: pd.DataFrame) -> List[Dict[str, any]]:
         else:
             return indices
         
+        # One grouping pass instead of a filter scan per symbol
+        partitions = get_engine().partition_by(data, 'symbol') if 'symbol' in data.columns else None
+        
         for symbol in symbols:
             if pd.notna(symbol) and str(symbol).strip():
-                index_data = data[data['symbol'] == symbol] if 'symbol' in data.columns else data
+                index_data = partitions.get(symbol, data.iloc[0:0]) if partitions is not None else data
                 indices.append(get_index(symbol, index_data))
     
     return indices
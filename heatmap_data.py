@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Heatmap Data Module
+Compact heatmap matrices, labels and color scales for client-side rendering
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dashboard_config import HEATMAP_COLORMAP
+from correlation import get_correlation
+from dataframe_engine import get_engine
+from package_diff import load_package_rows
+from result_cache import config_value, get_result_cache
+from schema_detection import horizon_order
+
+ENCODINGS = ('json', 'typed')
+# Settings that shape every payload
+PAYLOAD_CONFIG = ('HEATMAP_COLOR_STOPS',)
+
+
+def color_scale(colormap: str = HEATMAP_COLORMAP, vmin: float = 0.0, vmax: float = 1.0,
+                stops: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Sample a Matplotlib colormap into evenly spaced hex color stops
+
+    The browser interpolates between the stops, so it can draw the same
+    scale without knowing Matplotlib's colormaps.
+
+    Args:
+        colormap: Matplotlib colormap name
+        vmin: Value at the first stop
+        vmax: Value at the last stop
+        stops: Number of color stops (HEATMAP_COLOR_STOPS when omitted)
+
+    Returns:
+        Dictionary with the colormap name, bounds and hex colors
+    """
+    import matplotlib
+    from matplotlib.colors import to_hex
+
+    try:
+        cmap = matplotlib.colormaps[colormap]
+    except KeyError:
+        raise ValueError(f"Unknown colormap: {colormap}")
+    stops = config_value('HEATMAP_COLOR_STOPS') if stops is None else stops
+    colors = [to_hex(cmap(position)) for position in np.linspace(0.0, 1.0, max(2, stops))]
+    return {'colormap': colormap, 'vmin': vmin, 'vmax': vmax, 'colors': colors}
+
+
+def forecast_matrix(path: Path, fingerprint: Optional[str] = None,
+                    value: str = 'Forecast_Return') -> pd.DataFrame:
+    """
+    Asset x Time_Period matrix of one forecast value, horizons in ascending order
+
+    Args:
+        path: Forecast workbook
+        fingerprint: File fingerprint, if known
+        value: Numeric column to show
+
+    Returns:
+        DataFrame indexed by asset with one column per time period
+    """
+    schema, rows = load_package_rows(Path(path), fingerprint)
+    if schema != 'forecast':
+        raise ValueError(f"{Path(path).name} is a {schema} workbook, not a forecast")
+    if value not in rows.columns or not pd.api.types.is_numeric_dtype(rows[value]):
+        raise ValueError(f"Unknown numeric column: {value}")
+
+    matrix = get_engine().pivot(rows, 'Asset', 'Time_Period', value).set_index('Asset')
+    return matrix[horizon_order(matrix.columns)]
+
+
+def version_returns(versions: List[Dict[str, Any]], period: str,
+                    value: str = 'Forecast_Return') -> pd.DataFrame:
+    """
+    Dates x assets matrix of one horizon's value across dated package versions
+
+    Args:
+        versions: Package index entries, oldest first
+        period: Time_Period to take from each version
+        value: Numeric column to take
+
+    Returns:
+        Wide DataFrame indexed by version date with one column per asset
+    """
+    rows = []
+    for version in versions:
+        schema, data = load_package_rows(Path(version['path']), version['fingerprint'])
+        if schema != 'forecast' or value not in data.columns:
+            continue
+        rows.append(get_engine().group_aggregate(data, 'Asset', {value: 'mean'}, where={'Time_Period': period})
+                    .assign(Date=version['package_date']))
+    if len(rows) < 2:
+        raise ValueError("Correlation needs at least two dated versions with forecast data")
+    return pd.concat(rows, ignore_index=True).pivot(index='Date', columns='Asset', values=value).sort_index()
+
+
+def encode_matrix(matrix: pd.DataFrame, encoding: str = 'json') -> Dict[str, Any]:
+    """
+    Encode a labelled matrix compactly
+
+    'json' sends nested lists with null for missing cells. 'typed' sends the
+    values as a base64 little-endian Float32Array in row-major order (missing
+    cells are NaN), which the browser maps without parsing numbers.
+
+    Args:
+        matrix: Labelled matrix
+        encoding: 'json' or 'typed'
+
+    Returns:
+        Dictionary with row and column labels, shape and values
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding: {encoding}")
+    values = matrix.to_numpy(dtype=np.float64)
+    payload = {
+        'rows': [str(label) for label in matrix.index],
+        'columns': [str(label) for label in matrix.columns],
+        'shape': list(values.shape),
+        'encoding': encoding
+    }
+    if encoding == 'typed':
+        payload['dtype'] = 'float32'
+        payload['values'] = base64.b64encode(values.astype('<f4').tobytes()).decode('ascii')
+    else:
+        rounded = np.round(values, 6).astype(object)
+        rounded[np.isnan(values)] = None
+        payload['values'] = rounded.tolist()
+    return payload
+
+
+def _bounds(values: np.ndarray) -> Tuple[float, float]:
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return 0.0, 1.0
+    return float(finite.min()), float(finite.max())
+
+
+def _cached(tag: str, encoding: str, versions: List[Dict[str, Any]], build) -> bytes:
+    """Gzipped payload from the result cache, invalidated when a source file or setting changes"""
+    return get_result_cache().get_or_compute(
+        'heatmap', {'tag': tag, 'encoding': encoding},
+        lambda: gzip.compress(json.dumps(build(), separators=(',', ':')).encode('utf-8'), compresslevel=6),
+        files=versions, config=PAYLOAD_CONFIG
+    )
+
+
+def forecast_heatmap(version: Dict[str, Any], value: str = 'Forecast_Return', encoding: str = 'json',
+                     colormap: str = HEATMAP_COLORMAP) -> Tuple[str, bytes]:
+    """
+    Gzipped JSON heatmap of a forecast file's Asset x Time_Period matrix
+
+    Args:
+        version: Catalog file dictionary of the forecast workbook
+        value: Numeric column to show
+        encoding: 'json' or 'typed'
+        colormap: Colormap for the suggested color scale
+
+    Returns:
+        (dataset version tag, gzipped JSON body)
+    """
+    tag = hashlib.sha1(f"forecast|{version['fingerprint']}|{value}|{colormap}|{config_value('HEATMAP_COLOR_STOPS')}".encode('utf-8')).hexdigest()
+
+    def build():
+        matrix = forecast_matrix(Path(version['path']), version['fingerprint'], value)
+        vmin, vmax = _bounds(matrix.to_numpy(dtype=np.float64))
+        # Center diverging scales on zero so gains and losses read symmetrically
+        if vmin < 0 < vmax:
+            vmin, vmax = -max(-vmin, vmax), max(-vmin, vmax)
+        return {
+            'kind': 'forecast',
+            'version': tag,
+            'source': version['name'],
+            'value': value,
+            'matrix': encode_matrix(matrix, encoding),
+            'scale': color_scale(colormap, vmin, vmax)
+        }
+
+    return tag, _cached(tag, encoding, [version], build)
+
+
+def correlation_heatmap(versions: List[Dict[str, Any]], period: str, value: str = 'Forecast_Return',
+                        encoding: str = 'json', colormap: str = HEATMAP_COLORMAP) -> Tuple[str, bytes]:
+    """
+    Gzipped JSON heatmap of cross-asset correlation across package versions
+
+    Args:
+        versions: Package index entries to correlate over, oldest first
+        period: Time_Period whose values are correlated
+        value: Numeric column to correlate
+        encoding: 'json' or 'typed'
+        colormap: Colormap for the color scale
+
+    Returns:
+        (dataset version tag, gzipped JSON body)
+    """
+    fingerprints = '|'.join(v['fingerprint'] for v in versions)
+    tag = hashlib.sha1(f"correlation|{fingerprints}|{period}|{value}|{colormap}|{config_value('HEATMAP_COLOR_STOPS')}".encode('utf-8')).hexdigest()
+
+    def build():
+        returns = version_returns(versions, period, value)
+        # The correlation statistics are cached by the same dataset version
+        result = get_correlation(returns, version=tag)
+        return {
+            'kind': 'correlation',
+            'version': tag,
+            'source': [v['name'] for v in versions],
+            'value': value,
+            'period': period,
+            'matrix': encode_matrix(result['correlation'], encoding),
+            'scale': color_scale(colormap, -1.0, 1.0)
+        }
+
+    return tag, _cached(tag, encoding, versions, build)
+
+
+def clear_heatmap_cache():
+    """Drop all cached heatmap payloads"""
+    get_result_cache().invalidate('heatmap')
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Heatmap Module
+Renders labelled matrices to heatmap images in Output/heatmaps
+"""
+
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from dashboard_config import DEFAULT_OUTPUT_DIR, DPI, FIGURE_SIZE, HEATMAP_COLORMAP
+
+HEATMAP_DIR = Path(DEFAULT_OUTPUT_DIR) / "heatmaps"
+
+
+def render_heatmap(matrix: pd.DataFrame, output_path: Union[str, Path], title: str = '',
+                   vmin: Optional[float] = None, vmax: Optional[float] = None,
+                   colormap: str = HEATMAP_COLORMAP) -> str:
+    """
+    Render a labelled matrix as a heatmap image
+
+    Args:
+        matrix: DataFrame whose index and columns become the axis labels
+        output_path: Destination image path
+        title: Optional chart title
+        vmin: Lower bound of the color scale (data minimum if None)
+        vmax: Upper bound of the color scale (data maximum if None)
+        colormap: Matplotlib colormap name
+
+    Returns:
+        Path of the written image
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    fig, ax = plt.subplots(figsize=FIGURE_SIZE, dpi=DPI)
+    try:
+        image = ax.imshow(matrix.to_numpy(dtype=float), cmap=colormap, vmin=vmin, vmax=vmax,
+                          aspect='auto', interpolation='nearest')
+        fig.colorbar(image, ax=ax)
+
+        # Tick labels become unreadable past a few dozen rows; leave them off then
+        if len(matrix.columns) <= 50:
+            ax.set_xticks(range(len(matrix.columns)))
+            ax.set_xticklabels([str(c) for c in matrix.columns], rotation=90)
+        if len(matrix.index) <= 50:
+            ax.set_yticks(range(len(matrix.index)))
+            ax.set_yticklabels([str(i) for i in matrix.index])
+        if title:
+            ax.set_title(title)
+
+        fig.tight_layout()
+        fig.savefig(output_path)
+    finally:
+        plt.close(fig)
+
+    return str(output_path)
+
+
+def render_correlation_heatmap(result: Dict[str, object], output_path: Union[str, Path] = None,
+                               title: str = 'Cross-Asset Correlation') -> str:
+    """
+    Render a correlation result from the correlation module
+
+    Args:
+        result: Dictionary returned by correlation.get_correlation
+        output_path: Destination image path (defaults to Output/heatmaps)
+        title: Chart title
+
+    Returns:
+        Path of the written image
+    """
+    if output_path is None:
+        suffix = f"_{str(result.get('version'))[:12]}" if result.get('version') else ''
+        output_path = HEATMAP_DIR / f"correlation{suffix}.png"
+
+    return render_heatmap(result['correlation'], output_path, title=title, vmin=-1.0, vmax=1.0)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Jobs Module
+Runs admitted processing jobs in a supervised worker pool
+"""
+
+import logging
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import catalog
+from admission import AdmissionController, AdmissionRejected, estimate_job_memory
+from dashboard_config import MAX_WORKERS, PROFILING_ENABLED
+from main_processor import process_file
+from profiling import profile_options
+from worker_pool import WorkerPool
+
+# Job states that can no longer change
+FINISHED_STATES = ('succeeded', 'failed', 'rejected', 'cancelled', 'timeout')
+
+logger = logging.getLogger(__name__)
+
+
+class JobManager:
+    """
+    Admits processing jobs, starts them as capacity allows and records results
+
+    Every job is one input file. Job state lives in the catalog so it can be
+    queried from any route; the admission controller decides when each job
+    may start. Running jobs are supervised by a WorkerPool that enforces
+    deadlines and cancellation; outputs of jobs that do not succeed are
+    removed so no half-written report is ever listed.
+    """
+
+    def __init__(self, controller: Optional[AdmissionController] = None, max_workers: int = MAX_WORKERS,
+                 pool: Optional[WorkerPool] = None):
+        self.max_workers = max(1, max_workers)
+        self.controller = controller or AdmissionController(workers=self.max_workers)
+        self.pool = pool or WorkerPool(on_finish=self._finished, on_stage=self._stage_changed,
+                                       workers=self.max_workers, on_profile=self._profile_recorded)
+        self._running: Dict[str, Dict[str, Any]] = {}
+        self._listeners: List[Callable[[str, str, Optional[str]], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback: Callable[[str, str, Optional[str]], None]):
+        """
+        Register a callback run when a job reaches a final state
+
+        Args:
+            callback: Called with (job_id, status, error)
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, job_id: str, status: str, error: Optional[str] = None):
+        """Run the completion listeners for one job"""
+        for callback in self._listeners:
+            try:
+                callback(job_id, status, error)
+            except Exception as e:
+                logger.error(f"Job listener failed for {job_id}: {e}")
+
+    def submit_files(self, paths: List[str], client: str, profile: Any = None) -> List[str]:
+        """
+        Admit one processing job per input file
+
+        Args:
+            paths: Input file paths
+            client: Client identifier used for per-client caps
+            profile: True or a CPU profiler name ('cprofile', 'pyinstrument')
+                to profile these jobs; defaults to PROFILING_ENABLED
+
+        Returns:
+            List of job ids
+
+        Raises:
+            AdmissionRejected: If the batch cannot be admitted
+        """
+        if profile is None:
+            profile = PROFILING_ENABLED
+        options = None
+        if profile:
+            options = profile_options(profile) if isinstance(profile, str) else profile_options()
+
+        jobs = [
+            {'id': uuid.uuid4().hex, 'client': client, 'path': str(path), 'memory': estimate_job_memory([path]),
+             'profile': options}
+            for path in paths
+        ]
+        # Record jobs before admitting them so a fast dispatch never updates a missing row
+        for job in jobs:
+            catalog.create_job('process', {'path': job['path'], 'client': client, 'memory_estimate': job['memory'],
+                                           'profile': bool(options)}, job_id=job['id'])
+        try:
+            self.controller.admit(jobs)
+        except AdmissionRejected as e:
+            for job in jobs:
+                catalog.update_job(job['id'], status='rejected', error=str(e))
+            raise
+
+        self._dispatch()
+        return [job['id'] for job in jobs]
+
+    def _dispatch(self):
+        """Start every queued job that the controller allows to run"""
+        for job in self.controller.next_runnable():
+            try:
+                catalog.update_job(job['id'], status='running')
+                with self._lock:
+                    self._running[job['id']] = job
+                self.pool.submit(job['id'], process_file, (job['path'],), profile=job.get('profile'))
+            except Exception as e:
+                logger.error(f"Could not start job {job['id']}: {e}")
+                with self._lock:
+                    self._running.pop(job['id'], None)
+                catalog.update_job(job['id'], status='failed', error=str(e))
+                self.controller.release(job['id'])
+                self._notify(job['id'], 'failed', str(e))
+
+    def _stage_changed(self, job_id: str, stage: str):
+        """Record the stage a running job has reached"""
+        catalog.update_job(job_id, metadata={'stage': stage})
+
+    def _profile_recorded(self, job_id: str, report: Dict[str, Any]):
+        """Store a profiled job's report with its metadata"""
+        catalog.update_job(job_id, metadata={'profile': report})
+
+    def _finished(self, job_id: str, status: str, payload: Any, outputs: List[str]):
+        """Record a job's outcome, free its capacity and start the next jobs"""
+        with self._lock:
+            job = self._running.pop(job_id, None)
+        if job is None:
+            return
+        error = None
+        try:
+            if status == 'succeeded':
+                for output in payload.get('outputs', []):
+                    output_path = Path(output)
+                    catalog.record_lineage(job_id, job['path'], output_path)
+                    catalog.record_file(output_path, area='output', subdir=output_path.parent.name)
+                catalog.update_job(job_id, status='succeeded', metadata={'result': payload})
+                logger.info(f"Job {job_id} finished: {job['path']}")
+            else:
+                removed = remove_partial_outputs(outputs)
+                error = payload if status == 'failed' else f"Job {status}" + (f": {payload}" if payload else '')
+                catalog.update_job(job_id, status=status, error=error, metadata={'removed_outputs': removed})
+                logger.warning(f"Job {job_id} {status}: {job['path']}")
+        except Exception as e:
+            logger.error(f"Could not record outcome of job {job_id}: {e}")
+        finally:
+            self.controller.release(job_id)
+            self._notify(job_id, status, error)
+            self._dispatch()
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a queued or running job
+
+        Queued jobs are removed immediately. Running jobs are asked to stop at
+        their next checkpoint and terminated if they have not stopped within
+        the grace period; the job's final state is recorded when it stops.
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            'cancelled' if the job was dequeued, 'cancelling' if a running job
+            was signalled, or None if the job is not active
+        """
+        if self.controller.remove_queued(job_id) is not None:
+            catalog.update_job(job_id, status='cancelled', error='Cancelled before start')
+            self._notify(job_id, 'cancelled', 'Cancelled before start')
+            return 'cancelled'
+        if self.pool.cancel(job_id):
+            catalog.update_job(job_id, metadata={'cancel_requested': True})
+            return 'cancelling'
+        return None
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        self.pool.shutdown()
+
+
+def remove_partial_outputs(outputs: List[str]) -> List[str]:
+    """
+    Delete files left behind by a job that did not complete
+
+    Jobs register the temporary names they write to (reports are renamed
+    into place only on success), so this never touches the previous
+    version of a report or its catalog row and lineage.
+
+    Args:
+        outputs: Temporary paths the job registered before writing
+
+    Returns:
+        Paths that were removed
+    """
+    removed = []
+    for output in outputs:
+        path = Path(output)
+        try:
+            if path.exists():
+                path.unlink()
+                removed.append(str(path))
+        except OSError as e:
+            logger.error(f"Could not remove partial output {path}: {e}")
+    return removed
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Get the process-wide job manager"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
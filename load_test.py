@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Load Test Module
+Concurrent load generator for the dashboard routes, in process or against a URL
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from dashboard_config import (LOAD_TEST_BASELINE, LOAD_TEST_CONCURRENCY, LOAD_TEST_DATA_COPIES, LOAD_TEST_DURATION,
+                              LOAD_TEST_MIX, LOAD_TEST_TOLERANCE, OUTPUT_SUBDIRS)
+
+PERCENTILES = [50, 95, 99]
+
+# Responses that mean the server handled the request as designed
+EXPECTED_STATUS = {
+    'index': {200},
+    'files': {200},
+    'download': {200},
+    'process': {202, 429}
+}
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """
+    Parse a request mix such as "files=4,download=4,process=1"
+
+    Args:
+        text: Comma separated scenario=weight pairs
+
+    Returns:
+        Mapping of scenario to weight
+    """
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in EXPECTED_STATUS:
+            raise ValueError(f"Unknown scenario '{name}' (choose from {', '.join(EXPECTED_STATUS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def prepare_dataset(workdir: Path, copies: int = LOAD_TEST_DATA_COPIES) -> List[str]:
+    """
+    Generate the demo data set in a working directory
+
+    The demo generator writes one workbook of each kind; each is then copied
+    under dated package names so listings have a realistic size.
+
+    Args:
+        workdir: Directory that becomes the app's working directory
+        copies: Copies of each demo workbook
+
+    Returns:
+        Input file names
+    """
+    import create_demo_data
+
+    (workdir / 'Input').mkdir(parents=True, exist_ok=True)
+    for subdir in OUTPUT_SUBDIRS:
+        (workdir / 'Output' / subdir).mkdir(parents=True, exist_ok=True)
+
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        sources = [create_demo_data.create_demo_forecast(), create_demo_data.create_demo_macro(),
+                   create_demo_data.create_demo_top30()]
+    finally:
+        os.chdir(previous)
+
+    names = []
+    for source in sources:
+        source = workdir / source
+        kind = source.stem.split('_')[1].capitalize()
+        for i in range(copies):
+            name = f"Package_{kind}{i:03d}_2024_01_{(i % 28) + 1:02d}{source.suffix}"
+            shutil.copy(source, workdir / 'Input' / name)
+            names.append(name)
+    return names
+
+
+class InProcessTarget:
+    """Sends requests through Flask's test client (one client per thread)"""
+
+    def __init__(self):
+        import logging
+
+        import app as dashboard_app
+
+        # Per-request INFO logging would dominate the measurement
+        logging.getLogger().setLevel(logging.WARNING)
+        self.app = dashboard_app.app
+        self.module = dashboard_app
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None,
+                client_id: str = '') -> Tuple[int, int]:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body, headers={'X-Client-Id': client_id})
+        size = len(response.get_data())
+        response.close()
+        return response.status_code, size
+
+    def get_json(self, path: str) -> Dict[str, Any]:
+        return self.app.test_client().get(path).get_json() or {}
+
+    def close(self):
+        try:
+            self.module.get_job_manager().shutdown()
+        except Exception:
+            pass
+
+
+class UrlTarget:
+    """Sends requests to a running dashboard over HTTP"""
+
+    def __init__(self, base_url: str, timeout: float = 60):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None,
+                client_id: str = '') -> Tuple[int, int]:
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'X-Client-Id': client_id}
+        if data is not None:
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, len(e.read())
+
+    def get_json(self, path: str) -> Dict[str, Any]:
+        with urllib.request.urlopen(self.base_url + path, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def close(self):
+        pass
+
+
+def discover_inputs(target) -> List[str]:
+    """Input file names the target currently lists"""
+    try:
+        payload = target.get_json('/api/files')
+    except Exception:
+        return []
+    return [f['name'] for f in payload.get('input_files', [])]
+
+
+def build_scenarios(inputs: List[str]) -> Dict[str, Callable[[random.Random], Tuple[str, str, Any]]]:
+    """Map scenario names to request builders"""
+    def pick(rng):
+        return urllib.parse.quote(rng.choice(inputs)) if inputs else 'missing.xlsx'
+
+    return {
+        'index': lambda rng: ('GET', '/', None),
+        'files': lambda rng: ('GET', '/api/files', None),
+        'download': lambda rng: ('GET', f"/download/{pick(rng)}", None),
+        'process': lambda rng: ('POST', '/api/process', {'files': [urllib.parse.unquote(pick(rng))]})
+    }
+
+
+def run_load(target, mix: Dict[str, float], concurrency: int = LOAD_TEST_CONCURRENCY,
+             duration: float = LOAD_TEST_DURATION, max_requests: Optional[int] = None,
+             seed: int = 0) -> Dict[str, Any]:
+    """
+    Drive the target with concurrent clients
+
+    Each client picks scenarios at random according to the mix weights and
+    records latency and status for every request.
+
+    Args:
+        target: InProcessTarget or UrlTarget
+        mix: Scenario weights
+        concurrency: Number of concurrent clients
+        duration: Seconds to run
+        max_requests: Optional cap on total requests
+        seed: Random seed for scenario selection
+
+    Returns:
+        Report dictionary (see summarize)
+    """
+    scenarios = build_scenarios(discover_inputs(target))
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples: List[Tuple[str, float, int]] = []
+    samples_lock = threading.Lock()
+    budget = {'left': max_requests if max_requests else float('inf')}
+    deadline = time.perf_counter() + duration
+
+    def client(index: int):
+        rng = random.Random(seed + index)
+        local = []
+        while time.perf_counter() < deadline:
+            with samples_lock:
+                if budget['left'] <= 0:
+                    break
+                budget['left'] -= 1
+            scenario = rng.choices(names, weights)[0]
+            method, path, body = scenarios[scenario](rng)
+            started = time.perf_counter()
+            try:
+                status, _ = target.request(method, path, body, client_id=f"load-{index}")
+            except Exception:
+                status = 0
+            local.append((scenario, time.perf_counter() - started, status))
+        with samples_lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return summarize(samples, elapsed, concurrency)
+
+
+def summarize(samples: List[Tuple[str, float, int]], elapsed: float, concurrency: int) -> Dict[str, Any]:
+    """
+    Aggregate request samples into throughput and latency percentiles
+
+    Args:
+        samples: (scenario, latency seconds, status) tuples
+        elapsed: Wall-clock seconds of the run
+        concurrency: Number of clients
+
+    Returns:
+        Dictionary with overall and per-scenario figures (latencies in ms)
+    """
+    def stats(rows):
+        latencies = np.array([r[1] for r in rows], dtype=float) * 1000.0
+        statuses = {}
+        for row in rows:
+            statuses[str(row[2])] = statuses.get(str(row[2]), 0) + 1
+        errors = sum(1 for r in rows if r[2] not in EXPECTED_STATUS.get(r[0], {200}))
+        figures = {
+            'requests': len(rows),
+            'throughput_rps': round(len(rows) / elapsed, 2) if elapsed else 0.0,
+            'errors': errors,
+            'status': statuses
+        }
+        for p, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES) if len(rows) else [0.0] * 3):
+            figures[f"p{p}_ms"] = round(float(value), 2)
+        return figures
+
+    scenarios = sorted({s[0] for s in samples})
+    return {
+        'elapsed_seconds': round(elapsed, 2),
+        'concurrency': concurrency,
+        'overall': stats(samples),
+        'scenarios': {name: stats([s for s in samples if s[0] == name]) for name in scenarios}
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any],
+                        tolerance: float = LOAD_TEST_TOLERANCE) -> List[Dict[str, Any]]:
+    """
+    Compare a run against a stored baseline
+
+    Latency percentiles may grow and throughput may drop by at most the
+    tolerance fraction before a figure counts as a regression.
+
+    Args:
+        report: Current run
+        baseline: Stored run
+        tolerance: Allowed relative change
+
+    Returns:
+        One row per compared figure with baseline, current, change and regression flag
+    """
+    rows = []
+    sections = [('overall', report['overall'], baseline.get('overall', {}))]
+    sections += [(name, figures, baseline.get('scenarios', {}).get(name, {}))
+                 for name, figures in report['scenarios'].items()]
+    for name, current, previous in sections:
+        for metric in [f"p{p}_ms" for p in PERCENTILES] + ['throughput_rps']:
+            if not previous.get(metric):
+                continue
+            change = (current[metric] - previous[metric]) / previous[metric]
+            worse = -change if metric == 'throughput_rps' else change
+            rows.append({'scenario': name, 'metric': metric, 'baseline': previous[metric],
+                         'current': current[metric], 'change': round(change, 4), 'regression': worse > tolerance})
+    return rows
+
+
+def print_report(report: Dict[str, Any], comparison: Optional[List[Dict[str, Any]]] = None):
+    """Print a run as a table, with the baseline comparison if given"""
+    print(f"\n📈 {report['overall']['requests']} requests in {report['elapsed_seconds']}s "
+          f"with {report['concurrency']} clients")
+    print(f"{'scenario':<10} {'requests':>8} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    rows = list(report['scenarios'].items()) + [('overall', report['overall'])]
+    for name, figures in rows:
+        print(f"{name:<10} {figures['requests']:>8} {figures['throughput_rps']:>8} {figures['p50_ms']:>9} "
+              f"{figures['p95_ms']:>9} {figures['p99_ms']:>9} {figures['errors']:>7}")
+
+    if comparison:
+        print("\n📊 Baseline comparison")
+        for row in comparison:
+            flag = '❌' if row['regression'] else '✅'
+            print(f"  {flag} {row['scenario']:<10} {row['metric']:<15} {row['baseline']:>9} -> "
+                  f"{row['current']:>9} ({row['change']:+.1%})")
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Load test the dashboard routes")
+    parser.add_argument('--url', help="Base URL of a running dashboard (default: drive the app in process)")
+    parser.add_argument('--concurrency', type=int, default=LOAD_TEST_CONCURRENCY)
+    parser.add_argument('--duration', type=float, default=LOAD_TEST_DURATION, help="Seconds to run")
+    parser.add_argument('--requests', type=int, help="Stop after this many requests")
+    parser.add_argument('--mix', default=','.join(f"{k}={v}" for k, v in LOAD_TEST_MIX.items()),
+                        help="Scenario weights, e.g. files=4,download=4,process=1")
+    parser.add_argument('--copies', type=int, default=LOAD_TEST_DATA_COPIES,
+                        help="Copies of each demo workbook in the generated data set (in-process mode)")
+    parser.add_argument('--baseline', default=LOAD_TEST_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=LOAD_TEST_TOLERANCE)
+    parser.add_argument('--output', help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    baseline_path = Path(args.baseline).resolve()
+    output_path = Path(args.output).resolve() if args.output else None
+    workdir = None
+
+    if args.url:
+        target = UrlTarget(args.url)
+        print(f"🎯 Target: {args.url}")
+    else:
+        workdir = Path(tempfile.mkdtemp(prefix='dashboard-load-'))
+        prepare_dataset(workdir, args.copies)
+        os.chdir(workdir)
+        target = InProcessTarget()
+        print(f"🎯 Target: in-process app, data set in {workdir}")
+
+    try:
+        report = run_load(target, mix, args.concurrency, args.duration, args.requests)
+    finally:
+        target.close()
+        if workdir is not None:
+            os.chdir(Path(__file__).resolve().parent)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report['mix'] = mix
+    report['target'] = args.url or 'in-process'
+
+    comparison = None
+    if baseline_path.exists() and not args.save_baseline:
+        comparison = compare_to_baseline(report, json.loads(baseline_path.read_text()), args.tolerance)
+    print_report(report, comparison)
+
+    if output_path:
+        output_path.write_text(json.dumps({'report': report, 'comparison': comparison}, indent=2))
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Baseline saved to {baseline_path}")
+
+    return 1 if comparison and any(row['regression'] for row in comparison) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
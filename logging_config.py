@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Logging Config Module
+Queued, non-blocking logging with rotation and structured JSON records
+"""
+
+import atexit
+import contextvars
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import multiprocessing.util
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from dashboard_config import (LOG_BACKUP_COUNT, LOG_DEBUG_SAMPLE, LOG_DIR, LOG_FILE, LOG_FORMAT, LOG_JSON, LOG_LEVEL,
+                              LOG_MAX_BYTES, LOG_QUEUE_SIZE, LOG_ROTATION)
+
+# Request id of the request being handled on the current thread/context
+request_id_var: contextvars.ContextVar = contextvars.ContextVar('request_id', default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_state: Dict[str, Any] = {'listener': None, 'handler': None, 'config': None}
+
+# Set on the forking thread while it forks children that log without a listener
+_fork_local = threading.local()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """Stamps records with the current request id on the calling thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'request_id'):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Keeps 1 in `every` DEBUG records and every record at INFO or above
+
+    Counter-based rather than random so the cost is one increment.
+    """
+
+    def __init__(self, every: int = LOG_DEBUG_SAMPLE):
+        super().__init__()
+        self.every = max(1, every)
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        if next(self._counter) % self.every:
+            return False
+        record.sample_rate = self.every
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that drops records instead of blocking when the queue is full
+
+    Formatting happens on the listener thread; the calling thread only
+    merges the message arguments (on a copy, so other handlers still see the
+    original record) so records are safe to pass between threads.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        record = copy.copy(record)
+        record.msg = message
+        record.args = None
+        if record.exc_info:
+            # Tracebacks cannot cross threads lazily; render them now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exception = record.exc_text
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _file_handler(path: Path, rotate: bool) -> logging.Handler:
+    """Rotating handler for the owning process; append-only for forked workers"""
+    if not rotate:
+        # Workers append to the same file and reopen it after the parent rotates it
+        return logging.handlers.WatchedFileHandler(path, encoding='utf-8')
+    if LOG_ROTATION == 'size':
+        return logging.handlers.RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                                    encoding='utf-8')
+    return logging.handlers.TimedRotatingFileHandler(path, when=LOG_ROTATION, backupCount=LOG_BACKUP_COUNT,
+                                                     encoding='utf-8')
+
+
+def _build_handlers(log_path: Optional[Path], rotate: bool) -> List[logging.Handler]:
+    console = logging.StreamHandler(sys.stderr)
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+    handlers = [console]
+    if log_path is not None:
+        file_handler = _file_handler(log_path, rotate)
+        file_handler.setFormatter(JsonFormatter() if LOG_JSON else logging.Formatter(LOG_FORMAT))
+        handlers.append(file_handler)
+    return handlers
+
+
+def _install(level: int, log_path: Optional[Path], rotate: bool):
+    """Replace the root handlers with a queue handler feeding a background listener"""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    handler.addFilter(DebugSamplingFilter())
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *_build_handlers(log_path, rotate),
+                                              respect_handler_level=True)
+    listener.start()
+    _state.update(listener=listener, handler=handler)
+
+
+def setup_logging(level: str = LOG_LEVEL, log_dir: Optional[str] = LOG_DIR,
+                  log_file: Optional[str] = LOG_FILE, rotate: bool = True) -> Optional[Path]:
+    """
+    Configure process-wide logging
+
+    Records are put on a bounded queue by the calling thread and written to
+    stderr and the rotating LOG_FILE by a background listener thread, so
+    request handlers never wait on log I/O. Safe to call more than once.
+
+    Args:
+        level: Root log level name
+        log_dir: Directory for the log file (None for console only)
+        log_file: Log file name
+        rotate: Rotate the log file from this process; pass False when another
+            process owns rotation (it then only appends and follows renames)
+
+    Returns:
+        Path of the log file, or None
+    """
+    shutdown_logging()
+    log_path = None
+    if log_dir and log_file:
+        Path(log_dir).mkdir(parents=True, exist_ok=True)
+        log_path = Path(log_dir) / log_file
+
+    numeric_level = getattr(logging, str(level).upper(), logging.INFO)
+    _state['config'] = (numeric_level, log_path)
+    _install(numeric_level, log_path, rotate=rotate)
+    return log_path
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer"""
+    listener = _state.get('listener')
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        _state.update(listener=None, handler=None)
+
+
+def dropped_records() -> int:
+    """Records dropped because the log queue was full"""
+    handler = _state.get('handler')
+    return handler.dropped if handler is not None else 0
+
+
+@contextmanager
+def direct_logging_in_children() -> Iterator[None]:
+    """
+    Fork short-lived children that log synchronously instead of through a listener
+
+    Processes forked by the calling thread inside this block write records
+    straight to the handlers rather than starting a listener thread, which
+    would cost more than the child's work and could lose records when the
+    child leaves through os._exit.
+    """
+    _fork_local.direct = True
+    try:
+        yield
+    finally:
+        _fork_local.direct = False
+
+
+def _install_direct(level: int, log_path: Optional[Path]):
+    """Replace the root handlers with synchronous ones (append-only file)"""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in _build_handlers(log_path, rotate=False):
+        handler.addFilter(ContextFilter())
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def _restart_in_child():
+    # The listener thread does not survive fork; start a fresh one for the worker
+    request_id_var.set(None)
+    if _state.get('config') is not None:
+        _state.update(listener=None, handler=None)
+        if getattr(_fork_local, 'direct', False):
+            _install_direct(*_state['config'])
+        else:
+            _install(*_state['config'], rotate=False)
+
+
+class _ChildExitAnchor:
+    """Keeps the after-fork registration alive (multiprocessing holds it weakly)"""
+
+
+def _flush_at_child_exit(anchor: _ChildExitAnchor):
+    # multiprocessing children end in os._exit, which skips atexit; their exit
+    # finalizers still run, so the listener is flushed from the last of them
+    multiprocessing.util.Finalize(None, shutdown_logging, exitpriority=-100)
+
+
+_child_exit_anchor = _ChildExitAnchor()
+os.register_at_fork(after_in_child=_restart_in_child)
+multiprocessing.util.register_after_fork(_child_exit_anchor, _flush_at_child_exit)
+atexit.register(shutdown_logging)
+
+
+def init_request_logging(app, logger_name: str = 'dashboard.requests'):
+    """
+    Assign request ids and log one structured record per request with its timing
+
+    The id comes from the X-Request-Id header when present and is echoed
+    back in the response.
+
+    Args:
+        app: Flask application
+        logger_name: Logger used for request records
+    """
+    from flask import g, request
+
+    request_logger = logging.getLogger(logger_name)
+
+    @app.before_request
+    def _start_request():
+        g.request_started = time.perf_counter()
+        g.request_token = request_id_var.set(request.headers.get('X-Request-Id') or uuid.uuid4().hex[:16])
+
+    @app.after_request
+    def _finish_request(response):
+        started = g.pop('request_started', None)
+        request_id = request_id_var.get()
+        if request_id:
+            response.headers['X-Request-Id'] = request_id
+        if started is not None:
+            request_logger.info(
+                f"{request.method} {request.path} {response.status_code}",
+                extra={
+                    'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+                    'bytes': response.calculate_content_length()
+                }
+            )
+        return response
+
+    @app.teardown_request
+    def _clear_request(exc=None):
+        token = g.pop('request_token', None)
+        if token is not None:
+            request_id_var.reset(token)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Macro History Module
+Dated history of macro indicator snapshots with incremental change statistics
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dashboard_config import MACRO_HISTORY_DB, MACRO_ZSCORE_MIN_PERIODS
+from get_package_name import get_package_info
+from schema_detection import combine_sheets
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    indicator TEXT NOT NULL,
+    region TEXT NOT NULL,
+    date TEXT NOT NULL,
+    value REAL,
+    previous REAL,
+    forecast REAL,
+    change REAL,
+    change_z REAL,
+    surprise REAL,
+    source TEXT,
+    PRIMARY KEY (indicator, region, date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS series_state (
+    indicator TEXT NOT NULL,
+    region TEXT NOT NULL,
+    last_date TEXT NOT NULL,
+    last_value REAL,
+    last_forecast REAL,
+    n INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,
+    PRIMARY KEY (indicator, region)
+) WITHOUT ROWID;
+"""
+
+KEY = ['indicator', 'region']
+OBSERVATION_COLUMNS = ['indicator', 'region', 'date', 'value', 'previous', 'forecast',
+                       'change', 'change_z', 'surprise', 'source']
+STATE_COLUMNS = ['indicator', 'region', 'last_date', 'last_value', 'last_forecast', 'n', 'mean', 'm2']
+
+_local = threading.local()
+
+
+def _reset_after_fork():
+    global _local
+    _local = threading.local()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_connection() -> sqlite3.Connection:
+    """Get this thread's history connection, creating the schema on first use"""
+    connection = getattr(_local, 'connection', None)
+    if connection is None:
+        Path(MACRO_HISTORY_DB).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(MACRO_HISTORY_DB, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA busy_timeout=30000')
+        connection.executescript(SCHEMA)
+        _local.connection = connection
+    return connection
+
+
+def snapshot_date(path: Path, frame: Optional[pd.DataFrame] = None) -> str:
+    """
+    Date a macro snapshot belongs to
+
+    The package date from the file name wins; otherwise the latest value of
+    the sheet's Date column, then the file's modification date.
+
+    Args:
+        path: Source workbook path
+        frame: Snapshot rows
+
+    Returns:
+        ISO date string
+    """
+    date = get_package_info(Path(path).name).get('date_info', {}).get('date')
+    if date:
+        return date
+    if frame is not None and 'Date' in frame.columns:
+        dates = pd.to_datetime(frame['Date'], errors='coerce').dropna()
+        if not dates.empty:
+            return dates.max().strftime('%Y-%m-%d')
+    return datetime.fromtimestamp(Path(path).stat().st_mtime).strftime('%Y-%m-%d')
+
+
+def _normalize_snapshot(frame: pd.DataFrame, date: str, source: Optional[str]) -> pd.DataFrame:
+    """Map a macro sheet onto observation columns, one row per series"""
+    snapshot = pd.DataFrame({
+        'indicator': frame['Indicator'].astype(str),
+        'region': frame['Region'].astype(str),
+        'date': date,
+        'value': pd.to_numeric(frame['Current_Value'], errors='coerce'),
+        'previous': pd.to_numeric(frame['Previous_Value'], errors='coerce') if 'Previous_Value' in frame else np.nan,
+        'forecast': pd.to_numeric(frame['Forecast'], errors='coerce') if 'Forecast' in frame else np.nan,
+        'source': source
+    })
+    return snapshot.drop_duplicates(KEY, keep='last').reset_index(drop=True)
+
+
+def _z_scores(change: np.ndarray, n: np.ndarray, mean: np.ndarray, m2: np.ndarray) -> np.ndarray:
+    """z-score of each change against the prior changes' mean and sample std"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(m2 / (n - 1))
+        z = (change - mean) / std
+    return np.where((n >= MACRO_ZSCORE_MIN_PERIODS) & (std > 0), z, np.nan)
+
+
+def _load_state(keys: pd.DataFrame) -> pd.DataFrame:
+    """
+    Running state for the given series (missing series are absent)
+
+    series_state holds one row per series, so it is read with one query and
+    matched to the keys in pandas rather than looked up series by series.
+    """
+    rows = get_connection().execute(f"SELECT {', '.join(STATE_COLUMNS)} FROM series_state").fetchall()
+    state = pd.DataFrame([tuple(r) for r in rows], columns=STATE_COLUMNS)
+    return state.merge(keys[KEY].drop_duplicates(), on=KEY, how='inner')
+
+
+def _append_slice(snapshot: pd.DataFrame, state: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Compute change, change z-score and surprise for a new slice
+
+    Every series contributes at most one row, so the update is a single
+    vectorized step over arrays aligned by series: Welford's update for the
+    running mean and M2 of changes, and the prior snapshot's forecast for
+    the surprise.
+
+    Returns:
+        (observation rows, updated state rows)
+    """
+    merged = snapshot.merge(state, on=KEY, how='left')
+    known = merged['last_date'].notna().to_numpy()
+    value = merged['value'].to_numpy(dtype=float)
+
+    # Change vs. our last stored value; the first snapshot uses its own Previous_Value
+    change = np.where(known, value - merged['last_value'].to_numpy(dtype=float),
+                      value - merged['previous'].to_numpy(dtype=float))
+    surprise = np.where(known, value - merged['last_forecast'].to_numpy(dtype=float), np.nan)
+
+    n = merged['n'].fillna(0).to_numpy(dtype=float)
+    mean = merged['mean'].fillna(0.0).to_numpy(dtype=float)
+    m2 = merged['m2'].fillna(0.0).to_numpy(dtype=float)
+    change_z = _z_scores(change, n, mean, m2)
+
+    valid = ~np.isnan(change)
+    n_new = n + valid
+    delta = np.where(valid, change - mean, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_new = np.where(valid, mean + delta / n_new, mean)
+    m2_new = m2 + np.where(valid, delta * (change - mean_new), 0.0)
+
+    observations = snapshot.assign(change=change, change_z=change_z, surprise=surprise)[OBSERVATION_COLUMNS]
+    new_state = pd.DataFrame({
+        'indicator': snapshot['indicator'], 'region': snapshot['region'], 'last_date': snapshot['date'],
+        'last_value': value, 'last_forecast': snapshot['forecast'].to_numpy(dtype=float),
+        'n': n_new.astype(int), 'mean': mean_new, 'm2': m2_new
+    })[STATE_COLUMNS]
+    return observations, new_state
+
+
+def _recompute_series(history: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Recompute derived columns for whole series (used after out-of-order snapshots)
+
+    Args:
+        history: Observation rows of the affected series, any order
+
+    Returns:
+        (observation rows, state rows)
+    """
+    history = history.sort_values(KEY + ['date']).reset_index(drop=True)
+    groups = history.groupby(KEY, sort=False)
+    last_value = groups['value'].shift()
+    first = last_value.isna() & groups.cumcount().eq(0)
+    change = np.where(first, history['value'] - history['previous'], history['value'] - last_value)
+    history['change'] = change
+    history['surprise'] = history['value'] - groups['forecast'].shift()
+
+    # Prior-change moments from cumulative sums (excluding the current row)
+    valid = history['change'].notna()
+    filled = history['change'].fillna(0.0)
+    n = valid.astype(float).groupby([history[k] for k in KEY]).cumsum() - valid
+    total = filled.groupby([history[k] for k in KEY]).cumsum() - filled
+    total_sq = (filled ** 2).groupby([history[k] for k in KEY]).cumsum() - filled ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(n > 0, total / n, 0.0)
+    m2 = np.maximum(total_sq - n * mean ** 2, 0.0)
+    history['change_z'] = _z_scores(history['change'].to_numpy(dtype=float), n.to_numpy(), mean, m2)
+
+    last = history.groupby(KEY, sort=False).tail(1).reset_index(drop=True)
+    totals = history.assign(valid=valid, change_sq=filled ** 2, filled=filled).groupby(KEY, sort=False).agg(
+        n=('valid', 'sum'), total=('filled', 'sum'), total_sq=('change_sq', 'sum')).reset_index()
+    state = last.merge(totals, on=KEY)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        state['mean'] = np.where(state['n'] > 0, state['total'] / state['n'], 0.0)
+    state['m2'] = np.maximum(state['total_sq'] - state['n'] * state['mean'] ** 2, 0.0)
+    state = state.rename(columns={'date': 'last_date', 'value': 'last_value', 'forecast': 'last_forecast'})
+    return history[OBSERVATION_COLUMNS], state[STATE_COLUMNS]
+
+
+def _records(frame: pd.DataFrame) -> List[tuple]:
+    """Rows as tuples with NaN mapped to NULL"""
+    return list(frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None))
+
+
+def append_snapshot(frame: pd.DataFrame, date: str, source: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Append one dated macro snapshot to the history
+
+    Only the new slice is computed. A snapshot older than a series' latest
+    date triggers a recompute of just that series; re-ingesting a date that
+    is already stored is a no-op.
+
+    Args:
+        frame: Macro sheet rows (Indicator, Region, Current_Value, and
+            optionally Previous_Value and Forecast)
+        date: Snapshot date (YYYY-MM-DD)
+        source: Source file name
+
+    Returns:
+        Dictionary with counts of appended, skipped and recomputed series
+    """
+    snapshot = _normalize_snapshot(frame, date, source)
+    connection = get_connection()
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        state = _load_state(snapshot)
+        merged = snapshot.merge(state[KEY + ['last_date']], on=KEY, how='left')
+        newer = merged['last_date'].isna() | (merged['date'] > merged['last_date'])
+        older = ~newer & (merged['date'] < merged['last_date'])
+
+        appended = snapshot[newer.to_numpy()]
+        observations, new_state = _append_slice(appended, state)
+
+        backfill = snapshot[older.to_numpy()]
+        if not backfill.empty:
+            history = pd.concat([_read_history(backfill), backfill.assign(
+                change=np.nan, change_z=np.nan, surprise=np.nan)[OBSERVATION_COLUMNS]], ignore_index=True)
+            history = history.drop_duplicates(KEY + ['date'], keep='last')
+            rebuilt, rebuilt_state = _recompute_series(history)
+            observations = pd.concat([observations, rebuilt], ignore_index=True)
+            new_state = pd.concat([new_state, rebuilt_state], ignore_index=True)
+
+        connection.executemany(
+            f"INSERT OR REPLACE INTO observations ({', '.join(OBSERVATION_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(OBSERVATION_COLUMNS))})", _records(observations))
+        connection.executemany(
+            f"INSERT OR REPLACE INTO series_state ({', '.join(STATE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(STATE_COLUMNS))})", _records(new_state))
+        connection.execute('COMMIT')
+    except Exception:
+        connection.execute('ROLLBACK')
+        raise
+
+    return {
+        'date': date,
+        'appended': int(newer.sum()),
+        'recomputed': int(older.sum()),
+        'skipped': int(len(snapshot) - newer.sum() - older.sum())
+    }
+
+
+def _read_history(keys: pd.DataFrame) -> pd.DataFrame:
+    """All stored observations of the given series"""
+    connection = get_connection()
+    rows = []
+    for indicator, region in keys[KEY].drop_duplicates().itertuples(index=False):
+        rows.extend(tuple(r) for r in connection.execute(
+            f"SELECT {', '.join(OBSERVATION_COLUMNS)} FROM observations WHERE indicator = ? AND region = ?",
+            (indicator, region)))
+    history = pd.DataFrame(rows, columns=OBSERVATION_COLUMNS)
+    numeric = ['value', 'previous', 'forecast', 'change', 'change_z', 'surprise']
+    history[numeric] = history[numeric].apply(pd.to_numeric, errors='coerce')
+    return history
+
+
+def ingest_workbook(path: Path, sheets: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+    """
+    Append the macro sheets of a processed workbook to the history
+
+    Args:
+        path: Source workbook path
+        sheets: Sheets matching the macro layout
+
+    Returns:
+        Result of append_snapshot
+    """
+    frame = combine_sheets(sheets, 'macro')
+    return append_snapshot(frame, snapshot_date(path, frame), source=Path(path).name)
+
+
+def get_series(indicator: str, region: str, start: Optional[str] = None,
+               end: Optional[str] = None) -> pd.DataFrame:
+    """
+    Get one indicator/region series in date order
+
+    The observations table is clustered on (indicator, region, date), so
+    this is a single range scan proportional to the series length.
+
+    Args:
+        indicator: Indicator name
+        region: Region name
+        start: Optional first date (inclusive)
+        end: Optional last date (inclusive)
+
+    Returns:
+        DataFrame with date, value, previous, forecast, change, change_z and surprise
+    """
+    rows = get_connection().execute(
+        """SELECT date, value, previous, forecast, change, change_z, surprise FROM observations
+           WHERE indicator = ? AND region = ? AND date >= ? AND date <= ?
+           ORDER BY date""",
+        (indicator, region, start or '', end or '9999-12-31')
+    ).fetchall()
+    series = pd.DataFrame([tuple(r) for r in rows],
+                          columns=['date', 'value', 'previous', 'forecast', 'change', 'change_z', 'surprise'])
+    return series.apply(pd.to_numeric, errors='coerce').assign(date=series['date'])
+
+
+def list_series() -> List[Dict[str, Any]]:
+    """Every stored series with its latest date, value and observation count"""
+    rows = get_connection().execute(
+        """SELECT s.indicator, s.region, s.last_date, s.last_value,
+                  (SELECT COUNT(*) FROM observations o
+                   WHERE o.indicator = s.indicator AND o.region = s.region) AS observations
+           FROM series_state s ORDER BY s.indicator, s.region"""
+    ).fetchall()
+    return [dict(r) for r in rows]
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Main Processor
+Command line and worker entry point for processing input workbooks
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from dashboard_config import DEFAULT_INPUT_DIR, DEFAULT_OUTPUT_DIR, INPUT_FILE_PATTERN
+import backtest
+import macro_history
+from report_writer import EXCEL_MAX_SHEET_NAME, write_streaming_report
+from package_diff import analyze_package
+from schema_detection import canonical_columns, detect_schema, sheets_to_load
+from workbook_loader import load_sheets_parallel
+
+SPREADSHEET_DIR = Path(DEFAULT_OUTPUT_DIR) / "spreadsheets"
+
+
+def scan_input_files(input_dir: str = DEFAULT_INPUT_DIR) -> List[Path]:
+    """
+    Find input workbooks
+
+    Args:
+        input_dir: Directory to scan
+
+    Returns:
+        Sorted list of workbook paths
+    """
+    directory = Path(input_dir)
+    if not directory.exists():
+        return []
+    return sorted(p for p in directory.glob(INPUT_FILE_PATTERN) if p.is_file())
+
+
+def load_workbook(path: Path, sheet_names: Optional[List[str]] = None,
+                  cancel_check: Optional[Any] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Load sheets of a workbook
+
+    Large multi-sheet workbooks are parsed a sheet per process.
+
+    Args:
+        path: Workbook path
+        sheet_names: Sheets to parse, or None for every sheet
+        cancel_check: Called while sheets are parsed; raises to stop
+
+    Returns:
+        Dictionary mapping sheet name to DataFrame
+    """
+    return load_sheets_parallel(path, sheet_names, cancel_check=cancel_check)
+
+
+def summarize_workbook(sheets: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Build per-sheet, per-column summary statistics for numeric data
+
+    Args:
+        sheets: Dictionary mapping sheet name to DataFrame
+
+    Returns:
+        Long DataFrame with one row per sheet and numeric column
+    """
+    frames = []
+    for sheet_name, frame in sheets.items():
+        numeric = frame.select_dtypes(include='number')
+        if numeric.empty:
+            continue
+        stats = numeric.describe().T
+        stats.insert(0, 'Column', stats.index)
+        stats.insert(0, 'Sheet', sheet_name)
+        frames.append(stats.reset_index(drop=True))
+
+    if not frames:
+        return pd.DataFrame(columns=['Sheet', 'Column'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _input_sheet_name(name: str, taken: set) -> str:
+    """
+    Rename an input sheet whose name clashes with a computed report sheet
+
+    Excel compares sheet names case-insensitively, so an input sheet called
+    "summary" would clash with the computed Summary sheet. The clashing sheet
+    gets an "Input_" prefix, and a numeric suffix if that is taken too.
+
+    Args:
+        name: Clashing input sheet name
+        taken: Lower-cased names already used in the report (updated in place)
+
+    Returns:
+        Unique sheet name of at most 31 characters
+    """
+    candidate = f"Input_{name}"[:EXCEL_MAX_SHEET_NAME]
+    number = 1
+    while candidate.lower() in taken:
+        number += 1
+        suffix = f"_{number}"
+        candidate = f"Input_{name}"[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix
+    taken.add(candidate.lower())
+    return candidate
+
+
+def write_outputs(path: Path, sheets: Dict[str, pd.DataFrame], summary: pd.DataFrame,
+                  context: Optional[Any] = None, analysis: Optional[Dict[str, pd.DataFrame]] = None) -> List[str]:
+    """
+    Write the processed report for one input workbook
+
+    Args:
+        path: Source workbook path
+        sheets: Loaded sheets
+        summary: Summary statistics
+        context: Optional worker JobContext for cancellation and output tracking
+        analysis: Extra report sheets from the schema processor
+
+    Returns:
+        List of written output paths
+    """
+    output_path = SPREADSHEET_DIR / f"{path.stem}_report.xlsx"
+    report_sheets = {'Summary': summary}
+    report_sheets.update(analysis or {})
+    # Input sheets never replace the computed ones; only clashing names are changed
+    computed = {name.lower() for name in report_sheets}
+    taken = computed | {str(name)[:EXCEL_MAX_SHEET_NAME].lower() for name in sheets}
+    for name, frame in sheets.items():
+        clashes = str(name)[:EXCEL_MAX_SHEET_NAME].lower() in computed
+        report_sheets[_input_sheet_name(name, taken) if clashes else name] = frame
+    result = write_streaming_report(
+        output_path, report_sheets,
+        cancel_check=context.check if context else None,
+        on_file=context.add_output if context else None
+    )
+    return [result['output_path']] + result['companions']
+
+
+def process_file(path: str, context: Optional[Any] = None) -> Dict[str, Any]:
+    """
+    Run the processing pipeline for one input file
+
+    The workbook's schema is detected from its header rows first, so only
+    the sheets the matching processor needs are parsed. When run by the
+    worker pool, context reports each stage so the supervisor can enforce
+    per-stage deadlines and cancel between chunks.
+
+    Args:
+        path: Input workbook path
+        context: Optional worker JobContext
+
+    Returns:
+        Dictionary with the input path, schema, sheet row counts, output paths
+        and the diff against the package's previous version (if any)
+    """
+    path = Path(path)
+    if context:
+        context.stage('load')
+    decision = detect_schema(path)
+    sheets = canonical_columns(load_workbook(path, sheets_to_load(decision), context.check if context else None),
+                               decision)
+    if context:
+        context.stage('summarize')
+    summary = summarize_workbook(sheets)
+    analysis, diff = analyze_package(path, decision, sheets)
+    if context:
+        context.stage('write')
+    outputs = write_outputs(path, sheets, summary, context, analysis)
+    # History is only recorded once the report is in place, so a failed,
+    # cancelled or timed-out job leaves the stored history untouched
+    if decision['schema'] == 'macro':
+        macro_history.ingest_workbook(path, sheets)
+    elif decision['schema'] in ('forecast', 'top30'):
+        backtest.ingest_workbook(path, sheets, decision['schema'])
+
+    return {
+        'input': str(path),
+        'schema': decision['schema'],
+        'sheets': {name: len(frame) for name, frame in sheets.items()},
+        'outputs': outputs,
+        'diff': diff
+    }
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Process financial forecast workbooks")
+    parser.add_argument('--mode', choices=['scan', 'process', 'full'], default='full',
+                        help="scan: list input files, process/full: process every input file")
+    parser.add_argument('--input-dir', default=DEFAULT_INPUT_DIR, help="Directory containing input workbooks")
+    args = parser.parse_args()
+
+    files = scan_input_files(args.input_dir)
+    print(f"📁 Found {len(files)} input files")
+    for file_path in files:
+        print(f"  📄 {file_path.name}")
+
+    if args.mode == 'scan':
+        return 0
+
+    failures = 0
+    for file_path in files:
+        try:
+            result = process_file(str(file_path))
+            print(f"✅ {file_path.name} ({result['schema']}): {len(result['outputs'])} outputs")
+        except Exception as e:
+            failures += 1
+            print(f"❌ {file_path.name}: {e}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
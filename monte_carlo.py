@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo Module
+Simulates return distributions from forecast sheets
+"""
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from dashboard_config import (MAX_WORKERS, MONTE_CARLO_BINS, MONTE_CARLO_CHUNK_PATHS,
+                              MONTE_CARLO_PATHS, MONTE_CARLO_PERCENTILES, MONTE_CARLO_SEED)
+
+# Trading days per horizon unit
+HORIZON_UNIT_DAYS = {
+    'day': 1,
+    'week': 5,
+    'month': 21,
+    'year': 252
+}
+
+# Histogram range, in standard deviations either side of the expected log return
+HISTOGRAM_SPAN = 8.0
+
+
+def parse_horizon(time_period: str) -> int:
+    """
+    Convert a Time_Period label such as '14_days' or '3_months' to trading days
+
+    Args:
+        time_period: Horizon label from a forecast sheet
+
+    Returns:
+        Number of trading days (at least 1)
+    """
+    match = re.match(r'^\s*(\d+)[_\s-]*(day|week|month|year)s?\s*$', str(time_period), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Unrecognised time period: {time_period}")
+    return max(1, int(match.group(1)) * HORIZON_UNIT_DAYS[match.group(2).lower()])
+
+
+def _prepare_rows(forecasts: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Turn forecast rows into per-row simulation parameters
+
+    Forecast_Return is the expected simple return over the horizon (percent),
+    Volatility the daily volatility (percent) and Confidence (percent) scales
+    an extra, per-path drift uncertainty: at 100% the model is plain geometric
+    Brownian motion, lower confidence widens the distribution.
+    """
+    horizon = forecasts['Time_Period'].map(parse_horizon).to_numpy(dtype=np.int64)
+    expected = np.log1p(forecasts['Forecast_Return'].to_numpy(dtype=float) / 100.0)
+    sigma = forecasts['Volatility'].to_numpy(dtype=float) / 100.0
+    confidence = np.clip(forecasts['Confidence'].to_numpy(dtype=float) / 100.0, 0.0, 1.0)
+
+    drift = expected / horizon - 0.5 * sigma ** 2
+    drift_noise = (1.0 - confidence) * sigma * np.sqrt(horizon)
+    total_sd = np.sqrt(sigma ** 2 * horizon + drift_noise ** 2)
+    center = drift * horizon
+    span = HISTOGRAM_SPAN * np.maximum(total_sd, 1e-12)
+
+    return {
+        'horizon': horizon,
+        'drift': drift,
+        'sigma': sigma,
+        'drift_noise': drift_noise,
+        'low': center - span,
+        'high': center + span
+    }
+
+
+def _simulate_chunk(params: Dict[str, np.ndarray], n_paths: int, seed: np.random.SeedSequence,
+                    bins: int) -> Dict[str, np.ndarray]:
+    """
+    Simulate one chunk of paths for every row and reduce it to summary accumulators
+
+    Rows are stepped together; rows are ordered by descending horizon so the
+    active set at each step is a prefix and finished rows stop costing work.
+    Only the running log return per path is kept, never the full path.
+    """
+    rng = np.random.default_rng(seed)
+    order = np.argsort(-params['horizon'], kind='stable')
+    horizon = params['horizon'][order]
+    drift = params['drift'][order]
+    sigma = params['sigma'][order]
+    n_rows = len(order)
+
+    # Per-path drift uncertainty is drawn once per path and spread over the horizon
+    cumulative = rng.standard_normal((n_paths, n_rows)) * params['drift_noise'][order]
+    terminal = np.empty((n_paths, n_rows))
+    active = n_rows
+    for step in range(1, int(horizon[0]) + 1):
+        while active and horizon[active - 1] < step:
+            active -= 1
+        cumulative[:, :active] += drift[:active] + sigma[:active] * rng.standard_normal((n_paths, active))
+        finished = horizon[:active] == step
+        if finished.any():
+            terminal[:, :active][:, finished] = cumulative[:, :active][:, finished]
+
+    # Restore caller row order
+    result = np.empty_like(terminal)
+    result[:, order] = terminal
+
+    low, high = params['low'], params['high']
+    scaled = (result - low) / (high - low) * bins
+    bin_index = np.clip(scaled.astype(np.int64), 0, bins - 1)
+    flat = bin_index + np.arange(n_rows) * bins
+    histogram = np.bincount(flat.ravel(), minlength=n_rows * bins).reshape(n_rows, bins)
+
+    return {
+        'histogram': histogram,
+        'losses': (result < 0).sum(axis=0),
+        'sum': np.expm1(result).sum(axis=0),
+        'paths': n_paths
+    }
+
+
+def _merge(total: Optional[Dict[str, np.ndarray]], part: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Add one chunk's accumulators into the running totals"""
+    if total is None:
+        return part
+    return {key: total[key] + part[key] for key in total}
+
+
+def _histogram_percentiles(histogram: np.ndarray, low: np.ndarray, high: np.ndarray,
+                           percentiles: Sequence[float]) -> np.ndarray:
+    """Interpolate percentiles (in log-return space) from per-row histograms"""
+    n_rows, bins = histogram.shape
+    cumulative = np.cumsum(histogram, axis=1)
+    totals = cumulative[:, -1]
+    width = (high - low) / bins
+    out = np.empty((n_rows, len(percentiles)))
+
+    for k, pct in enumerate(percentiles):
+        target = totals * pct / 100.0
+        idx = np.clip((cumulative < target[:, None]).sum(axis=1), 0, bins - 1)
+        before = np.where(idx > 0, cumulative[np.arange(n_rows), idx - 1], 0)
+        in_bin = np.maximum(histogram[np.arange(n_rows), idx], 1)
+        fraction = np.clip((target - before) / in_bin, 0.0, 1.0)
+        out[:, k] = low + (idx + fraction) * width
+
+    return out
+
+
+def simulate_forecasts(forecasts: pd.DataFrame, n_paths: int = MONTE_CARLO_PATHS,
+                       chunk_paths: int = MONTE_CARLO_CHUNK_PATHS, seed: int = MONTE_CARLO_SEED,
+                       percentiles: Sequence[float] = MONTE_CARLO_PERCENTILES,
+                       bins: int = MONTE_CARLO_BINS, max_workers: int = MAX_WORKERS) -> pd.DataFrame:
+    """
+    Simulate return distributions for every Asset x Time_Period forecast row
+
+    Paths are generated in chunks, each with its own child seed spawned from
+    a single SeedSequence, so results are reproducible regardless of how many
+    workers run them. Chunks are reduced to histograms immediately; memory is
+    bounded by chunk_paths x rows.
+
+    Args:
+        forecasts: DataFrame with Asset, Time_Period, Forecast_Return, Volatility and Confidence
+        n_paths: Total simulated paths per row
+        chunk_paths: Paths generated per chunk
+        seed: Root seed for the random streams
+        percentiles: Percentile bands to report (0-100)
+        bins: Histogram resolution for percentile estimates
+        max_workers: Maximum number of worker processes
+
+    Returns:
+        DataFrame with one row per forecast: expected return, percentile bands
+        and probability of loss (returns in percent)
+    """
+    required = ['Asset', 'Time_Period', 'Forecast_Return', 'Volatility', 'Confidence']
+    missing = [col for col in required if col not in forecasts.columns]
+    if missing:
+        raise ValueError(f"Forecast data is missing columns: {', '.join(missing)}")
+
+    rows = forecasts.dropna(subset=required).reset_index(drop=True)
+    if rows.empty:
+        columns = ['Asset', 'Time_Period', 'Horizon_Days', 'Expected_Return']
+        return pd.DataFrame(columns=columns + [f'P{pct:g}' for pct in percentiles] + ['Prob_Loss'])
+
+    params = _prepare_rows(rows)
+    chunk_sizes = [min(chunk_paths, n_paths - start) for start in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+    totals = None
+    workers = max(1, min(max_workers, len(chunk_sizes)))
+    if workers == 1:
+        for size, child in zip(chunk_sizes, seeds):
+            totals = _merge(totals, _simulate_chunk(params, size, child, bins))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_simulate_chunk, params, size, child, bins)
+                       for size, child in zip(chunk_sizes, seeds)]
+            for future in futures:
+                totals = _merge(totals, future.result())
+
+    bands = np.expm1(_histogram_percentiles(totals['histogram'], params['low'], params['high'], percentiles))
+
+    summary = pd.DataFrame({
+        'Asset': rows['Asset'],
+        'Time_Period': rows['Time_Period'],
+        'Horizon_Days': params['horizon'],
+        'Expected_Return': totals['sum'] / totals['paths'] * 100.0
+    })
+    for k, pct in enumerate(percentiles):
+        summary[f'P{pct:g}'] = bands[:, k] * 100.0
+    summary['Prob_Loss'] = totals['losses'] / totals['paths']
+
+    return summary
+
+
+def get_probability_matrix(summary: pd.DataFrame, value: str = 'Prob_Loss') -> pd.DataFrame:
+    """
+    Pivot a simulation summary into an Asset x Time_Period matrix for heatmaps
+
+    Args:
+        summary: DataFrame returned by simulate_forecasts
+        value: Column to place in the matrix
+
+    Returns:
+        Wide DataFrame with assets as rows and time periods as columns,
+        ordered by horizon length
+    """
+    matrix = summary.pivot_table(index='Asset', columns='Time_Period', values=value, aggfunc='first')
+    order = summary.drop_duplicates('Time_Period').sort_values('Horizon_Days')['Time_Period']
+    return matrix.reindex(columns=[period for period in order if period in matrix.columns])
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Package Diff Module
+Key-aligned diffs between successive package versions and incremental analysis
+"""
+
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+import catalog
+from dashboard_config import PACKAGE_DIFF_CACHE_SIZE, PACKAGE_DIFF_ENABLED, PACKAGE_DIFF_TOLERANCE
+from dataframe_engine import get_engine
+from schema_detection import canonical_columns, combine_sheets, detect_schema, get_processor, sheets_to_load
+from workbook_loader import load_sheets_parallel
+
+logger = logging.getLogger(__name__)
+
+# Columns identifying a row across versions, per schema
+DIFF_KEYS = {
+    'forecast': ['Asset', 'Time_Period'],
+    'top30': ['Symbol'],
+    'macro': ['Indicator', 'Region']
+}
+
+# Analysis sheets per schema and the column their rows are grouped by; None
+# marks sheets rebuilt in full on any change (rankings depend on every row,
+# row-level sheets are as cheap to rebuild as to patch)
+ANALYSIS_GROUPS = {
+    'forecast': {'Forecast_Matrix': 'Asset', 'Asset_Summary': 'Asset'},
+    'macro': {'Indicator_Matrix': 'Indicator', 'Indicator_Changes': None},
+    'top30': {'Return_Ranks': None, 'Sector_Returns': 'Sector'}
+}
+
+# Grouped analysis sheets that are pivots, and the column whose values become
+# their columns; when that set of values changes they are rebuilt in full
+ANALYSIS_PIVOTS = {
+    'forecast': {'Forecast_Matrix': 'Time_Period'},
+    'macro': {'Indicator_Matrix': 'Region'}
+}
+
+CHANGES_SHEET = 'Package_Changes'
+OCCURRENCE_COLUMN = 'Occurrence'  # Added to the keys when a version repeats a key
+
+_analysis_cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+
+
+def _with_occurrence(frame: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """Number repeated keys so the n-th duplicate in one version aligns with the n-th in the other"""
+    return frame.assign(**{OCCURRENCE_COLUMN: frame.groupby(keys, sort=False).cumcount()})
+
+
+def _differs(old: pd.Series, new: pd.Series, tolerance: float) -> pd.Series:
+    """Element-wise change flags; missing on both sides counts as equal"""
+    both_missing = old.isna() & new.isna()
+    numeric = all(pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s) for s in (old, new))
+    if numeric:
+        moved = (new - old).abs() > tolerance
+        return (moved | (old.isna() != new.isna())) & ~both_missing
+    return ~(old.eq(new) | both_missing)
+
+
+def diff_frames(old: pd.DataFrame, new: pd.DataFrame, keys: List[str],
+                tolerance: float = PACKAGE_DIFF_TOLERANCE) -> pd.DataFrame:
+    """
+    Compare two versions of a table row by row on their key columns
+
+    Both sides are aligned with one outer hash join (through the configured
+    dataframe engine), so the cost is linear in the row count. Only added,
+    removed and changed rows are returned.
+
+    Args:
+        old: Previous version
+        new: Current version
+        keys: Key columns present in both versions (repeated keys are matched
+            by their order, through an added 'Occurrence' key)
+        tolerance: Numeric differences at or below this are not changes
+
+    Returns:
+        DataFrame with the keys, 'Change' ('added', 'removed' or 'changed'),
+        'Changed_Columns', and '<column>_Old', '<column>_New' (plus
+        '<column>_Delta' for numeric columns) for every shared column
+    """
+    missing = [k for k in keys if k not in old.columns or k not in new.columns]
+    if missing:
+        raise ValueError(f"Both versions need the key columns: {', '.join(missing)}")
+
+    old = old.dropna(subset=keys)
+    new = new.dropna(subset=keys)
+    if old.duplicated(keys).any() or new.duplicated(keys).any():
+        old = _with_occurrence(old, keys)
+        new = _with_occurrence(new, keys)
+        keys = keys + [OCCURRENCE_COLUMN]
+    values = [c for c in new.columns if c in old.columns and c not in keys]
+
+    left = old[keys + values].rename(columns={c: f"{c}_Old" for c in values}).assign(_in_old=True)
+    right = new[keys + values].rename(columns={c: f"{c}_New" for c in values}).assign(_in_new=True)
+    joined = get_engine().join(left, right, keys, 'outer').reset_index(drop=True)
+
+    in_old = joined['_in_old'].eq(True)
+    in_new = joined['_in_new'].eq(True)
+    both = in_old & in_new
+    flags = pd.DataFrame({c: _differs(joined[f"{c}_Old"], joined[f"{c}_New"], tolerance) & both for c in values},
+                         index=joined.index)
+    changed = flags.any(axis=1) if values else pd.Series(False, index=joined.index)
+
+    change = np.select([~in_old, ~in_new, changed], ['added', 'removed', 'changed'], '')
+    keep = change != ''
+    result = joined.loc[keep, keys].copy()
+    result['Change'] = change[keep]
+    result['Changed_Columns'] = (flags[keep].dot(pd.Index(values) + ',').str.rstrip(',')
+                                 if values else '')
+    for column in values:
+        result[f"{column}_Old"] = joined.loc[keep, f"{column}_Old"]
+        result[f"{column}_New"] = joined.loc[keep, f"{column}_New"]
+        if pd.api.types.is_numeric_dtype(old[column]) and pd.api.types.is_numeric_dtype(new[column]) \
+                and not pd.api.types.is_bool_dtype(old[column]) and not pd.api.types.is_bool_dtype(new[column]):
+            result[f"{column}_Delta"] = result[f"{column}_New"] - result[f"{column}_Old"]
+    return result.sort_values(keys, kind='stable').reset_index(drop=True)
+
+
+def count_changes(changes: pd.DataFrame) -> Dict[str, int]:
+    """Number of added, removed and changed rows"""
+    counts = changes['Change'].value_counts() if not changes.empty else {}
+    return {kind: int(counts.get(kind, 0)) for kind in ('added', 'removed', 'changed')}
+
+
+def affected_targets(schema: str, changes: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Work a diff makes stale downstream
+
+    Args:
+        schema: Workbook schema
+        changes: Result of diff_frames
+
+    Returns:
+        Dictionary with 'sheets' (analysis sheet to the group values to
+        rebuild, or 'all') and, for macro packages, the changed 'series'
+    """
+    sheets: Dict[str, Union[str, List[Any]]] = {}
+    for sheet, column in ANALYSIS_GROUPS.get(schema, {}).items():
+        if changes.empty:
+            sheets[sheet] = []
+        elif column is None:
+            sheets[sheet] = 'all'
+        elif column in changes.columns:
+            sheets[sheet] = sorted(set(changes[column].dropna().tolist()), key=str)
+        elif f"{column}_Old" in changes.columns:
+            # A row that moved group makes both its old and new group stale
+            values = pd.concat([changes[f"{column}_Old"], changes[f"{column}_New"]]).dropna()
+            sheets[sheet] = sorted(set(values.tolist()), key=str)
+        else:
+            sheets[sheet] = 'all'
+
+    affected = {'sheets': sheets}
+    if schema == 'macro' and not changes.empty:
+        affected['series'] = changes[['Indicator', 'Region']].astype(str).values.tolist()
+    return affected
+
+
+def refresh_analysis(schema: str, previous: Dict[str, pd.DataFrame], data: pd.DataFrame,
+                     affected: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
+    """
+    Rebuild only the stale parts of a package's analysis sheets
+
+    Rows of grouped sheets whose group is unaffected are reused from the
+    predecessor's analysis; affected groups are recomputed from their rows
+    alone. Sheets that depend on every row, or whose columns would change
+    (including pivots gaining or losing a column), are recomputed in full.
+
+    Args:
+        schema: Workbook schema
+        previous: Predecessor's analysis sheets
+        data: Current package rows (all sheets of the schema combined)
+        affected: Result of affected_targets
+
+    Returns:
+        Analysis sheets, as the schema's processor would build them
+    """
+    processor = get_processor(schema)
+    groups = ANALYSIS_GROUPS.get(schema)
+    if not groups or any(sheet not in previous for sheet in groups):
+        return processor({'data': data})
+
+    full = None
+    rebuilt = {}
+    pivots = ANALYSIS_PIVOTS.get(schema, {})
+    for sheet, column in groups.items():
+        targets = affected['sheets'].get(sheet, 'all')
+        if sheet in pivots and pivots[sheet] in data.columns and \
+                set(previous[sheet].columns) != {column} | set(data[pivots[sheet]].dropna().unique()):
+            targets = 'all'
+        if isinstance(targets, list) and not targets:
+            rebuilt[sheet] = previous[sheet]
+            continue
+
+        fresh = None
+        if targets != 'all' and column in data.columns and column in previous[sheet].columns:
+            subset = data[data[column].isin(targets)]
+            kept = previous[sheet][~previous[sheet][column].isin(targets)]
+            part = processor({'data': subset}).get(sheet) if not subset.empty else kept.iloc[0:0]
+            if part is not None and set(part.columns) <= set(kept.columns):
+                fresh = (pd.concat([kept, part], ignore_index=True)[list(kept.columns)]
+                         .sort_values(column, kind='stable').reset_index(drop=True))
+        if fresh is None:
+            full = full if full is not None else processor({'data': data})
+            fresh = full.get(sheet)
+        if fresh is not None:
+            rebuilt[sheet] = fresh
+    return rebuilt
+
+
+def _remember(fingerprint: str, data: pd.DataFrame, analysis: Dict[str, pd.DataFrame]):
+    _analysis_cache[fingerprint] = {'data': data, 'analysis': analysis}
+    _analysis_cache.move_to_end(fingerprint)
+    while len(_analysis_cache) > PACKAGE_DIFF_CACHE_SIZE:
+        _analysis_cache.popitem(last=False)
+
+
+def load_package_rows(path: Path, fingerprint: Optional[str] = None) -> Tuple[str, pd.DataFrame]:
+    """
+    Parse the rows of a package's schema sheets
+
+    Args:
+        path: Workbook path
+        fingerprint: File fingerprint, computed if not given
+
+    Returns:
+        (schema, combined rows)
+    """
+    decision = detect_schema(path, fingerprint)
+    sheets = canonical_columns(load_sheets_parallel(path, sheets_to_load(decision)), decision)
+    return decision['schema'], combine_sheets(sheets, decision['schema'])
+
+
+def diff_packages(old_path: Path, new_path: Path, tolerance: float = PACKAGE_DIFF_TOLERANCE) -> Dict[str, Any]:
+    """
+    Diff two package versions
+
+    Args:
+        old_path: Previous version
+        new_path: Current version
+        tolerance: Numeric differences at or below this are not changes
+
+    Returns:
+        Dictionary with the schema, keys, change counts, affected targets and
+        the changes DataFrame
+    """
+    old_schema, old_rows = load_package_rows(old_path)
+    schema, new_rows = load_package_rows(new_path)
+    if old_schema != schema:
+        raise ValueError(f"Cannot diff a {old_schema} package against a {schema} package")
+    if schema not in DIFF_KEYS:
+        raise ValueError(f"No diff keys are defined for {schema} packages")
+
+    changes = diff_frames(old_rows, new_rows, DIFF_KEYS[schema], tolerance)
+    return {
+        'schema': schema,
+        'keys': DIFF_KEYS[schema],
+        'old': Path(old_path).name,
+        'new': Path(new_path).name,
+        'counts': count_changes(changes),
+        'affected': affected_targets(schema, changes),
+        'changes': changes
+    }
+
+
+def analyze_package(path: Path, decision: Dict[str, Any],
+                    sheets: Dict[str, pd.DataFrame]) -> Tuple[Dict[str, pd.DataFrame], Optional[Dict[str, Any]]]:
+    """
+    Build a package's analysis sheets, reusing its predecessor's where possible
+
+    When the previous dated version of the package was processed recently by
+    this worker, only the analysis groups its diff touches are recomputed.
+    Otherwise the predecessor is parsed for the diff and the analysis is
+    built in full. The diff is added as the Package_Changes sheet.
+
+    Args:
+        path: Workbook path
+        decision: Result of detect_schema for the workbook
+        sheets: Parsed schema sheets
+
+    Returns:
+        (analysis sheets, diff summary or None when there is no predecessor)
+    """
+    schema = decision['schema']
+    processor = get_processor(schema)
+    if not PACKAGE_DIFF_ENABLED or schema not in DIFF_KEYS:
+        return processor(sheets), None
+
+    data = combine_sheets(sheets, schema)
+    predecessor = catalog.find_predecessor(path)
+    previous = None
+    if predecessor is not None:
+        previous = _analysis_cache.get(predecessor['fingerprint'])
+        if previous is None:
+            try:
+                previous_schema, previous_rows = load_package_rows(Path(predecessor['path']),
+                                                                   predecessor['fingerprint'])
+                if previous_schema == schema:
+                    previous = {'data': previous_rows, 'analysis': None}
+            except Exception as e:
+                logger.warning(f"Could not load {predecessor['name']} for diffing: {e}")
+
+    if previous is None:
+        analysis = processor(sheets)
+        _remember(decision['fingerprint'], data, analysis)
+        return analysis, None
+
+    changes = diff_frames(previous['data'], data, DIFF_KEYS[schema])
+    affected = affected_targets(schema, changes)
+    incremental = previous['analysis'] is not None
+    if incremental:
+        analysis = refresh_analysis(schema, previous['analysis'], data, affected)
+    else:
+        analysis = processor(sheets)
+    _remember(decision['fingerprint'], data, analysis)
+
+    counts = count_changes(changes)
+    logger.info(f"{Path(path).name} vs {predecessor['name']}: {counts['added']} added, "
+                f"{counts['removed']} removed, {counts['changed']} changed")
+    report = dict(analysis)
+    if not changes.empty:
+        report[CHANGES_SHEET] = changes
+    return report, {'predecessor': predecessor['name'], 'counts': counts, 'affected': affected,
+                    'incremental': incremental}
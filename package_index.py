@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Package Index Module
+In-memory sorted version index per package for latest-as-of and range lookups
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import catalog
+
+# Sorts after any file name, so (date, HIGHEST) bounds every version on that date
+HIGHEST = '\uffff'
+
+
+def parse_date(value: Optional[str]) -> Optional[str]:
+    """
+    Validate a YYYY-MM-DD date
+
+    Raises:
+        ValueError: If the value is not a date in that format
+    """
+    if value is None:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+
+
+class PackageIndex:
+    """
+    Dated versions of every package, kept sorted by (date, file name)
+
+    Lookups bisect the per-package key list, so "latest as of" is O(log n)
+    and a date range costs O(log n + k). The index is filled from the
+    catalog and then follows this process's catalog file events (uploads,
+    deletes and reconciliation passes); when the catalog's input generation
+    shows changes made by another process it is refilled. Resolving a
+    package never rescans the input directory or re-parses file names.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys: Dict[str, List[Tuple[str, str]]] = {}
+        self._entries: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+        self._undated: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._paths: Dict[str, Tuple[str, Optional[Tuple[str, str]]]] = {}
+        self.generation: Optional[int] = None
+
+    def load(self, files: List[Dict[str, Any]], generation: Optional[int] = None):
+        """
+        Replace the index contents with catalog file dictionaries
+
+        Args:
+            files: Input file dictionaries
+            generation: Catalog input generation read before querying the files
+        """
+        with self._lock:
+            self._keys.clear()
+            self._entries.clear()
+            self._undated.clear()
+            self._paths.clear()
+            for info in files:
+                self.add(info)
+            self.generation = generation
+
+    def add(self, info: Dict[str, Any]):
+        """Insert or replace one input file version"""
+        with self._lock:
+            self.remove(info['path'])
+            package = info['package']
+            if info.get('package_date'):
+                key = (info['package_date'], info['name'])
+                insort(self._keys.setdefault(package, []), key)
+                self._entries.setdefault(package, {})[key] = info
+            else:
+                key = None
+                self._undated.setdefault(package, {})[info['path']] = info
+            self._paths[info['path']] = (package, key)
+
+    def remove(self, path: str) -> bool:
+        """Drop one input file version; returns False if it was not indexed"""
+        with self._lock:
+            located = self._paths.pop(path, None)
+            if located is None:
+                return False
+            package, key = located
+            if key is None:
+                self._undated[package].pop(path, None)
+            else:
+                keys = self._keys[package]
+                del keys[bisect_left(keys, key)]
+                del self._entries[package][key]
+            if not self._keys.get(package) and not self._undated.get(package):
+                self._keys.pop(package, None)
+                self._entries.pop(package, None)
+                self._undated.pop(package, None)
+            return True
+
+    def on_catalog_event(self, event: str, area: str, path: str, row: Optional[Dict[str, Any]]):
+        """catalog.add_file_listener callback"""
+        if area != 'input':
+            return
+        if event == 'upsert' and row is not None:
+            self.add(row)
+        elif event == 'remove':
+            self.remove(path)
+
+    def latest(self, package: str, as_of: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Latest dated version of a package on or before a date
+
+        Args:
+            package: Package name
+            as_of: YYYY-MM-DD date (None for the newest version)
+
+        Returns:
+            File dictionary, or None if the package has no version by then
+        """
+        with self._lock:
+            keys = self._keys.get(package)
+            if not keys:
+                return None
+            position = len(keys) if as_of is None else bisect_right(keys, (as_of, HIGHEST))
+            return self._entries[package][keys[position - 1]] if position else None
+
+    def versions(self, package: str, start: Optional[str] = None,
+                 end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Dated versions of a package within an inclusive date range, oldest first
+
+        Args:
+            package: Package name
+            start: First YYYY-MM-DD date (None for no lower bound)
+            end: Last YYYY-MM-DD date (None for no upper bound)
+
+        Returns:
+            List of file dictionaries
+        """
+        with self._lock:
+            keys = self._keys.get(package, [])
+            low = bisect_left(keys, (start, '')) if start else 0
+            high = bisect_right(keys, (end, HIGHEST)) if end else len(keys)
+            entries = self._entries.get(package, {})
+            return [entries[key] for key in keys[low:high]]
+
+    def packages(self) -> List[Dict[str, Any]]:
+        """Every package with its version count and date span, sorted by name"""
+        with self._lock:
+            summary = []
+            for package in sorted(set(self._keys) | set(self._undated)):
+                keys = self._keys.get(package, [])
+                summary.append({
+                    'name': package,
+                    'versions': len(keys),
+                    'undated': len(self._undated.get(package, {})),
+                    'first_date': keys[0][0] if keys else None,
+                    'latest_date': keys[-1][0] if keys else None,
+                    'latest': keys[-1][1] if keys else None
+                })
+            return summary
+
+
+_index: Dict[str, Optional[PackageIndex]] = {'instance': None}
+_index_lock = threading.Lock()
+
+
+def get_package_index() -> PackageIndex:
+    """
+    Get the process-wide package index, building it from the catalog on first use
+
+    Each call runs the catalog's throttled reconciliation and then refills
+    the index if the catalog's input generation moved, so files catalogued
+    by other processes (which this process gets no file events for, not
+    even from its own reconcile) are picked up.
+
+    Returns:
+        PackageIndex instance
+    """
+    with _index_lock:
+        index = _index['instance']
+        if index is None:
+            index = PackageIndex()
+            catalog.add_file_listener(index.on_catalog_event)
+            _index['instance'] = index
+    catalog.reconcile()
+    generation = catalog.file_generations()['input']
+    if generation != index.generation:
+        index.load(catalog.query_files('input'), generation)
+    return index
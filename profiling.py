@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Profiling Module
+Opt-in per-stage memory and CPU profiling for processing jobs
+"""
+
+import cProfile
+import io
+import logging
+import pstats
+import resource
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from dashboard_config import (PROFILE_CPU_PROFILER, PROFILE_DIR, PROFILE_TOP_ALLOCATIONS, PROFILE_TOP_FUNCTIONS,
+                              PROFILE_TRACEMALLOC)
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:
+    PyinstrumentProfiler = None
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def profile_options(profiler: Optional[str] = PROFILE_CPU_PROFILER) -> Dict[str, Any]:
+    """
+    Profiling options for a job, from the configuration
+
+    Args:
+        profiler: CPU profiler override ('cprofile', 'pyinstrument' or None)
+
+    Returns:
+        Options dictionary accepted by JobProfiler
+    """
+    return {
+        'trace_allocations': PROFILE_TRACEMALLOC,
+        'top_allocations': PROFILE_TOP_ALLOCATIONS,
+        'profiler': profiler,
+        'top_functions': PROFILE_TOP_FUNCTIONS,
+        'output_dir': PROFILE_DIR
+    }
+
+
+def _status_kb(field: str) -> Optional[int]:
+    """Read a memory figure (kB) from /proc/self/status"""
+    try:
+        with open('/proc/self/status') as handle:
+            for line in handle:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def current_rss() -> float:
+    """Resident set size in MB"""
+    kb = _status_kb('VmRSS')
+    return round(kb / 1024, 1) if kb is not None else 0.0
+
+
+def peak_rss() -> float:
+    """Peak resident set size in MB since the last reset (process lifetime if resets are unsupported)"""
+    kb = _status_kb('VmHWM')
+    if kb is None:
+        # ru_maxrss is in kB on Linux
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(kb / 1024, 1)
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's peak RSS counter so each stage reports its own peak (Linux)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as handle:
+            handle.write('5')
+        return True
+    except OSError:
+        return False
+
+
+# Allocation sites that describe the profiler or the import system rather than the job
+IGNORED_ALLOCATION_FILES = {tracemalloc.__file__, __file__, '<frozen importlib._bootstrap>',
+                            '<frozen importlib._bootstrap_external>'}
+
+
+def _top_allocations(limit: int) -> List[Dict[str, Any]]:
+    """Largest live Python allocation sites by source line"""
+    # Grouping first and filtering the grouped sites is far cheaper than filter_traces
+    top = []
+    for stat in tracemalloc.take_snapshot().statistics('lineno'):
+        frame = stat.traceback[0]
+        if frame.filename in IGNORED_ALLOCATION_FILES:
+            continue
+        top.append({'site': f"{frame.filename}:{frame.lineno}", 'size_mb': round(stat.size / MB, 3),
+                    'count': stat.count})
+        if len(top) >= limit:
+            break
+    return top
+
+
+class JobProfiler:
+    """
+    Collects per-stage figures for one job inside a worker process
+
+    Each stage records wall and CPU time, RSS at its start and end, the
+    stage's own peak RSS, the peak of Python allocations (tracemalloc) and
+    the top allocation sites still live when it ends. A CPU profiler, if
+    configured, runs for the whole job and its full output is written to
+    output_dir.
+    """
+
+    def __init__(self, job_id: str, trace_allocations: bool = True, top_allocations: int = 10,
+                 profiler: Optional[str] = None, top_functions: int = 25, output_dir: str = PROFILE_DIR):
+        self.job_id = job_id
+        self.trace_allocations = trace_allocations
+        self.top_allocations = top_allocations
+        self.profiler_name = profiler
+        self.top_functions = top_functions
+        self.output_dir = Path(output_dir)
+
+        self.stages: List[Dict[str, Any]] = []
+        self._current: Optional[Dict[str, Any]] = None
+        self._started_tracemalloc = False
+        self._profiler = None
+        self._job_started = time.perf_counter()
+        self._job_cpu = time.process_time()
+        self._job_peak = 0.0
+
+    def start(self):
+        """Begin profiling the job"""
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+        if self.profiler_name == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profiler_name == 'pyinstrument':
+            if PyinstrumentProfiler is None:
+                logger.warning("pyinstrument is not installed; CPU profile skipped")
+            else:
+                self._profiler = PyinstrumentProfiler()
+                self._profiler.start()
+
+        self._job_started = time.perf_counter()
+        self._job_cpu = time.process_time()
+
+    def stage(self, name: str):
+        """End the current stage (if any) and start a new one"""
+        self._end_stage()
+        reset_peak_rss()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._current = {
+            'name': name,
+            'wall_start': time.perf_counter(),
+            'cpu_start': time.process_time(),
+            'rss_start_mb': current_rss()
+        }
+
+    def _end_stage(self):
+        stage = self._current
+        if stage is None:
+            return
+        self._current = None
+        record = {
+            'name': stage['name'],
+            'wall_seconds': round(time.perf_counter() - stage['wall_start'], 4),
+            'cpu_seconds': round(time.process_time() - stage['cpu_start'], 4),
+            'rss_start_mb': stage['rss_start_mb'],
+            'rss_end_mb': current_rss(),
+            'peak_rss_mb': peak_rss()
+        }
+        if tracemalloc.is_tracing():
+            record['python_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / MB, 3)
+            # Keep the snapshot itself out of the CPU profile
+            paused = self.profiler_name == 'cprofile' and self._profiler is not None
+            if paused:
+                self._profiler.disable()
+            record['top_allocations'] = _top_allocations(self.top_allocations)
+            if paused:
+                self._profiler.enable()
+        self._job_peak = max(self._job_peak, record['peak_rss_mb'])
+        self.stages.append(record)
+
+    def _cpu_profile(self) -> Optional[Dict[str, Any]]:
+        """Stop the CPU profiler, save its output and summarise the hottest functions"""
+        if self._profiler is None:
+            return None
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.profiler_name == 'cprofile':
+            self._profiler.disable()
+            artifact = self.output_dir / f"{self.job_id}.prof"
+            self._profiler.dump_stats(str(artifact))
+            stats = pstats.Stats(self._profiler, stream=io.StringIO()).sort_stats('cumulative')
+            top = []
+            for func in stats.fcn_list[:self.top_functions]:
+                calls, ncalls, tottime, cumtime, _ = stats.stats[func]
+                top.append({
+                    'function': f"{func[0]}:{func[1]}({func[2]})",
+                    'calls': ncalls,
+                    'total_seconds': round(tottime, 4),
+                    'cumulative_seconds': round(cumtime, 4)
+                })
+            return {'engine': 'cprofile', 'artifact': str(artifact), 'top_functions': top}
+
+        self._profiler.stop()
+        artifact = self.output_dir / f"{self.job_id}.html"
+        artifact.write_text(self._profiler.output_html(), encoding='utf-8')
+        return {'engine': 'pyinstrument', 'artifact': str(artifact),
+                'summary': self._profiler.output_text(unicode=False, color=False)[:20000]}
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        Stop profiling and build the job's profile report
+
+        Returns:
+            Dictionary with per-stage records, job totals and the CPU profile
+        """
+        self._end_stage()
+        report = {
+            'stages': self.stages,
+            'total': {
+                'wall_seconds': round(time.perf_counter() - self._job_started, 4),
+                'cpu_seconds': round(time.process_time() - self._job_cpu, 4),
+                'peak_rss_mb': max(self._job_peak, peak_rss())
+            }
+        }
+        try:
+            report['cpu_profile'] = self._cpu_profile()
+        except Exception as e:
+            logger.error(f"Could not save CPU profile for job {self.job_id}: {e}")
+            report['cpu_profile'] = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        return report
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Report Writer Module
+Streams large spreadsheet reports to disk in constant memory
+"""
+
+import csv
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import xlsxwriter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet companions are optional
+    pa = None
+    pq = None
+
+from dashboard_config import MAX_WORKERS, REPORT_CHUNK_ROWS, REPORT_COMPANION_FORMAT
+
+# Excel hard limit per worksheet (including the header row)
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_SHEET_NAME = 31
+
+SheetSource = Union[pd.DataFrame, Iterable[pd.DataFrame], Tuple[Sequence[str], Iterable[Sequence[Any]]]]
+
+
+def iter_frame_chunks(frame: pd.DataFrame, chunk_rows: int = REPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Split a DataFrame into row chunks without copying it up front
+
+    Args:
+        frame: DataFrame to split
+        chunk_rows: Number of rows per chunk
+
+    Returns:
+        Iterator over DataFrame slices
+    """
+    for start in range(0, len(frame), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def _clean_chunk(chunk: pd.DataFrame) -> Iterator[Tuple[Any, ...]]:
+    """Yield chunk rows as plain tuples with missing values mapped to None"""
+    cleaned = chunk.astype(object).where(chunk.notna(), None)
+    return cleaned.itertuples(index=False, name=None)
+
+
+def _normalize_source(source: SheetSource, chunk_rows: int) -> Tuple[List[str], Iterator[List[Tuple[Any, ...]]]]:
+    """
+    Turn any supported sheet source into a header and an iterator of row batches
+
+    Args:
+        source: DataFrame, iterable of DataFrame chunks, or (columns, rows) tuple
+        chunk_rows: Number of rows per batch
+
+    Returns:
+        Tuple of (column names, iterator of row batches)
+    """
+    if isinstance(source, pd.DataFrame):
+        columns = [str(c) for c in source.columns]
+        batches = (list(_clean_chunk(chunk)) for chunk in iter_frame_chunks(source, chunk_rows))
+        return columns, batches
+
+    if isinstance(source, tuple) and len(source) == 2 and not isinstance(source[0], pd.DataFrame):
+        columns = [str(c) for c in source[0]]
+
+        def row_batches():
+            batch = []
+            for row in source[1]:
+                batch.append(tuple(row))
+                if len(batch) >= chunk_rows:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        return columns, row_batches()
+
+    # Iterable of DataFrame chunks: peek at the first chunk for the header
+    chunks = iter(source)
+    first = next(chunks, None)
+    if first is None:
+        return [], iter(())
+    columns = [str(c) for c in first.columns]
+
+    def chunk_batches():
+        yield list(_clean_chunk(first))
+        for chunk in chunks:
+            yield list(_clean_chunk(chunk))
+
+    return columns, chunk_batches()
+
+
+class _CompanionWriter:
+    """Writes CSV or Parquet companions alongside the Excel workbook"""
+
+    def __init__(self, fmt: Optional[str], path: Path, columns: List[str]):
+        self.fmt = fmt
+        self.path = path
+        self.columns = columns
+        self._handle = None
+        self._csv = None
+        self._parquet = None
+
+        if fmt == 'csv':
+            self._handle = open(path, 'w', newline='', encoding='utf-8')
+            self._csv = csv.writer(self._handle)
+            self._csv.writerow(columns)
+        elif fmt == 'parquet' and pq is None:
+            raise ImportError("pyarrow is required for Parquet companions")
+
+    def write(self, batch: List[Tuple[Any, ...]]):
+        if self._csv is not None:
+            self._csv.writerows(batch)
+        elif self.fmt == 'parquet':
+            table = pa.Table.from_pandas(
+                pd.DataFrame.from_records(batch, columns=self.columns), preserve_index=False
+            )
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(str(self.path), table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def _sheet_title(name: str, part: int) -> str:
+    """Build a valid worksheet name, suffixing overflow parts"""
+    suffix = f"_{part}" if part > 1 else ""
+    title = re.sub(r'[\[\]:*?/\\]', '_', str(name))
+    return title[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix
+
+
+def write_streaming_report(output_path: Union[str, Path],
+                           sheets: Dict[str, SheetSource],
+                           companion_format: Optional[str] = REPORT_COMPANION_FORMAT,
+                           chunk_rows: int = REPORT_CHUNK_ROWS,
+                           cancel_check: Optional[Callable[[], None]] = None,
+                           on_file: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Write a multi-sheet Excel report using xlsxwriter's constant_memory mode
+
+    Rows are flushed to disk as they are written, so memory use depends on
+    chunk_rows rather than on report size. Sheets that exceed Excel's row
+    limit continue on "<name>_2", "<name>_3", and so on.
+
+    Args:
+        output_path: Destination .xlsx path
+        sheets: Mapping of sheet name to a DataFrame, an iterable of DataFrame
+            chunks, or a (columns, rows) tuple where rows is any iterable
+        companion_format: 'csv', 'parquet' or None for Excel only
+        chunk_rows: Number of rows buffered per batch
+        cancel_check: Called before each batch; may raise to abort the write
+        on_file: Called with each (temporary) file path before it is created
+
+    Returns:
+        Dictionary with output path, row counts per sheet and companion files
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    # Everything is written under hidden temporary names and renamed once complete,
+    # so a failed or cancelled run never replaces (or deletes) a previous good report
+    token = uuid.uuid4().hex[:12]
+    staged: List[Tuple[Path, Path]] = []
+
+    def stage(final_path: Path) -> Path:
+        temp_path = final_path.with_name(f".{token}.{final_path.name}")
+        staged.append((temp_path, final_path))
+        if on_file is not None:
+            on_file(str(temp_path))
+        return temp_path
+
+    workbook = xlsxwriter.Workbook(str(stage(output_path)), {
+        'constant_memory': True,
+        'nan_inf_to_errors': True,
+        'remove_timezone': True,
+        'default_date_format': 'yyyy-mm-dd',
+    })
+    header_format = workbook.add_format({'bold': True})
+
+    row_counts = {}
+    companions = []
+    try:
+        for sheet_name, source in sheets.items():
+            columns, batches = _normalize_source(source, chunk_rows)
+
+            companion = None
+            if companion_format:
+                safe_name = re.sub(r'[^\w\-]+', '_', str(sheet_name))
+                companion_path = output_path.with_name(f"{output_path.stem}__{safe_name}.{companion_format}")
+                companion = _CompanionWriter(companion_format, stage(companion_path), columns)
+                companions.append(str(companion_path))
+
+            part = 1
+            worksheet = workbook.add_worksheet(_sheet_title(sheet_name, part))
+            worksheet.write_row(0, 0, columns, header_format)
+            row = 1
+            total = 0
+            try:
+                for batch in batches:
+                    if cancel_check is not None:
+                        cancel_check()
+                    if companion is not None:
+                        companion.write(batch)
+                    for values in batch:
+                        if row >= EXCEL_MAX_ROWS:
+                            part += 1
+                            worksheet = workbook.add_worksheet(_sheet_title(sheet_name, part))
+                            worksheet.write_row(0, 0, columns, header_format)
+                            row = 1
+                        worksheet.write_row(row, 0, values)
+                        row += 1
+                    total += len(batch)
+            finally:
+                if companion is not None:
+                    companion.close()
+
+            row_counts[sheet_name] = total
+        workbook.close()
+    except BaseException:
+        try:
+            workbook.close()
+        except Exception:
+            pass
+        for temp_path, _ in staged:
+            temp_path.unlink(missing_ok=True)
+        raise
+
+    # Companions first, so a report is never visible before its companions
+    for temp_path, final_path in staged[1:] + staged[:1]:
+        os.replace(temp_path, final_path)
+
+    return {
+        'output_path': str(output_path),
+        'rows': row_counts,
+        'companions': companions
+    }
+
+
+def _run_report_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the sheets for one report spec and write it (runs in a worker)"""
+    builder: Callable[..., Dict[str, SheetSource]] = spec['builder']
+    sheets = builder(*spec.get('args', ()), **spec.get('kwargs', {}))
+    return write_streaming_report(
+        spec['output_path'],
+        sheets,
+        companion_format=spec.get('companion_format', REPORT_COMPANION_FORMAT),
+        chunk_rows=spec.get('chunk_rows', REPORT_CHUNK_ROWS)
+    )
+
+
+def write_reports_parallel(specs: List[Dict[str, Any]], max_workers: int = MAX_WORKERS) -> List[Dict[str, Any]]:
+    """
+    Generate independent reports in parallel worker processes
+
+    Each spec is a dictionary with 'output_path' and a module-level 'builder'
+    callable (plus optional 'args'/'kwargs') returning the sheets mapping for
+    write_streaming_report. Builders run inside the worker, so row iterators
+    never cross process boundaries. Sheets of one workbook share a single
+    writer; split them into separate specs to generate them in parallel.
+
+    Args:
+        specs: List of report specifications
+        max_workers: Maximum number of worker processes
+
+    Returns:
+        List of write results in the same order as specs
+    """
+    if not specs:
+        return []
+
+    workers = max(1, min(max_workers, len(specs)))
+    if workers == 1:
+        return [_run_report_spec(spec) for spec in specs]
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(specs)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_run_report_spec, spec): i for i, spec in enumerate(specs)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+
+    return results
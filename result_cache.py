@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Result Cache Module
+Analytics results cached until the input files or settings they depend on change
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+import catalog
+import dashboard_config
+from dashboard_config import (RESULT_CACHE_DISK_BYTES, RESULT_CACHE_DISK_DIR, RESULT_CACHE_EVICTION_SAMPLE,
+                              RESULT_CACHE_MEMORY_BYTES)
+
+logger = logging.getLogger(__name__)
+
+# Disk tier size is enforced every this many writes
+DISK_TRIM_EVERY = 16
+
+
+def config_value(name: str) -> Any:
+    """Current value of a dashboard setting (follows dashboard_config.update_config)"""
+    return getattr(dashboard_config, name)
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate in-memory size of a cached value in bytes"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def _file_state(path: str) -> list:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _file_changed(path: str, state: list) -> bool:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return True
+    return [stat.st_size, stat.st_mtime_ns] != state
+
+
+def capture_dependencies(files: Iterable[Any] = (), config: Iterable[str] = ()) -> Dict[str, Dict[str, Any]]:
+    """
+    Record the current version of a result's inputs
+
+    Args:
+        files: Input file paths (or catalog file dictionaries)
+        config: Names of dashboard settings the result depends on
+
+    Returns:
+        Dictionary of file states (size, mtime in ns) and setting values
+    """
+    paths = [str(f['path'] if isinstance(f, dict) else f) for f in files]
+    return {
+        'files': {path: _file_state(path) for path in paths},
+        'config': {name: repr(config_value(name)) for name in config}
+    }
+
+
+def is_current(dependencies: Dict[str, Dict[str, Any]]) -> bool:
+    """
+    Check whether recorded dependencies still match the files and settings
+
+    Any change of a file's size or nanosecond mtime invalidates: the
+    catalog fingerprint only samples the ends of a file, so it cannot tell
+    an edit in the middle from a touch. A touched file costs one
+    recomputation; a stale result is never served.
+    """
+    for name, value in dependencies['config'].items():
+        if repr(getattr(dashboard_config, name, None)) != value:
+            return False
+    return not any(_file_changed(path, state) for path, state in dependencies['files'].items())
+
+
+class ResultCache:
+    """
+    Two-tier cache of computed results with dependency-tracked invalidation
+
+    Each entry records the size and mtime of the input files and the values
+    of the settings it was computed from, and is dropped as soon as any of
+    them changes: eagerly when the catalog reports a file event, and on
+    lookup otherwise (files changed by other processes, updated settings). The
+    memory tier is bounded by a byte budget; when it is exceeded, the
+    cheapest entry to recompute per byte among the least recently used few
+    is evicted. The optional disk tier pickles entries into a directory
+    shared by every worker process.
+    """
+
+    def __init__(self, memory_bytes: int = RESULT_CACHE_MEMORY_BYTES, disk_dir: Optional[str] = RESULT_CACHE_DISK_DIR,
+                 disk_bytes: int = RESULT_CACHE_DISK_BYTES, eviction_sample: int = RESULT_CACHE_EVICTION_SAMPLE):
+        self.memory_bytes = memory_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_bytes = disk_bytes
+        self.eviction_sample = max(1, eviction_sample)
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._by_path: Dict[str, set] = {}
+        self._used = 0
+        self._disk_writes = 0
+        self.counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(namespace: str, params: Dict[str, Any]) -> str:
+        """Stable key for a namespace and its parameters"""
+        encoded = json.dumps(params, sort_keys=True, default=str)
+        return f"{namespace}-{hashlib.sha1(encoded.encode('utf-8')).hexdigest()}"
+
+    def get_or_compute(self, namespace: str, params: Dict[str, Any], compute: Callable[[], Any],
+                       files: Iterable[Any] = (), config: Iterable[str] = ()) -> Any:
+        """
+        Get a current cached result, computing and storing it on a miss
+
+        Cached values are shared between callers and must not be modified.
+
+        Args:
+            namespace: Result family, e.g. 'heatmap' (used for bulk invalidation)
+            params: JSON-serializable parameters identifying the result
+            compute: Produces the result
+            files: Input files the result is computed from
+            config: Names of dashboard settings the result depends on
+
+        Returns:
+            The cached or freshly computed result
+        """
+        key = self.make_key(namespace, params)
+        found, value = self._lookup(key)
+        if found:
+            return value
+
+        # Captured before computing, so a file changing mid-computation invalidates the result
+        dependencies = capture_dependencies(files, config)
+        started = time.perf_counter()
+        value = compute()
+        cost = time.perf_counter() - started
+        with self._lock:
+            self.counters['misses'] += 1
+        self._store(key, namespace, value, dependencies, cost)
+        return value
+
+    def _lookup(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            if is_current(entry['dependencies']):
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self.counters['hits'] += 1
+                return True, entry['value']
+            with self._lock:
+                self._drop(key)
+                self.counters['invalidations'] += 1
+
+        loaded = self._read_disk(key)
+        if loaded is not None:
+            with self._lock:
+                self.counters['disk_hits'] += 1
+            self._remember(key, loaded)
+            return True, loaded['value']
+        return False, None
+
+    def _store(self, key: str, namespace: str, value: Any, dependencies: Dict[str, Any], cost: float):
+        entry = {'namespace': namespace, 'value': value, 'dependencies': dependencies, 'cost': cost,
+                 'size': estimate_size(value)}
+        self._remember(key, entry)
+        if self.disk_dir is not None:
+            self._write_disk(key, entry)
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        if entry['size'] > self.memory_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = entry
+            self._used += entry['size']
+            for path in entry['dependencies']['files']:
+                self._by_path.setdefault(path, set()).add(key)
+            while self._used > self.memory_bytes:
+                self._evict_one()
+
+    def _evict_one(self):
+        """Among the least recently used few, evict the entry cheapest to recompute per byte"""
+        candidates = []
+        for key, entry in self._entries.items():
+            candidates.append((entry['cost'] / max(entry['size'], 1), key))
+            if len(candidates) == self.eviction_sample:
+                break
+        self._drop(min(candidates)[1])
+        self.counters['evictions'] += 1
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._used -= entry['size']
+        for path in entry['dependencies']['files']:
+            keys = self._by_path.get(path)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_path[path]
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.pkl"
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]):
+        """Write header (dependencies) and value as two pickles, so lookups can validate cheaply"""
+        path = self._disk_path(key)
+        temp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            with open(temp, 'wb') as handle:
+                header = {k: entry[k] for k in ('namespace', 'dependencies', 'cost', 'size')}
+                pickle.dump(header, handle, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(entry['value'], handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, path)
+        except Exception as e:
+            # Results that cannot be pickled simply stay in memory only
+            temp.unlink(missing_ok=True)
+            logger.debug(f"Result {key} not written to disk: {e}")
+            return
+        with self._lock:
+            self._disk_writes += 1
+            trim = self._disk_writes % DISK_TRIM_EVERY == 0
+        if trim:
+            self.trim_disk()
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as handle:
+                entry = pickle.load(handle)
+                if not is_current(entry['dependencies']):
+                    path.unlink(missing_ok=True)
+                    with self._lock:
+                        self.counters['invalidations'] += 1
+                    return None
+                entry['value'] = pickle.load(handle)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cached result {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        # The file's mtime orders the disk tier for trimming
+        os.utime(path, None)
+        return entry
+
+    def trim_disk(self):
+        """Delete the least recently used disk entries beyond the disk budget"""
+        if self.disk_dir is None or not self.disk_dir.exists():
+            return
+        files = []
+        for path in self.disk_dir.glob('*.pkl'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def on_catalog_event(self, event: str, area: str, path: str, row: Optional[Dict[str, Any]]):
+        """catalog.add_file_listener callback: drop results computed from an older version of the file"""
+        with self._lock:
+            for key in list(self._by_path.get(path, ())):
+                state = self._entries[key]['dependencies']['files'][path]
+                if event == 'remove' or _file_changed(path, state):
+                    self._drop(key)
+                    self.counters['invalidations'] += 1
+
+    def invalidate(self, namespace: Optional[str] = None) -> int:
+        """
+        Drop cached results explicitly
+
+        Args:
+            namespace: Only results of this namespace (None for everything)
+
+        Returns:
+            Number of memory entries dropped
+        """
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if namespace is None or e['namespace'] == namespace]
+            for key in keys:
+                self._drop(key)
+        if self.disk_dir is not None and self.disk_dir.exists():
+            for path in self.disk_dir.glob(f"{namespace}-*.pkl" if namespace else '*.pkl'):
+                path.unlink(missing_ok=True)
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, memory use and hit/miss counters"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'memory_bytes': self._used,
+                'memory_budget': self.memory_bytes,
+                'disk_dir': str(self.disk_dir) if self.disk_dir else None,
+                **self.counters
+            }
+
+
+_instance: Dict[str, Optional[ResultCache]] = {'cache': None}
+_instance_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Get the process-wide result cache, following catalog file events"""
+    with _instance_lock:
+        cache = _instance['cache']
+        if cache is None:
+            cache = ResultCache()
+            catalog.add_file_listener(cache.on_catalog_event)
+            _instance['cache'] = cache
+        return cache
+
+
+def cached_result(namespace: str, params: Dict[str, Any], compute: Callable[[], Any],
+                  files: Iterable[Any] = (), config: Iterable[str] = ()) -> Any:
+    """Shortcut for get_result_cache().get_or_compute"""
+    return get_result_cache().get_or_compute(namespace, params, compute, files, config)
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Risk Analytics Module
+Vectorized VaR, CVaR, drawdown and Sharpe metrics across many symbols
+"""
+
+import warnings
+from contextlib import contextmanager
+from statistics import NormalDist
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from dashboard_config import RISK_CONFIDENCE_LEVEL, RISK_FREE_RATE, RISK_ROLLING_WINDOW, TRADING_DAYS_PER_YEAR
+
+
+def _as_matrix(returns: pd.DataFrame) -> np.ndarray:
+    """Return a float matrix (dates x symbols) with NaN for missing values"""
+    return returns.to_numpy(dtype=float, na_value=np.nan)
+
+
+@contextmanager
+def _quiet():
+    """Silence warnings from all-NaN symbols; they simply produce NaN metrics"""
+    with warnings.catch_warnings(), np.errstate(all='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        yield
+
+
+def _normal_tail(confidence: float):
+    """Standard normal quantile and density at the lower tail for a confidence level"""
+    z = NormalDist().inv_cdf(1.0 - confidence)
+    density = np.exp(-0.5 * z * z) / np.sqrt(2.0 * np.pi)
+    return z, density
+
+
+def historical_var(returns: pd.DataFrame, confidence: float = RISK_CONFIDENCE_LEVEL) -> pd.Series:
+    """
+    Historical Value at Risk per symbol
+
+    Args:
+        returns: Wide DataFrame of periodic returns (dates x symbols, decimals)
+        confidence: Confidence level, e.g. 0.95
+
+    Returns:
+        Series of VaR values reported as positive losses
+    """
+    values = _as_matrix(returns)
+    with _quiet():
+        quantile = np.nanquantile(values, 1.0 - confidence, axis=0)
+    return pd.Series(-quantile, index=returns.columns, name='VaR_Historical')
+
+
+def historical_cvar(returns: pd.DataFrame, confidence: float = RISK_CONFIDENCE_LEVEL) -> pd.Series:
+    """
+    Historical Conditional VaR (expected shortfall) per symbol
+
+    Args:
+        returns: Wide DataFrame of periodic returns (dates x symbols, decimals)
+        confidence: Confidence level, e.g. 0.95
+
+    Returns:
+        Series of CVaR values reported as positive losses
+    """
+    values = _as_matrix(returns)
+    with _quiet():
+        quantile = np.nanquantile(values, 1.0 - confidence, axis=0)
+        tail = values <= quantile
+        cvar = -np.where(tail, values, 0.0).sum(axis=0) / tail.sum(axis=0)
+    return pd.Series(cvar, index=returns.columns, name='CVaR_Historical')
+
+
+def parametric_var(returns: pd.DataFrame, confidence: float = RISK_CONFIDENCE_LEVEL) -> pd.Series:
+    """
+    Gaussian (variance-covariance) Value at Risk per symbol
+
+    Args:
+        returns: Wide DataFrame of periodic returns (dates x symbols, decimals)
+        confidence: Confidence level, e.g. 0.95
+
+    Returns:
+        Series of VaR values reported as positive losses
+    """
+    values = _as_matrix(returns)
+    z, _ = _normal_tail(confidence)
+    with _quiet():
+        var = -(np.nanmean(values, axis=0) + z * np.nanstd(values, axis=0, ddof=1))
+    return pd.Series(var, index=returns.columns, name='VaR_Parametric')
+
+
+def parametric_cvar(returns: pd.DataFrame, confidence: float = RISK_CONFIDENCE_LEVEL) -> pd.Series:
+    """
+    Gaussian Conditional VaR per symbol
+
+    Args:
+        returns: Wide DataFrame of periodic returns (dates x symbols, decimals)
+        confidence: Confidence level, e.g. 0.95
+
+    Returns:
+        Series of CVaR values reported as positive losses
+    """
+    values = _as_matrix(returns)
+    _, density = _normal_tail(confidence)
+    with _quiet():
+        cvar = -(np.nanmean(values, axis=0) - np.nanstd(values, axis=0, ddof=1) * density / (1.0 - confidence))
+    return pd.Series(cvar, index=returns.columns, name='CVaR_Parametric')
+
+
+def drawdown_series(returns: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drawdown from the running peak for every symbol and date
+
+    Missing returns are treated as flat periods.
+
+    Args:
+        returns: Wide DataFrame of periodic returns (dates x symbols, decimals)
+
+    Returns:
+        DataFrame of drawdowns (0 at a new high, negative below it)
+    """
+    wealth = np.cumprod(1.0 + np.nan_to_num(_as_matrix(returns)), axis=0)
+    peak = np.maximum.accumulate(wealth, axis=0)
+    return pd.DataFrame(wealth / peak - 1.0, index=returns.index, columns=returns.columns)
+
+
+def max_drawdown(returns: pd.DataFrame) -> pd.Series:
+    """
+    Maximum drawdown per symbol
+
+    Args:
+        returns: Wide DataFrame of periodic returns (dates x symbols, decimals)
+
+    Returns:
+        Series of maximum drawdowns reported as positive fractions
+    """
+    if returns.empty:
+        return pd.Series(0.0, index=returns.columns, name='Max_Drawdown')
+    return (-drawdown_series(returns).min()).rename('Max_Drawdown')
+
+
+def _rolling_moments(values: np.ndarray, window: int):
+    """
+    Rolling count, mean and sample std via prefix sums
+
+    Each output row costs O(1) per symbol regardless of window length.
+    Columns are centred first to limit cancellation in the prefix sums.
+    """
+    mask = np.isfinite(values)
+    with _quiet():
+        offset = np.nan_to_num(np.nanmean(values, axis=0)) if values.size else 0.0
+    centred = np.where(mask, values - offset, 0.0)
+
+    # Window sum at row t is prefix[t + 1] - prefix[t + 1 - window]
+    start = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+
+    def window_sum(matrix):
+        prefix = np.vstack([np.zeros((1, matrix.shape[1])), np.cumsum(matrix, axis=0)])
+        return prefix[1:] - prefix[start]
+
+    count = window_sum(mask.astype(float))
+    total = window_sum(centred)
+    squares = window_sum(centred * centred)
+
+    with _quiet():
+        mean = total / count
+        variance = (squares - total * mean) / (count - 1)
+    std = np.sqrt(np.maximum(variance, 0.0))
+    return count, mean + offset, std
+
+
+def rolling_sharpe(returns: pd.DataFrame, window: int = RISK_ROLLING_WINDOW,
+                   risk_free_rate: float = RISK_FREE_RATE,
+                   periods_per_year: int = TRADING_DAYS_PER_YEAR) -> pd.DataFrame:
+    """
+    Annualised rolling Sharpe ratio for every symbol
+
+    Args:
+        returns: Wide DataFrame of periodic returns (dates x symbols, decimals)
+        window: Observations per rolling window
+        risk_free_rate: Annual risk-free rate
+        periods_per_year: Periods per year used to annualise
+
+    Returns:
+        DataFrame of Sharpe ratios (NaN until a window has two observations)
+    """
+    count, mean, std = _rolling_moments(_as_matrix(returns), window)
+    with _quiet():
+        sharpe = (mean - risk_free_rate / periods_per_year) / std * np.sqrt(periods_per_year)
+    sharpe[count < 2] = np.nan
+    return pd.DataFrame(sharpe, index=returns.index, columns=returns.columns)
+
+
+def compute_risk_report(returns: pd.DataFrame, confidence: float = RISK_CONFIDENCE_LEVEL,
+                        window: int = RISK_ROLLING_WINDOW) -> pd.DataFrame:
+    """
+    Compute the full risk summary for every symbol in one vectorized pass
+
+    Args:
+        returns: Wide DataFrame of periodic returns (dates x symbols, decimals)
+        confidence: VaR/CVaR confidence level
+        window: Rolling window for the Sharpe ratio
+
+    Returns:
+        DataFrame indexed by symbol with VaR, CVaR, volatility, drawdown and Sharpe columns
+    """
+    values = _as_matrix(returns)
+    with _quiet():
+        volatility = np.nanstd(values, axis=0, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    sharpe = rolling_sharpe(returns, window)
+    report = pd.concat([
+        historical_var(returns, confidence),
+        historical_cvar(returns, confidence),
+        parametric_var(returns, confidence),
+        parametric_cvar(returns, confidence),
+        max_drawdown(returns),
+        pd.Series(volatility, index=returns.columns, name='Volatility'),
+        (sharpe.iloc[-1] if len(sharpe) else pd.Series(np.nan, index=returns.columns)).rename('Rolling_Sharpe')
+    ], axis=1)
+    report.index.name = 'Symbol'
+    return report
+
+
+class RollingRiskState:
+    """
+    Streaming risk state updated in O(1) per symbol for each new observation
+
+    Keeps a ring buffer of the last `window` returns with running sums for the
+    rolling mean/volatility, plus running wealth and peak for drawdowns. The
+    running sums are rebuilt from the buffer once per full window to stop
+    floating point drift, which keeps the amortized cost constant.
+    """
+
+    def __init__(self, symbols: List[str], window: int = RISK_ROLLING_WINDOW):
+        self.symbols = list(symbols)
+        self.window = max(2, int(window))
+        size = len(self.symbols)
+
+        self.buffer = np.full((self.window, size), np.nan)
+        self.position = 0
+        self.observations = 0
+        self.count = np.zeros(size)
+        self.total = np.zeros(size)
+        self.squares = np.zeros(size)
+        self.wealth = np.ones(size)
+        self.peak = np.ones(size)
+        self.max_drawdown = np.zeros(size)
+
+    @classmethod
+    def from_frame(cls, returns: pd.DataFrame, window: int = RISK_ROLLING_WINDOW) -> 'RollingRiskState':
+        """
+        Build a state from history (equivalent to updating row by row)
+
+        Args:
+            returns: Wide DataFrame of periodic returns (dates x symbols, decimals)
+            window: Observations per rolling window
+
+        Returns:
+            Populated RollingRiskState
+        """
+        state = cls(list(returns.columns), window)
+        values = _as_matrix(returns)
+        if len(values):
+            wealth = np.cumprod(1.0 + np.nan_to_num(values), axis=0)
+            peak = np.maximum.accumulate(wealth, axis=0)
+            state.wealth = wealth[-1]
+            state.peak = peak[-1]
+            state.max_drawdown = (1.0 - wealth / peak).max(axis=0)
+
+            tail = values[-state.window:]
+            state.buffer[:len(tail)] = tail
+            state.position = len(tail) % state.window
+            state.observations = len(values)
+            state._rebuild()
+        return state
+
+    def _rebuild(self):
+        """Recompute the running sums exactly from the ring buffer"""
+        mask = np.isfinite(self.buffer)
+        filled = np.where(mask, self.buffer, 0.0)
+        self.count = mask.sum(axis=0).astype(float)
+        self.total = filled.sum(axis=0)
+        self.squares = (filled * filled).sum(axis=0)
+
+    def update(self, row: pd.Series):
+        """
+        Add one observation per symbol
+
+        Args:
+            row: Returns for the new period, indexed by symbol (missing = NaN)
+        """
+        values = pd.Series(row, dtype=float).reindex(self.symbols).to_numpy(dtype=float, na_value=np.nan)
+        new_mask = np.isfinite(values)
+        new_values = np.where(new_mask, values, 0.0)
+
+        old = self.buffer[self.position]
+        old_mask = np.isfinite(old)
+        old_values = np.where(old_mask, old, 0.0)
+
+        self.count += new_mask.astype(float) - old_mask.astype(float)
+        self.total += new_values - old_values
+        self.squares += new_values * new_values - old_values * old_values
+        self.buffer[self.position] = values
+        self.position = (self.position + 1) % self.window
+        self.observations += 1
+        if self.position == 0:
+            self._rebuild()
+
+        self.wealth *= 1.0 + new_values
+        np.maximum(self.peak, self.wealth, out=self.peak)
+        np.maximum(self.max_drawdown, 1.0 - self.wealth / self.peak, out=self.max_drawdown)
+
+    def snapshot(self, confidence: float = RISK_CONFIDENCE_LEVEL,
+                 risk_free_rate: float = RISK_FREE_RATE) -> pd.DataFrame:
+        """
+        Current rolling risk metrics for every symbol
+
+        Args:
+            confidence: Parametric VaR/CVaR confidence level
+            risk_free_rate: Annual risk-free rate for the Sharpe ratio
+
+        Returns:
+            DataFrame indexed by symbol
+        """
+        z, density = _normal_tail(confidence)
+        with _quiet():
+            mean = self.total / self.count
+            std = np.sqrt(np.maximum((self.squares - self.total * mean) / (self.count - 1), 0.0))
+            sharpe = (mean - risk_free_rate / TRADING_DAYS_PER_YEAR) / std * np.sqrt(TRADING_DAYS_PER_YEAR)
+        sharpe[self.count < 2] = np.nan
+
+        report = pd.DataFrame({
+            'VaR_Parametric': -(mean + z * std),
+            'CVaR_Parametric': -(mean - std * density / (1.0 - confidence)),
+            'Volatility': std * np.sqrt(TRADING_DAYS_PER_YEAR),
+            'Current_Drawdown': 1.0 - self.wealth / self.peak,
+            'Max_Drawdown': self.max_drawdown,
+            'Rolling_Sharpe': sharpe
+        }, index=pd.Index(self.symbols, name='Symbol'))
+        return report
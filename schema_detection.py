@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Schema Detection Module
+Header-fingerprint workbook routing to specialized processors
+"""
+
+import hashlib
+import logging
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+import catalog
+from dataframe_engine import get_engine
+from monte_carlo import parse_horizon
+
+logger = logging.getLogger(__name__)
+
+GENERIC_SCHEMA = 'generic'
+SCHEMA_CACHE_SIZE = 256  # In-process decisions kept per worker
+
+SheetProcessor = Callable[[Dict[str, pd.DataFrame]], Dict[str, pd.DataFrame]]
+
+_registry: Dict[str, Dict[str, Any]] = OrderedDict()
+_header_cache: Dict[str, Optional[str]] = {}
+_decision_cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+
+
+def _normalize(column: Any) -> str:
+    return str(column).strip().lower() if column is not None else ''
+
+
+def header_fingerprint(columns: Sequence[Any]) -> str:
+    """
+    Fingerprint a header row independently of column order and case
+
+    Args:
+        columns: Header cell values
+
+    Returns:
+        Hex digest
+    """
+    names = sorted(name for name in map(_normalize, columns) if name)
+    return hashlib.sha1('\x1f'.join(names).encode('utf-8')).hexdigest()
+
+
+def register_schema(name: str, required_columns: Sequence[str], processor: SheetProcessor,
+                    optional_columns: Sequence[str] = (), key_columns: Sequence[str] = ()):
+    """
+    Register a known sheet layout and the processor for workbooks using it
+
+    Args:
+        name: Schema name
+        required_columns: Header columns a sheet must contain to match
+        processor: Function mapping the matching sheets to report sheets
+        optional_columns: Further columns read when present
+        key_columns: Columns identifying a row; a key already present in an
+            earlier sheet is not counted again from a later one
+    """
+    _registry[name] = {
+        'name': name,
+        'required': frozenset(_normalize(c) for c in required_columns),
+        'columns': {_normalize(c): c for c in list(required_columns) + list(optional_columns)},
+        'keys': list(key_columns),
+        'processor': processor
+    }
+    _header_cache.clear()
+
+
+def get_processor(schema: str) -> SheetProcessor:
+    """Get the processor for a schema; unknown schemas use the generic processor"""
+    entry = _registry.get(schema)
+    return entry['processor'] if entry else process_generic_sheets
+
+
+def read_headers(path: Path) -> Dict[str, List[Any]]:
+    """
+    Read only the first row of every sheet
+
+    .xlsx files are opened in openpyxl's read-only (streaming) mode and .xls
+    files with xlrd's on-demand loading, so no sheet body is parsed.
+
+    Args:
+        path: Workbook path
+
+    Returns:
+        Mapping of sheet name to header cell values, in workbook order
+    """
+    path = Path(path)
+    headers = OrderedDict()
+    if path.suffix.lower() == '.xls':
+        import xlrd
+
+        book = xlrd.open_workbook(str(path), on_demand=True)
+        try:
+            for name in book.sheet_names():
+                sheet = book.sheet_by_name(name)
+                headers[name] = sheet.row_values(0) if sheet.nrows else []
+                book.unload_sheet(name)
+        finally:
+            book.release_resources()
+        return headers
+
+    from openpyxl import load_workbook
+
+    book = load_workbook(str(path), read_only=True, data_only=True)
+    try:
+        for sheet in book.worksheets:
+            first = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+            headers[sheet.title] = list(first)
+    finally:
+        book.close()
+    return headers
+
+
+def match_header(columns: Sequence[Any]) -> Optional[str]:
+    """
+    Match a header row against the registry
+
+    The most specific layout (most required columns) whose columns are all
+    present wins. Results are memoised by header fingerprint.
+
+    Args:
+        columns: Header cell values
+
+    Returns:
+        Schema name, or None if no layout matches
+    """
+    key = header_fingerprint(columns)
+    if key in _header_cache:
+        return _header_cache[key]
+
+    present = set(map(_normalize, columns))
+    best = None
+    for entry in _registry.values():
+        if entry['required'] <= present and (best is None or len(entry['required']) > len(best['required'])):
+            best = entry
+    _header_cache[key] = best['name'] if best else None
+    return _header_cache[key]
+
+
+def detect_schema(path: Path, fingerprint: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Decide which processor handles a workbook
+
+    Decisions are cached by file fingerprint, in process and in the catalog,
+    so each file version has its headers read at most once.
+
+    Args:
+        path: Workbook path
+        fingerprint: File fingerprint, computed if not given
+
+    Returns:
+        Dictionary with 'schema' (the workbook's schema) and 'sheets'
+        (sheet name to matched schema or None)
+    """
+    fingerprint = fingerprint or catalog.file_fingerprint(Path(path))
+    decision = _decision_cache.get(fingerprint)
+    if decision is None:
+        decision = catalog.get_schema_decision(fingerprint)
+    if decision is None:
+        sheets = OrderedDict((name, match_header(columns)) for name, columns in read_headers(path).items())
+        counts = Counter(schema for schema in sheets.values() if schema)
+        # Counter keeps first-seen order, so ties go to the earliest sheet
+        schema = counts.most_common(1)[0][0] if counts else GENERIC_SCHEMA
+        decision = {'schema': schema, 'sheets': dict(sheets)}
+        catalog.record_schema_decision(fingerprint, schema, decision['sheets'])
+        logger.info(f"Detected {schema} schema for {Path(path).name}")
+
+    _decision_cache[fingerprint] = decision
+    _decision_cache.move_to_end(fingerprint)
+    while len(_decision_cache) > SCHEMA_CACHE_SIZE:
+        _decision_cache.popitem(last=False)
+    return dict(decision, fingerprint=fingerprint)
+
+
+def sheets_to_load(decision: Dict[str, Any]) -> Optional[List[str]]:
+    """
+    Sheets a processor needs parsed
+
+    Args:
+        decision: Result of detect_schema
+
+    Returns:
+        Sheet names matching the workbook schema, or None for every sheet
+    """
+    if decision['schema'] == GENERIC_SCHEMA:
+        return None
+    return [name for name, schema in decision['sheets'].items() if schema == decision['schema']]
+
+
+def canonical_columns(sheets: Dict[str, pd.DataFrame], decision: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
+    """
+    Rename a workbook's schema columns to their registered spelling
+
+    Headers match a layout regardless of case and surrounding spaces, but
+    processors select columns by their registered names, so 'forecast_return'
+    must become 'Forecast_Return' before any of them runs.
+
+    Args:
+        sheets: Parsed sheets
+        decision: Result of detect_schema for the workbook
+
+    Returns:
+        Sheets with the schema sheets' columns renamed
+    """
+    entry = _registry.get(decision['schema'])
+    if entry is None:
+        return sheets
+    canonical = entry['columns']
+    renamed = OrderedDict()
+    for name, frame in sheets.items():
+        mapping = {}
+        if decision['sheets'].get(name) == decision['schema']:
+            mapping = {column: canonical[_normalize(column)] for column in frame.columns
+                       if canonical.get(_normalize(column), column) != column}
+        renamed[name] = frame.rename(columns=mapping) if mapping else frame
+    return renamed
+
+
+def horizon_order(periods) -> List[Any]:
+    """Sort Time_Period labels by horizon length; unparseable labels go last"""
+    def horizon(label):
+        try:
+            return parse_horizon(label)
+        except ValueError:
+            return float('inf')
+
+    return sorted(periods, key=horizon)
+
+
+def combine_sheets(sheets: Dict[str, pd.DataFrame], schema: Optional[str] = None) -> pd.DataFrame:
+    """
+    Stack the non-empty sheets of one layout into a single frame
+
+    Workbooks often carry filtered views of their main sheet (e.g. a
+    High_Risk sheet repeating some forecast rows). With a schema given, a
+    row whose key columns already appear in an earlier sheet is dropped, so
+    every key is counted from the first sheet holding it; repeated keys
+    within one sheet are kept.
+
+    Args:
+        sheets: Sheets matching one layout, in workbook order
+        schema: Schema whose key columns identify a row (None to keep every row)
+
+    Returns:
+        Combined rows
+    """
+    frames = [frame for frame in sheets.values() if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    keys = _registry[schema]['keys'] if schema in _registry else []
+    if len(frames) < 2 or not keys or any(k not in frame.columns for frame in frames for k in keys):
+        return pd.concat(frames, ignore_index=True)
+
+    data = pd.concat(frames, keys=range(len(frames)), names=['_sheet', None]).reset_index(level=0)
+    first = data.groupby(keys, dropna=False, sort=False)['_sheet'].transform('min')
+    return data[data['_sheet'] == first].drop(columns='_sheet').reset_index(drop=True)
+
+
+def process_generic_sheets(sheets: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Generic workbooks get no extra analysis beyond the summary statistics"""
+    return {}
+
+
+def process_forecast_sheets(sheets: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Forecast workbooks: Asset x Time_Period return matrix and per-asset means
+
+    Args:
+        sheets: Sheets matching the forecast layout
+
+    Returns:
+        Report sheets
+    """
+    data = combine_sheets(sheets, 'forecast')
+    engine = get_engine()
+    matrix = engine.pivot(data, 'Asset', 'Time_Period', 'Forecast_Return')
+
+    periods = horizon_order(c for c in matrix.columns if c != 'Asset')
+    matrix = matrix[['Asset'] + periods]
+
+    measures = [c for c in ('Forecast_Return', 'Confidence', 'Volatility', 'Risk_Score') if c in data.columns]
+    by_asset = engine.group_aggregate(data, 'Asset', {m: 'mean' for m in measures}).round(4)
+    return {'Forecast_Matrix': matrix, 'Asset_Summary': by_asset}
+
+
+def process_macro_sheets(sheets: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Macro workbooks: Indicator x Region matrix of current values and changes
+
+    Args:
+        sheets: Sheets matching the macro layout
+
+    Returns:
+        Report sheets
+    """
+    data = combine_sheets(sheets, 'macro')
+    matrix = get_engine().pivot(data, 'Indicator', 'Region', 'Current_Value')
+
+    report = {'Indicator_Matrix': matrix}
+    if 'Previous_Value' in data.columns:
+        changes = data[['Indicator', 'Region', 'Current_Value', 'Previous_Value']].copy()
+        changes['Change'] = changes['Current_Value'] - changes['Previous_Value']
+        previous = changes['Previous_Value'].where(changes['Previous_Value'] != 0)
+        changes['Change_Pct'] = (changes['Change'] / previous.abs() * 100).round(2)
+        report['Indicator_Changes'] = changes
+    return report
+
+
+def process_top30_sheets(sheets: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Top performer workbooks: per-horizon return ranks and sector averages
+
+    Args:
+        sheets: Sheets matching the top30 layout
+
+    Returns:
+        Report sheets
+    """
+    data = combine_sheets(sheets, 'top30')
+    returns = [c for c in data.columns if str(c).startswith('Return_')]
+    ranks = data[['Symbol'] + returns].copy()
+    for column in returns:
+        ranks[f"{column}_Rank"] = data[column].rank(ascending=False, method='min')
+
+    report = {'Return_Ranks': ranks}
+    if 'Sector' in data.columns:
+        report['Sector_Returns'] = get_engine().group_aggregate(data, 'Sector', {r: 'mean' for r in returns}).round(2)
+    return report
+
+
+register_schema('forecast', ['Asset', 'Time_Period', 'Forecast_Return'], process_forecast_sheets,
+                ['Confidence', 'Volatility', 'Risk_Score'], ['Asset', 'Time_Period'])
+register_schema('macro', ['Indicator', 'Region', 'Current_Value'], process_macro_sheets,
+                ['Previous_Value', 'Forecast', 'Date'], ['Indicator', 'Region'])
+register_schema('top30', ['Symbol', 'Return_1D', 'Return_1W', 'Return_1M', 'Return_3M', 'Return_1Y'],
+                process_top30_sheets, ['Sector'], ['Symbol'])
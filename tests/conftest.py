@@ -0,0 +1,26 @@
+"""Shared fixtures: every test runs in its own working directory"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Fresh Input/Output tree as the working directory, with per-thread database connections reset"""
+    import backtest
+    import catalog
+    import macro_history
+
+    for name in ('Input', 'Output/spreadsheets', 'Output/heatmaps', 'Output/charts', 'Output/summaries'):
+        (tmp_path / name).mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+    for module in (backtest, catalog, macro_history):
+        module._reset_after_fork()
+    catalog._last_reconcile['at'] = 0.0
+    yield tmp_path
+    for module in (backtest, catalog, macro_history):
+        module._reset_after_fork()
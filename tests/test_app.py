@@ -0,0 +1,35 @@
+"""API argument validation"""
+
+import logging
+
+import pytest
+
+import logging_config
+
+
+@pytest.fixture
+def client(workdir):
+    import app
+
+    yield app.app.test_client()
+    logging_config.shutdown_logging()
+    logging_config._state['config'] = None
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+
+@pytest.mark.parametrize('query', ['limit=abc', 'limit=10&offset=x', 'limit=-1', 'limit=5&offset=-2'])
+def test_bad_listing_paging_is_a_client_error(client, query):
+    response = client.get(f'/api/files?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+
+
+def test_listing_paging(client, workdir):
+    for day in ('01', '02', '03'):
+        (workdir / 'Input' / f'Package_Alpha_2024_01_{day}.xlsx').write_bytes(b'data')
+    response = client.get('/api/files?limit=2&offset=1&sort=name&order=asc')
+    assert response.status_code == 200
+    assert [f['name'] for f in response.get_json()['input_files']] == ['Package_Alpha_2024_01_02.xlsx',
+                                                                        'Package_Alpha_2024_01_03.xlsx']
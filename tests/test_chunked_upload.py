@@ -0,0 +1,44 @@
+"""Chunked uploads land in the input directory"""
+
+import errno
+import hashlib
+import io
+import os
+
+import catalog
+import chunked_upload
+
+
+def _upload(data, filename='Package_Alpha_2024_01_02.xlsx'):
+    status = chunked_upload.init_upload(filename, len(data), hashlib.sha256(data).hexdigest())
+    chunked_upload.write_chunk(status['upload_id'], 0, io.BytesIO(data), len(data),
+                               hashlib.sha256(data).hexdigest())
+    return status['upload_id']
+
+
+def test_sessions_live_in_a_hidden_input_directory(workdir):
+    upload_id = _upload(b'workbook')
+    assert (workdir / 'Input' / '.uploads' / f'{upload_id}.part').exists()
+    # Partial uploads are never catalogued as inputs
+    catalog.reconcile(force=True)
+    assert catalog.query_files('input') == []
+
+    destination = chunked_upload.finalize_upload(upload_id)
+    assert destination.read_bytes() == b'workbook'
+    assert sorted(p.name for p in (workdir / 'Input' / '.uploads').iterdir()) == []
+
+
+def test_finalize_copies_across_filesystems(workdir, monkeypatch):
+    upload_id = _upload(b'workbook')
+    replace = os.replace
+
+    def cross_device(source, destination):
+        if str(source).endswith('.part'):
+            raise OSError(errno.EXDEV, 'Invalid cross-device link')
+        replace(source, destination)
+
+    monkeypatch.setattr(os, 'replace', cross_device)
+    destination = chunked_upload.finalize_upload(upload_id)
+    assert destination.read_bytes() == b'workbook'
+    assert sorted(p.name for p in (workdir / 'Input').iterdir()) == ['.uploads', destination.name]
+    assert list((workdir / 'Input' / '.uploads').iterdir()) == []
@@ -0,0 +1,63 @@
+"""Blocked pairwise statistics match pandas and extend by one row without a rescan"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlation import (CorrelationEngine, clear_correlation_cache, dataset_version, get_correlation,
+                         update_correlation)
+
+
+def _returns(rows=120, seed=5):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0, 0.01, (rows, 7))
+    values[:, 1] += values[:, 0]
+    # Ragged histories and scattered gaps make every pair overlap differently
+    values[rng.random(values.shape) < 0.15] = np.nan
+    values[:40, 3] = np.nan
+    values[:, 6] = np.nan
+    values[[0, 1, 2], 6] = [0.01, 0.02, -0.01]
+    dates = pd.date_range('2024-01-01', periods=rows, freq='B')
+    return pd.DataFrame(values, index=dates, columns=[f"A{i}" for i in range(7)])
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_correlation_cache()
+    yield
+    clear_correlation_cache()
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 256])
+def test_matches_pandas_with_missing_values(block_size):
+    returns = _returns()
+    engine = CorrelationEngine.from_frame(returns, block_size=block_size, min_periods=5)
+    np.testing.assert_allclose(engine.correlation(), returns.corr(min_periods=5).to_numpy(), atol=1e-10)
+    np.testing.assert_allclose(engine.covariance(), returns.cov(min_periods=5).to_numpy(), atol=1e-14)
+    np.testing.assert_array_equal(engine.count, returns.notna().astype(int).T @ returns.notna().astype(int))
+
+
+def test_one_row_update_matches_full_rebuild():
+    returns = _returns()
+    history, new_row = returns.iloc[:-1], returns.iloc[-1]
+    base = get_correlation(history)
+
+    updated = update_correlation(base['version'], new_row, dataset_version(returns))
+    rebuilt = CorrelationEngine.from_frame(returns).result()
+    assert updated['rows'] == len(returns)
+    for key in ('correlation', 'covariance'):
+        pd.testing.assert_frame_equal(updated[key], rebuilt[key], atol=1e-12, rtol=0)
+    pd.testing.assert_frame_equal(updated['correlation'], returns.corr(), atol=1e-10, rtol=0, check_names=False,
+                                  check_freq=False)
+
+    # The extended version is served from the cache; the old one was moved
+    assert get_correlation(returns, dataset_version(returns))['rows'] == len(returns)
+    assert update_correlation(base['version'], new_row, 'other') is None
+
+
+def test_row_with_unknown_and_missing_assets():
+    returns = _returns().iloc[:30, :3]
+    engine = CorrelationEngine.from_frame(returns)
+    engine.add_row(pd.Series({'A0': 0.02, 'A2': -0.01, 'ZZZ': 5.0}))
+    extended = pd.concat([returns, pd.DataFrame([{'A0': 0.02, 'A2': -0.01}])], ignore_index=True)
+    np.testing.assert_allclose(engine.correlation(), extended.corr().to_numpy(), atol=1e-10)
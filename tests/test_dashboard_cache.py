@@ -0,0 +1,64 @@
+"""Dashboard versions follow changes from other processes; fragment ETags follow content"""
+
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+import catalog
+import dashboard_cache
+from dashboard_cache import FragmentCache, get_dashboard_state
+
+
+@pytest.fixture
+def fresh_state(workdir, monkeypatch):
+    monkeypatch.setattr(dashboard_cache, '_instances', {'state': None, 'fragments': None})
+    monkeypatch.setattr(catalog, '_file_listeners', [])
+    return workdir
+
+
+def _record_output_in_child(name):
+    """A worker process writing and cataloguing an output file"""
+    catalog._reset_after_fork()
+    path = Path('Output/spreadsheets') / name
+    path.write_bytes(b'report')
+    catalog.record_file(path, area='output', subdir='spreadsheets')
+
+
+def _run_in_child(target, *args):
+    process = multiprocessing.get_context('fork').Process(target=target, args=args)
+    process.start()
+    process.join(30)
+    assert process.exitcode == 0
+
+
+def test_output_written_by_another_process_moves_the_version(fresh_state):
+    state = get_dashboard_state()
+    before = state.version('output')
+    assert state.summary()['total_output_files'] == 0
+
+    _run_in_child(_record_output_in_child, 'report.xlsx')
+    # The row is already current, so this process's reconcile sees nothing to do
+    assert catalog.reconcile(force=True) == {'added': 0, 'updated': 0, 'removed': 0}
+
+    state = get_dashboard_state()
+    assert state.version('output') > before
+    assert state.summary()['total_output_files'] == 1
+
+
+def test_own_changes_are_counted_once(fresh_state):
+    (fresh_state / 'Input' / 'PKG_2024-01-02.xlsx').write_bytes(b'data')
+    catalog.record_file(fresh_state / 'Input' / 'PKG_2024-01-02.xlsx')
+
+    state = get_dashboard_state()
+    state = get_dashboard_state()
+    assert state.summary()['total_input_files'] == 1
+
+
+def test_fragment_etag_changes_with_content_not_version():
+    # Two processes (or one restarted) at the same version number
+    first, second = FragmentCache(), FragmentCache()
+    html, etag = first.get_or_render('input_files', 1, lambda: '<p>a</p>')
+    assert second.get_or_render('input_files', 1, lambda: '<p>b</p>')[1] != etag
+    assert second.get_or_render('input_files', 2, lambda: '<p>a</p>')[1] == etag
+    assert first.get_or_render('input_files', 1, lambda: '<p>changed</p>') == (html, etag)
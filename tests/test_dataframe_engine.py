@@ -0,0 +1,93 @@
+"""Every installed engine computes the same results as pandas"""
+
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataframe_engine
+from dataframe_engine import ENGINES, get_engine
+
+
+@pytest.fixture(params=sorted(ENGINES))
+def engine(request):
+    try:
+        return get_engine(request.param)
+    except ImportError as e:
+        pytest.skip(str(e))
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(7)
+    forecasts = pd.DataFrame({
+        'symbol': np.array(['AAA', 'BBB', 'CCC', None], dtype=object)[rng.integers(0, 4, 200)],
+        'Time_Period': np.array(['1M', '3M', '1Y'])[rng.integers(0, 3, 200)],
+        'Forecast_Return': rng.normal(0, 1, 200).round(3),
+        'Confidence': rng.uniform(0, 1, 200).round(3)
+    })
+    reference = pd.DataFrame({'symbol': ['AAA', 'BBB', 'DDD'], 'sector': ['Tech', 'Energy', 'Health']})
+    return forecasts, reference
+
+
+def _same(result, expected):
+    def canonical(frame):
+        frame = frame[sorted(frame.columns, key=str)]
+        return frame.sort_values(list(frame.columns)).reset_index(drop=True)
+    pd.testing.assert_frame_equal(canonical(result), canonical(expected), check_dtype=False, check_exact=False)
+
+
+def test_filter_eq(engine, frames):
+    forecasts, _ = frames
+    _same(engine.filter_eq(forecasts, 'symbol', 'BBB'), get_engine('pandas').filter_eq(forecasts, 'symbol', 'BBB'))
+
+
+def test_partition_by(engine, frames):
+    forecasts, _ = frames
+    result = engine.partition_by(forecasts, 'symbol')
+    expected = get_engine('pandas').partition_by(forecasts, 'symbol')
+    assert list(result) == list(expected)
+    for key in expected:
+        _same(result[key], expected[key])
+
+
+@pytest.mark.parametrize('where', [None, {'Time_Period': '3M'}, {'Time_Period': '3M', 'symbol': 'AAA'}])
+def test_group_aggregate(engine, frames, where):
+    forecasts, _ = frames
+    aggregations = {'Forecast_Return': 'mean', 'Confidence': 'max'}
+    _same(engine.group_aggregate(forecasts, ['symbol', 'Time_Period'], aggregations, where),
+          get_engine('pandas').group_aggregate(forecasts, ['symbol', 'Time_Period'], aggregations, where))
+
+
+def test_where_matches_filtering_first(frames):
+    forecasts, _ = frames
+    pandas = get_engine('pandas')
+    _same(pandas.group_aggregate(forecasts, 'symbol', {'Confidence': 'min'}, where={'Time_Period': '1Y'}),
+          pandas.group_aggregate(forecasts[forecasts['Time_Period'] == '1Y'], 'symbol', {'Confidence': 'min'}))
+
+
+@pytest.mark.parametrize('how', ['inner', 'left', 'outer'])
+def test_join(engine, frames, how):
+    forecasts, reference = frames
+    forecasts = forecasts.dropna(subset=['symbol'])
+    _same(engine.join(forecasts, reference, 'symbol', how), get_engine('pandas').join(forecasts, reference, 'symbol', how))
+
+
+@pytest.mark.parametrize('where', [None, {'symbol': 'CCC'}])
+def test_pivot(engine, frames, where):
+    forecasts, _ = frames
+    _same(engine.pivot(forecasts, 'symbol', 'Time_Period', 'Forecast_Return', where=where),
+          get_engine('pandas').pivot(forecasts, 'symbol', 'Time_Period', 'Forecast_Return', where=where))
+
+
+def test_polars_without_pyarrow_falls_back_to_pandas(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'polars', types.ModuleType('polars'))
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    monkeypatch.setattr(dataframe_engine, '_engines', {})
+    monkeypatch.setattr(dataframe_engine, 'DATAFRAME_ENGINE', 'polars')
+
+    with pytest.raises(ImportError, match='pyarrow'):
+        get_engine('polars')
+    assert get_engine().name == 'pandas'
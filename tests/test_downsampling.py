@@ -0,0 +1,34 @@
+"""Downsampling keeps every row unless it actually reduces the series"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsampling import downsample_frame, downsample_indices
+
+
+def _series(n, missing=()):
+    y = np.sin(np.linspace(0, 20, n))
+    y[list(missing)] = np.nan
+    return pd.DataFrame({'date': pd.date_range('2020-01-01', periods=n, freq='D'), 'value': y})
+
+
+@pytest.mark.parametrize('method', [None, 'lttb', 'minmax'])
+def test_short_series_keeps_rows_with_missing_values(method):
+    frame = _series(50, missing=[3, 4, 40])
+    kept = downsample_frame(frame, 'date', 'value', 100, method)
+    assert kept.equals(frame)
+
+
+def test_no_method_keeps_every_row_of_a_long_series():
+    frame = _series(5000, missing=[10])
+    assert len(downsample_frame(frame, 'date', 'value', 100, None)) == 5000
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_downsampling_reduces_and_keeps_ends(method):
+    frame = _series(5000)
+    indices = downsample_indices(frame['date'].to_numpy(), frame['value'].to_numpy(), 100, method)
+    assert len(indices) <= 100
+    assert indices[0] == 0 and indices[-1] == 4999
+    assert np.all(np.diff(indices) > 0)
@@ -0,0 +1,73 @@
+"""Heatmap matrices encode the same values as JSON lists and as typed arrays"""
+
+import base64
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import catalog
+import create_demo_data
+from heatmap_data import clear_heatmap_cache, encode_matrix, forecast_heatmap, forecast_matrix
+
+
+def _decode(payload):
+    if payload['encoding'] == 'typed':
+        values = np.frombuffer(base64.b64decode(payload['values']), dtype='<f4')
+        return values.reshape(payload['shape']).astype(np.float64)
+    return np.array(payload['values'], dtype=np.float64)
+
+
+@pytest.fixture
+def matrix():
+    return pd.DataFrame([[0.1234567, np.nan, -2.5], [1e-7, 3.0, np.nan]],
+                        index=['AAA', 'BBB'], columns=['3_days', '7_days', '14_days'])
+
+
+def test_json_encoding(matrix):
+    payload = encode_matrix(matrix, 'json')
+    assert payload['rows'] == ['AAA', 'BBB']
+    assert payload['columns'] == ['3_days', '7_days', '14_days']
+    assert payload['shape'] == [2, 3]
+    assert payload['values'] == [[0.123457, None, -2.5], [0.0, 3.0, None]]
+    # Missing cells must survive a strict JSON round trip as null
+    assert json.loads(json.dumps(payload, allow_nan=False))['values'][0][1] is None
+
+
+def test_typed_encoding(matrix):
+    payload = encode_matrix(matrix, 'typed')
+    assert payload['dtype'] == 'float32'
+    assert len(base64.b64decode(payload['values'])) == 4 * matrix.size
+    np.testing.assert_array_equal(_decode(payload), matrix.to_numpy().astype(np.float32))
+
+
+def test_unknown_encoding(matrix):
+    with pytest.raises(ValueError):
+        encode_matrix(matrix, 'msgpack')
+
+
+@pytest.fixture
+def forecast_version(workdir):
+    clear_heatmap_cache()
+    path = workdir / create_demo_data.create_demo_forecast()
+    yield catalog.record_file(path)
+    clear_heatmap_cache()
+
+
+def test_forecast_heatmap_encodings_agree(forecast_version):
+    expected = forecast_matrix(forecast_version['path'], forecast_version['fingerprint'])
+    bodies = {}
+    for encoding in ('json', 'typed'):
+        tag, body = forecast_heatmap(forecast_version, encoding=encoding)
+        bodies[encoding] = json.loads(gzip.decompress(body))
+        assert bodies[encoding]['version'] == tag
+        assert bodies[encoding]['matrix']['rows'] == list(expected.index)
+        assert bodies[encoding]['matrix']['columns'] == list(expected.columns)
+
+    np.testing.assert_allclose(_decode(bodies['json']['matrix']), expected.to_numpy(dtype=float), atol=1e-6)
+    np.testing.assert_allclose(_decode(bodies['typed']['matrix']), _decode(bodies['json']['matrix']), rtol=1e-6)
+    scale = bodies['json']['scale']
+    assert scale == bodies['typed']['scale']
+    assert scale['vmin'] == -scale['vmax']
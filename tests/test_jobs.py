@@ -0,0 +1,102 @@
+"""Jobs past a stage deadline or cancelled are terminated, cleaned up and do not block later jobs"""
+
+import logging
+import time
+from pathlib import Path
+
+import pytest
+
+import catalog
+import create_demo_data
+import jobs
+import logging_config
+import main_processor
+from jobs import FINISHED_STATES, JobManager
+
+real_write_outputs = main_processor.write_outputs
+
+
+def stuck_write_outputs(path, sheets, summary, context=None, analysis=None):
+    """Starts a report for 'Stuck' packages, then ignores cancellation"""
+    if 'Stuck' not in path.name:
+        return real_write_outputs(path, sheets, summary, context, analysis)
+    partial = main_processor.SPREADSHEET_DIR / f".partial.{path.stem}_report.xlsx"
+    context.add_output(str(partial))
+    partial.write_bytes(b'half a report')
+    time.sleep(60)
+    return [str(partial)]
+
+
+@pytest.fixture
+def manager(workdir, monkeypatch):
+    monkeypatch.setattr(main_processor, 'write_outputs', stuck_write_outputs)
+    manager = JobManager(max_workers=1)
+    manager.pool.stage_timeouts = {'write': 1}
+    manager.pool.kill_grace = 0.5
+    yield manager
+    manager.shutdown()
+
+
+def _inputs(workdir):
+    demo = workdir / create_demo_data.create_demo_forecast()
+    stuck = workdir / 'Input' / 'Package_Stuck_2024_01_02.xlsx'
+    stuck.write_bytes(demo.read_bytes())
+    return str(stuck), str(demo)
+
+
+def _wait(job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = catalog.get_job(job_id)
+        if job['status'] in FINISHED_STATES:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_stage_deadline_terminates_job_and_next_job_runs(manager, workdir):
+    stuck, demo = _inputs(workdir)
+    stuck_id, demo_id = manager.submit_files([stuck, demo], client='test')
+
+    job = _wait(stuck_id)
+    assert job['status'] == 'timeout'
+    removed = job['metadata']['removed_outputs']
+    assert len(removed) == 1 and not Path(removed[0]).exists()
+
+    assert _wait(demo_id)['status'] == 'succeeded'
+    assert (workdir / main_processor.SPREADSHEET_DIR / 'demo_forecast_2024_report.xlsx').exists()
+    assert manager.pool.busy() == 0
+
+
+@pytest.fixture
+def client(manager, monkeypatch):
+    import app
+
+    monkeypatch.setattr(jobs, '_manager', manager)
+    manager.pool.stage_timeouts = {}
+    yield app.app.test_client()
+    logging_config.shutdown_logging()
+    logging_config._state['config'] = None
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+
+def test_delete_cancels_running_job(client, manager, workdir):
+    stuck, demo = _inputs(workdir)
+    job_id, = manager.submit_files([stuck], client='test')
+    deadline = time.time() + 30
+    while (catalog.get_job(job_id)['metadata'] or {}).get('stage') != 'write' and time.time() < deadline:
+        time.sleep(0.05)
+
+    response = client.delete(f'/api/jobs/{job_id}')
+    assert response.status_code == 202
+    assert response.get_json()['state'] == 'cancelling'
+
+    job = _wait(job_id)
+    assert job['status'] == 'cancelled'
+    assert not any(Path(path).exists() for path in job['metadata']['removed_outputs'])
+    assert client.delete(f'/api/jobs/{job_id}').status_code == 409
+
+    next_id, = manager.submit_files([demo], client='test')
+    assert _wait(next_id)['status'] == 'succeeded'
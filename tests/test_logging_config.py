@@ -0,0 +1,78 @@
+"""Records logged by forked children reach the log file"""
+
+import json
+import logging
+import logging.handlers
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import logging_config
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = logging_config.setup_logging('INFO', str(tmp_path), 'test.log')
+    yield path
+    logging_config.shutdown_logging()
+    logging_config._state['config'] = None
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+
+def _log_burst(tag):
+    for number in range(200):
+        logging.getLogger('child').info(f"{tag} {number}")
+    return tag
+
+
+def _messages(path):
+    logging_config.shutdown_logging()
+    return [json.loads(line)['message'] for line in path.read_text().splitlines()]
+
+
+def test_process_child_flushes_before_exit(log_file):
+    process = multiprocessing.get_context('fork').Process(target=_log_burst, args=('process',))
+    process.start()
+    process.join(30)
+    assert process.exitcode == 0
+    assert sum(message.startswith('process ') for message in _messages(log_file)) == 200
+
+
+def test_pool_children_flush_before_exit(log_file):
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('fork')) as executor:
+        assert list(executor.map(_log_burst, ['pool-a', 'pool-b'])) == ['pool-a', 'pool-b']
+    messages = _messages(log_file)
+    assert sum(message.startswith('pool-') for message in messages) == 400
+
+
+def test_queued_record_is_a_copy(log_file):
+    seen = []
+    capture = logging.Handler()
+    capture.emit = seen.append
+    logger = logging.getLogger('prepare')
+    logger.addHandler(capture)
+    try:
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            logger.exception('failed %s', 'step')
+    finally:
+        logger.removeHandler(capture)
+
+    record = seen[0]
+    assert (record.msg, record.args) == ('failed %s', ('step',))
+    assert record.exc_info[0] is ValueError
+
+    logging_config.shutdown_logging()
+    entry = json.loads(log_file.read_text().splitlines()[-1])
+    assert entry['message'] == 'failed step'
+    assert 'ValueError: boom' in entry['exception']
+
+
+def test_non_rotating_setup_appends_only(tmp_path, log_file):
+    logging_config.setup_logging('INFO', str(tmp_path), 'test.log', rotate=False)
+    file_handlers = [h for h in logging_config._state['listener'].handlers if isinstance(h, logging.FileHandler)]
+    assert [type(h) for h in file_handlers] == [logging.handlers.WatchedFileHandler]
@@ -0,0 +1,83 @@
+"""Incremental change statistics match a full pandas recomputation"""
+
+import numpy as np
+import pandas as pd
+
+import macro_history
+from dashboard_config import MACRO_ZSCORE_MIN_PERIODS
+
+DATES = ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-05', '2024-01-06', '2024-01-04']
+
+
+def _snapshots():
+    rng = np.random.default_rng(11)
+    snapshots = {}
+    for date in DATES:
+        snapshots[date] = pd.DataFrame({
+            'Indicator': ['GDP_Growth', 'GDP_Growth', 'Inflation_Rate'],
+            'Region': ['US', 'EU', 'US'],
+            'Current_Value': rng.normal(2.0, 1.0, 3).round(3),
+            'Previous_Value': rng.normal(2.0, 1.0, 3).round(3),
+            'Forecast': rng.normal(2.0, 1.0, 3).round(3)
+        })
+    # A series that is missing from one snapshot
+    snapshots['2024-01-03'] = snapshots['2024-01-03'].iloc[:2]
+    return snapshots
+
+
+def _expected(snapshots):
+    frames = [frame.assign(date=date) for date, frame in snapshots.items()]
+    data = pd.concat(frames, ignore_index=True).sort_values(['Indicator', 'Region', 'date'])
+    groups = data.groupby(['Indicator', 'Region'])
+    first = groups.cumcount().eq(0)
+    data['change'] = np.where(first, data['Current_Value'] - data['Previous_Value'],
+                              data['Current_Value'] - groups['Current_Value'].shift())
+    data['surprise'] = data['Current_Value'] - groups['Forecast'].shift()
+    prior = data.groupby(['Indicator', 'Region'])['change']
+    mean = prior.transform(lambda change: change.expanding().mean().shift())
+    std = prior.transform(lambda change: change.expanding().std().shift())
+    count = prior.transform(lambda change: change.expanding().count().shift())
+    data['change_z'] = ((data['change'] - mean) / std).where(count >= MACRO_ZSCORE_MIN_PERIODS)
+    return data
+
+
+def _assert_matches(snapshots):
+    expected = _expected(snapshots)
+    assert expected['change_z'].notna().sum() >= 3
+    for (indicator, region), rows in expected.groupby(['Indicator', 'Region']):
+        series = macro_history.get_series(indicator, region)
+        assert list(series['date']) == list(rows['date'])
+        for column in ('change', 'surprise', 'change_z'):
+            np.testing.assert_allclose(series[column].to_numpy(dtype=float), rows[column].to_numpy(dtype=float),
+                                       rtol=1e-9, atol=1e-9, err_msg=f"{indicator}/{region} {column}")
+
+
+def test_incremental_statistics_match_recomputation(workdir):
+    snapshots = _snapshots()
+    in_order = {date: frame for date, frame in snapshots.items() if date != '2024-01-04'}
+    results = [macro_history.append_snapshot(frame, date) for date, frame in in_order.items()]
+    assert [result['appended'] for result in results] == [3, 3, 2, 3, 3]
+    _assert_matches(in_order)
+
+    # An out-of-order snapshot recomputes the affected series
+    result = macro_history.append_snapshot(snapshots['2024-01-04'], '2024-01-04')
+    assert result == {'date': '2024-01-04', 'appended': 0, 'recomputed': 3, 'skipped': 0}
+    assert macro_history.append_snapshot(snapshots['2024-01-06'], '2024-01-06')['skipped'] == 3
+    _assert_matches(snapshots)
+
+
+def test_next_snapshot_after_recompute_extends_the_statistics(workdir):
+    snapshots = _snapshots()
+    for date, frame in snapshots.items():
+        macro_history.append_snapshot(frame, date)
+    later = snapshots['2024-01-06'].assign(Current_Value=[5.0, -1.0, 2.5])
+    macro_history.append_snapshot(later, '2024-01-08')
+
+    snapshots['2024-01-08'] = later
+    expected = _expected(snapshots)
+    stored = pd.concat([macro_history.get_series(i, r).assign(Indicator=i, Region=r)
+                        for i, r in [('GDP_Growth', 'US'), ('GDP_Growth', 'EU'), ('Inflation_Rate', 'US')]])
+    merged = stored.merge(expected, on=['Indicator', 'Region', 'date'], suffixes=('', '_expected'))
+    assert len(merged) == len(expected)
+    np.testing.assert_allclose(merged['change_z'].to_numpy(dtype=float),
+                               merged['change_z_expected'].to_numpy(dtype=float), rtol=1e-9, atol=1e-9)
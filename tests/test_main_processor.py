@@ -0,0 +1,30 @@
+"""Forecast and macro history is only recorded for jobs whose report was written"""
+
+import pytest
+
+import backtest
+import create_demo_data
+import macro_history
+import main_processor
+
+
+def _stored_rows():
+    forecasts = backtest.get_connection().execute("SELECT COUNT(*) FROM forecasts").fetchone()[0]
+    return forecasts, len(macro_history.list_series())
+
+
+@pytest.mark.parametrize('create', [create_demo_data.create_demo_forecast, create_demo_data.create_demo_macro])
+def test_failed_write_records_no_history(workdir, monkeypatch, create):
+    path = workdir / create()
+
+    def failing_write(*args, **kwargs):
+        raise RuntimeError("job cancelled")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(main_processor, 'write_outputs', failing_write)
+        with pytest.raises(RuntimeError):
+            main_processor.process_file(str(path))
+    assert _stored_rows() == (0, 0)
+
+    main_processor.process_file(str(path))
+    assert _stored_rows() != (0, 0)
@@ -0,0 +1,37 @@
+"""Simulation summaries keep the same columns whether or not any row can be simulated"""
+
+import numpy as np
+import pandas as pd
+
+from monte_carlo import get_probability_matrix, simulate_forecasts
+
+
+def _forecasts(forecast_return):
+    return pd.DataFrame({
+        'Asset': ['AAA', 'AAA', 'BBB'],
+        'Time_Period': ['14_days', '3_days', '3_days'],
+        'Forecast_Return': forecast_return,
+        'Volatility': [1.5, 1.5, 2.0],
+        'Confidence': [80.0, 80.0, 60.0]
+    })
+
+
+def test_simulation_summary_and_matrix():
+    summary = simulate_forecasts(_forecasts([2.0, 0.5, -1.0]), n_paths=2000, chunk_paths=500, max_workers=1)
+    assert list(summary.columns) == ['Asset', 'Time_Period', 'Horizon_Days', 'Expected_Return',
+                                     'P5', 'P25', 'P50', 'P75', 'P95', 'Prob_Loss']
+    assert np.all(np.diff(summary[['P5', 'P25', 'P50', 'P75', 'P95']].to_numpy(), axis=1) > 0)
+
+    matrix = get_probability_matrix(summary)
+    assert list(matrix.columns) == ['3_days', '14_days']
+    assert list(matrix.index) == ['AAA', 'BBB']
+    assert np.isnan(matrix.loc['BBB', '14_days'])
+
+
+def test_rows_without_values_give_an_empty_summary_with_every_column():
+    forecasts = _forecasts([np.nan, np.nan, np.nan])
+    summary = simulate_forecasts(forecasts, n_paths=100, max_workers=1)
+    reference = simulate_forecasts(forecasts.fillna(1.0), n_paths=100, max_workers=1)
+    assert summary.empty
+    assert list(summary.columns) == list(reference.columns)
+    assert get_probability_matrix(summary).empty
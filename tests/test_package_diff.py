@@ -0,0 +1,45 @@
+"""Incremental analysis refresh matches a full rebuild"""
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from package_diff import DIFF_KEYS, affected_targets, diff_frames, refresh_analysis
+from schema_detection import get_processor
+
+
+def _forecast(periods, bump=None):
+    rows = []
+    for asset_number, asset in enumerate(('AAA', 'BBB', 'CCC')):
+        for period_number, period in enumerate(periods):
+            value = 0.01 * (asset_number + 1) + 0.001 * period_number
+            if bump == (asset, period):
+                value += 0.5
+            rows.append({'Asset': asset, 'Time_Period': period, 'Forecast_Return': value, 'Confidence': 0.5})
+    return pd.DataFrame(rows)
+
+
+def _macro(regions):
+    rows = [{'Indicator': indicator, 'Region': region, 'Current_Value': float(i + j), 'Previous_Value': 1.0}
+            for i, indicator in enumerate(('GDP', 'CPI')) for j, region in enumerate(regions)]
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize('schema, old, new', [
+    ('forecast', _forecast(['1M', '3M', '6M']), _forecast(['1M', '3M'])),
+    ('forecast', _forecast(['1M', '3M']), _forecast(['1M', '3M', '6M'])),
+    ('forecast', _forecast(['1M', '3M']), _forecast(['1M', '3M'], bump=('BBB', '3M'))),
+    ('forecast', _forecast(['1M', '3M']), _forecast(['1M', '3M'])[lambda f: f['Asset'] != 'CCC']),
+    ('macro', _macro(['US', 'EU', 'JP']), _macro(['US', 'EU'])),
+    ('macro', _macro(['US', 'EU']), _macro(['US', 'EU', 'JP'])),
+])
+def test_incremental_refresh_matches_full_rebuild(schema, old, new):
+    processor = get_processor(schema)
+    previous = processor({'data': old})
+    affected = affected_targets(schema, diff_frames(old, new, DIFF_KEYS[schema]))
+
+    incremental = refresh_analysis(schema, previous, new.reset_index(drop=True), affected)
+    full = processor({'data': new})
+    assert set(incremental) == set(full)
+    for sheet in full:
+        assert_frame_equal(incremental[sheet].reset_index(drop=True), full[sheet].reset_index(drop=True))
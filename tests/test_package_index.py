@@ -0,0 +1,56 @@
+"""Package index follows inputs catalogued by other processes"""
+
+import multiprocessing
+
+import pytest
+
+import catalog
+import package_index
+from package_index import get_package_index
+
+
+@pytest.fixture
+def fresh_index(workdir, monkeypatch):
+    monkeypatch.setattr(package_index, '_index', {'instance': None})
+    monkeypatch.setattr(catalog, '_file_listeners', [])
+    return workdir
+
+
+def _reconcile_in_child():
+    catalog._reset_after_fork()
+    catalog.reconcile(force=True)
+
+
+def _run_in_child(target):
+    process = multiprocessing.get_context('fork').Process(target=target)
+    process.start()
+    process.join(30)
+    assert process.exitcode == 0
+
+
+def test_child_reconcile_reaches_parent_index(fresh_index):
+    index = get_package_index()
+    assert index.packages() == []
+
+    for day in ('01', '02'):
+        (fresh_index / 'Input' / f'Package_Alpha_2024_01_{day}.xlsx').write_bytes(b'data')
+    _run_in_child(_reconcile_in_child)
+    # This process's own reconcile finds the rows current and emits no events
+    assert catalog.reconcile(force=True) == {'added': 0, 'updated': 0, 'removed': 0}
+
+    index = get_package_index()
+    assert index.latest('Package_Alpha_2024')['name'] == 'Package_Alpha_2024_01_02.xlsx'
+    assert len(index.versions('Package_Alpha_2024', '2024-01-01', '2024-01-01')) == 1
+
+    (fresh_index / 'Input' / 'Package_Alpha_2024_01_02.xlsx').unlink()
+    _run_in_child(_reconcile_in_child)
+    assert get_package_index().latest('Package_Alpha_2024')['name'] == 'Package_Alpha_2024_01_01.xlsx'
+
+
+def test_own_events_keep_index_current(fresh_index):
+    index = get_package_index()
+    path = fresh_index / 'Input' / 'Package_Alpha_2024_01_03.xlsx'
+    path.write_bytes(b'data')
+    catalog.record_file(path)
+    assert index.latest('Package_Alpha_2024', '2024-01-03')['name'] == path.name
+    assert get_package_index().latest('Package_Alpha_2024')['name'] == path.name
@@ -0,0 +1,49 @@
+"""Streaming report writes and partial output cleanup"""
+
+import pandas as pd
+import pytest
+
+from jobs import remove_partial_outputs
+from report_writer import write_streaming_report
+
+
+class Cancelled(Exception):
+    pass
+
+
+def _cancel():
+    raise Cancelled()
+
+
+def test_failed_rewrite_keeps_previous_report(workdir):
+    output = workdir / 'Output' / 'spreadsheets' / 'Package_A_report.xlsx'
+    sheets = {'Data': pd.DataFrame({'a': range(10)})}
+    result = write_streaming_report(output, sheets, companion_format='csv')
+    good = {path: open(path, 'rb').read() for path in [result['output_path']] + result['companions']}
+
+    registered = []
+    with pytest.raises(Cancelled):
+        write_streaming_report(output, sheets, companion_format='csv', cancel_check=_cancel,
+                               on_file=registered.append)
+
+    assert registered and all(path not in good for path in registered)
+    remove_partial_outputs(registered)
+    for path, content in good.items():
+        assert open(path, 'rb').read() == content
+    assert sorted(p.name for p in output.parent.iterdir()) == sorted(p.split('/')[-1] for p in good)
+
+
+def test_killed_write_leaves_only_temporary_files(workdir):
+    output = workdir / 'Output' / 'spreadsheets' / 'Package_B_report.xlsx'
+    write_streaming_report(output, {'Data': pd.DataFrame({'a': [1]})}, companion_format=None)
+
+    # A worker killed mid-write leaves its registered temporary files; cleanup removes only those
+    registered = []
+    with pytest.raises(Cancelled):
+        write_streaming_report(output, {'Data': pd.DataFrame({'a': [2]})}, companion_format=None,
+                               cancel_check=_cancel, on_file=registered.append)
+    temp = registered[0]
+    open(temp, 'wb').write(b'partial')
+    assert remove_partial_outputs(registered) == [temp]
+    assert output.exists()
+    assert pd.read_excel(output)['a'].tolist() == [1]
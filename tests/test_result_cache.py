@@ -0,0 +1,88 @@
+"""Result cache invalidation"""
+
+import os
+
+import dashboard_config
+from result_cache import ResultCache, is_current
+
+
+def _rewrite_middle(path):
+    """Same-size edit away from the sampled ends; mtime moves forward explicitly"""
+    data = bytearray(path.read_bytes())
+    middle = len(data) // 2
+    data[middle:middle + 4] = b'XXXX'
+    stat = path.stat()
+    path.write_bytes(bytes(data))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def _compute(cache, path, calls, config=()):
+    def compute():
+        calls.append(1)
+        return path.read_bytes()
+    return cache.get_or_compute('test', {'path': str(path)}, compute, files=[path], config=config)
+
+
+def test_same_size_edit_in_the_middle_invalidates(tmp_path):
+    path = tmp_path / 'input.bin'
+    path.write_bytes(b'a' * 300_000)
+    cache = ResultCache(disk_dir=None)
+    calls = []
+
+    _compute(cache, path, calls)
+    assert _compute(cache, path, calls) == b'a' * 300_000
+    assert len(calls) == 1
+
+    _rewrite_middle(path)
+    assert b'XXXX' in _compute(cache, path, calls)
+    assert len(calls) == 2
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_catalog_event_drops_entries_for_a_changed_file(tmp_path):
+    path = tmp_path / 'input.bin'
+    path.write_bytes(b'a' * 300_000)
+    cache = ResultCache(disk_dir=None)
+    calls = []
+    _compute(cache, path, calls)
+
+    # An event for an unchanged file keeps the entry
+    cache.on_catalog_event('upsert', 'input', str(path), {'size': 300_000})
+    assert cache.stats()['entries'] == 1
+
+    _rewrite_middle(path)
+    cache.on_catalog_event('upsert', 'input', str(path), {'size': 300_000})
+    assert cache.stats()['entries'] == 0
+
+    _compute(cache, path, calls)
+    cache.on_catalog_event('remove', 'input', str(path), None)
+    assert cache.stats()['entries'] == 0
+
+
+def test_disk_tier_rejects_changed_file(tmp_path):
+    path = tmp_path / 'input.bin'
+    path.write_bytes(b'a' * 300_000)
+    calls = []
+    _compute(ResultCache(disk_dir=str(tmp_path / 'cache')), path, calls)
+
+    _rewrite_middle(path)
+    assert b'XXXX' in _compute(ResultCache(disk_dir=str(tmp_path / 'cache')), path, calls)
+    assert len(calls) == 2
+
+
+def test_deleted_file_and_setting_change_invalidate(tmp_path, monkeypatch):
+    path = tmp_path / 'input.bin'
+    path.write_bytes(b'abc')
+    cache = ResultCache(disk_dir=None)
+    calls = []
+
+    monkeypatch.setattr(dashboard_config, 'DPI', 100)
+    _compute(cache, path, calls, config=['DPI'])
+    monkeypatch.setattr(dashboard_config, 'DPI', 200)
+    _compute(cache, path, calls, config=['DPI'])
+    assert len(calls) == 2
+
+    key = cache.make_key('test', {'path': str(path)})
+    dependencies = cache._entries[key]['dependencies']
+    path.unlink()
+    assert not is_current(dependencies)
@@ -0,0 +1,76 @@
+"""VaR, CVaR, drawdown and Sharpe metrics on hand-checked and pandas-checked inputs"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard_config import TRADING_DAYS_PER_YEAR
+from risk_analytics import (RollingRiskState, compute_risk_report, drawdown_series, historical_cvar, historical_var,
+                            max_drawdown, parametric_cvar, parametric_var, rolling_sharpe)
+
+
+def _ladder():
+    """-10% .. +9% in 1% steps; B is the same series with gaps, C has no data"""
+    ladder = np.arange(-10, 10) / 100.0
+    gaps = np.insert(ladder, [3, 11], np.nan)
+    return pd.DataFrame({'A': np.append(ladder, [np.nan, np.nan]), 'B': gaps, 'C': np.nan})
+
+
+def test_historical_var_and_cvar():
+    returns = _ladder()
+    # 10th percentile of 20 evenly spaced points: -0.09 + 0.9 * 0.01
+    var = historical_var(returns, confidence=0.9)
+    np.testing.assert_allclose(var[['A', 'B']], [0.081, 0.081])
+    # Tail at or below the quantile is -10% and -9%
+    cvar = historical_cvar(returns, confidence=0.9)
+    np.testing.assert_allclose(cvar[['A', 'B']], [0.095, 0.095])
+    assert np.isnan(var['C']) and np.isnan(cvar['C'])
+
+
+def test_parametric_var_and_cvar():
+    returns = _ladder()
+    mean, std = returns['A'].mean(), returns['A'].std()
+    z = NormalDist().inv_cdf(0.05)
+    density = NormalDist().pdf(z)
+    np.testing.assert_allclose(parametric_var(returns, 0.95)[['A', 'B']], -(mean + z * std))
+    np.testing.assert_allclose(parametric_cvar(returns, 0.95)[['A', 'B']], -(mean - std * density / 0.05))
+    assert parametric_cvar(returns)['A'] > parametric_var(returns)['A']
+
+
+def test_max_drawdown_hand_checked():
+    # Wealth 1.1, 0.88, 0.924, 0.8316, 1.08108: the trough 0.8316 is 24.4% below the 1.1 peak
+    returns = pd.DataFrame({'X': [0.10, -0.20, 0.05, np.nan, -0.10, 0.30], 'Up': [0.01] * 6})
+    np.testing.assert_allclose(drawdown_series(returns)['X'],
+                               [0.0, -0.2, -0.16, -0.16, -0.244, 1.08108 / 1.1 - 1.0])
+    np.testing.assert_allclose(max_drawdown(returns), [0.244, 0.0], atol=1e-12)
+    assert list(max_drawdown(returns.iloc[:0])) == [0.0, 0.0]
+
+
+def test_rolling_sharpe_matches_pandas_rolling():
+    rng = np.random.default_rng(9)
+    returns = pd.DataFrame(rng.normal(0.001, 0.02, (200, 3)), columns=['A', 'B', 'C'])
+    returns.iloc[rng.random(returns.shape) < 0.1] = np.nan
+    rolling = returns.rolling(20, min_periods=2)
+    expected = rolling.mean() / rolling.std() * np.sqrt(TRADING_DAYS_PER_YEAR)
+    pd.testing.assert_frame_equal(rolling_sharpe(returns, window=20, risk_free_rate=0.0), expected, atol=1e-9)
+
+
+def test_streaming_state_matches_batch_report():
+    rng = np.random.default_rng(4)
+    returns = pd.DataFrame(rng.normal(0.0, 0.02, (150, 2)), columns=['A', 'B'])
+    returns.iloc[[5, 60], 1] = np.nan
+
+    state = RollingRiskState.from_frame(returns.iloc[:100], window=30)
+    for _, row in returns.iloc[100:].iterrows():
+        state.update(row)
+    snapshot = state.snapshot()
+
+    window = returns.iloc[-30:]
+    report = compute_risk_report(returns, window=30)
+    np.testing.assert_allclose(snapshot['Max_Drawdown'], report['Max_Drawdown'])
+    np.testing.assert_allclose(snapshot['Rolling_Sharpe'], report['Rolling_Sharpe'])
+    np.testing.assert_allclose(snapshot['VaR_Parametric'], parametric_var(window))
+    np.testing.assert_allclose(snapshot['CVaR_Parametric'], parametric_cvar(window))
+    assert snapshot['Current_Drawdown'].to_numpy() == pytest.approx(-drawdown_series(returns).iloc[-1].to_numpy())
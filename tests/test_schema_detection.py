@@ -0,0 +1,80 @@
+"""Schema sheets are matched regardless of case, renamed and combined without double counting"""
+
+import pandas as pd
+
+import create_demo_data
+import main_processor
+from package_diff import load_package_rows
+from schema_detection import canonical_columns, combine_sheets, detect_schema
+
+
+def _write_forecast(path, columns):
+    frame = pd.DataFrame({
+        columns[0]: ['AAA', 'AAA', 'BBB', 'BBB'],
+        columns[1]: ['1M', '3M', '1M', '3M'],
+        columns[2]: [0.01, 0.02, 0.03, 0.04],
+        columns[3]: [0.5, 0.6, 0.7, 0.8]
+    })
+    frame.to_excel(path, sheet_name='Forecasts', index=False)
+
+
+def test_lowercase_headers_are_renamed(workdir):
+    path = workdir / 'Input' / 'Package_Lower_2024_01_02.xlsx'
+    _write_forecast(path, [' asset', 'time_period', 'FORECAST_RETURN', 'confidence'])
+    decision = detect_schema(path)
+    assert decision['schema'] == 'forecast'
+
+    sheets = canonical_columns({'Forecasts': pd.read_excel(path), 'Other': pd.DataFrame({'asset': [1]})}, decision)
+    assert list(sheets['Forecasts'].columns) == ['Asset', 'Time_Period', 'Forecast_Return', 'Confidence']
+    # Sheets outside the schema keep their headers
+    assert list(sheets['Other'].columns) == ['asset']
+
+
+def test_lowercase_workbook_processes_like_canonical_one(workdir):
+    lower = workdir / 'Input' / 'Package_Lower_2024_01_02.xlsx'
+    upper = workdir / 'Input' / 'Package_Upper_2024_01_02.xlsx'
+    _write_forecast(lower, ['asset', 'time_period', 'forecast_return', 'confidence'])
+    _write_forecast(upper, ['Asset', 'Time_Period', 'Forecast_Return', 'Confidence'])
+
+    results = [main_processor.process_file(str(path)) for path in (lower, upper)]
+    assert results[0]['schema'] == results[1]['schema'] == 'forecast'
+    assert results[0]['sheets'] == results[1]['sheets']
+    reports = [pd.read_excel(result['outputs'][0], sheet_name=None) for result in results]
+    assert reports[0]['Forecast_Matrix'].equals(reports[1]['Forecast_Matrix'])
+
+
+def test_filtered_copy_sheets_are_not_counted_twice(workdir):
+    path = workdir / create_demo_data.create_demo_forecast()
+    primary = pd.read_excel(path, sheet_name='3-7-14days')
+    assert len(pd.read_excel(path, sheet_name='High_Risk')) > 0
+
+    schema, rows = load_package_rows(path)
+    assert schema == 'forecast'
+    assert len(rows) == len(primary)
+
+    result = main_processor.process_file(str(path))
+    report = pd.read_excel(result['outputs'][0], sheet_name='Asset_Summary')
+    expected = primary.groupby('Asset', as_index=False)['Forecast_Return'].mean().round(4)
+    pd.testing.assert_frame_equal(report[['Asset', 'Forecast_Return']], expected)
+
+
+def test_repeated_keys_within_one_sheet_are_kept():
+    main = pd.DataFrame({'Asset': ['A', 'A', 'B'], 'Time_Period': ['1M', '1M', '1M'], 'Forecast_Return': [1, 2, 3]})
+    view = main.iloc[[2]]
+    combined = combine_sheets({'main': main, 'view': view}, 'forecast')
+    pd.testing.assert_frame_equal(combined, main)
+    assert len(combine_sheets({'main': main, 'view': view})) == 4
+
+
+def test_input_sheets_do_not_replace_computed_sheets(workdir):
+    path = workdir / 'Input' / 'Package_Clash_2024_01_02.xlsx'
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({'Value': [1.0, 2.0]}).to_excel(writer, sheet_name='summary', index=False)
+        pd.DataFrame({'Value': [3.0]}).to_excel(writer, sheet_name='Input_summary', index=False)
+
+    result = main_processor.process_file(str(path))
+    report = pd.read_excel(result['outputs'][0], sheet_name=None)
+    assert list(report) == ['Summary', 'Input_summary_2', 'Input_summary']
+    assert list(report['Summary']['Sheet']) == ['summary', 'Input_summary']
+    assert list(report['Input_summary_2']['Value']) == [1.0, 2.0]
+    assert list(report['Input_summary']['Value']) == [3.0]
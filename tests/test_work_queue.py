@@ -0,0 +1,35 @@
+"""Work node and job manager interaction"""
+
+import threading
+
+from jobs import JobManager
+from work_queue import LeaseQueue, WorkNode
+
+
+class FailingPool:
+    """Worker pool whose submit always fails"""
+
+    def submit(self, job_id, function, args=(), profile=None):
+        raise RuntimeError("pool is broken")
+
+    def cancel(self, job_id):
+        return False
+
+    def shutdown(self):
+        pass
+
+
+def test_poll_survives_a_job_that_fails_to_start(workdir):
+    (workdir / 'Input' / 'Package_A_2024_01_02.xlsx').write_bytes(b'not really a workbook')
+    manager = JobManager(pool=FailingPool(), max_workers=1)
+    node = WorkNode(manager, queue=LeaseQueue(db_path='Output/.work_queue.db', node_id='test', max_attempts=1))
+
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault('started', node.poll()), daemon=True)
+    thread.start()
+    thread.join(10)
+
+    assert not thread.is_alive(), "poll deadlocked"
+    assert result['started'] == 1
+    assert node._active == {}
+    assert node.queue.stats()['tasks'] == {'failed': 1}
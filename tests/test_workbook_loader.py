@@ -0,0 +1,60 @@
+"""Parallel sheet parsing matches pandas and keeps log listeners out of parser children"""
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import logging_config
+from workbook_loader import load_sheets_parallel
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / 'book.xlsx'
+    rng = np.random.default_rng(3)
+    with pd.ExcelWriter(path) as writer:
+        for number in range(3):
+            pd.DataFrame({
+                'Asset': [f"A{i % 7}" for i in range(300)],
+                'Value': rng.normal(size=300),
+                'Count': rng.integers(0, 10, 300),
+                'Note': [f"shared {i % 5}" for i in range(300)]
+            }).to_excel(writer, sheet_name=f"Sheet{number}", index=False)
+    return path
+
+
+@pytest.fixture
+def configured_logging(tmp_path):
+    path = logging_config.setup_logging('INFO', str(tmp_path), 'test.log')
+    yield path
+    logging_config.shutdown_logging()
+    logging_config._state['config'] = None
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+
+@pytest.mark.parametrize('sheet_names', [None, ['Sheet2', 'Sheet0']])
+def test_parallel_matches_in_process(workbook, sheet_names, configured_logging):
+    result = load_sheets_parallel(workbook, sheet_names, workers=2, min_bytes=0)
+    expected = pd.read_excel(workbook, sheet_name=sheet_names)
+    assert list(result) == list(expected)
+    for name in expected:
+        pd.testing.assert_frame_equal(result[name], expected[name])
+
+
+def test_direct_children_start_no_listener(configured_logging):
+    with logging_config.direct_logging_in_children():
+        pid = os.fork()
+    if pid == 0:
+        listener_started = logging_config._state['listener'] is not None
+        logging.getLogger('child').info('from the parser child')
+        os._exit(1 if listener_started else 0)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+    logging_config.shutdown_logging()
+    assert 'from the parser child' in configured_logging.read_text()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Thumbnail Module
+Generates and caches small previews of heatmap and chart images
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from PIL import Image
+
+from dashboard_config import (DEFAULT_OUTPUT_DIR, THUMBNAIL_DIR, THUMBNAIL_EXTENSIONS, THUMBNAIL_FORMAT,
+                              THUMBNAIL_QUALITY, THUMBNAIL_SIZE)
+
+THUMBNAIL_PATH = Path(DEFAULT_OUTPUT_DIR) / THUMBNAIL_DIR
+
+# Content hashes keyed by path, remembered with the size/mtime they were computed for
+_hash_cache: Dict[str, Tuple[int, int, str]] = {}
+_hash_lock = threading.Lock()
+
+
+def is_previewable(filename: str) -> bool:
+    """Check if a file is an image that gets a thumbnail"""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in THUMBNAIL_EXTENSIONS
+
+
+def content_hash(path: Union[str, Path]) -> str:
+    """
+    Get the SHA-1 of a file's contents
+
+    The digest is recomputed only when the file's size or mtime changes, so
+    repeated listings do not re-read unchanged images.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hex digest of the file contents
+    """
+    path = Path(path)
+    stat = path.stat()
+    key = str(path.resolve())
+
+    with _hash_lock:
+        cached = _hash_cache.get(key)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+
+    digest = hashlib.sha1()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(block)
+    value = digest.hexdigest()
+
+    with _hash_lock:
+        _hash_cache[key] = (stat.st_size, stat.st_mtime_ns, value)
+    return value
+
+
+def get_thumbnail(path: Union[str, Path], size: Tuple[int, int] = THUMBNAIL_SIZE,
+                  fmt: str = THUMBNAIL_FORMAT) -> Optional[Path]:
+    """
+    Get the thumbnail for an image, generating it on first use
+
+    Thumbnails are named after the source's content hash, so an unchanged
+    image is only ever downsampled once and a replaced image gets a new one.
+
+    Args:
+        path: Source image path
+        size: Maximum (width, height) of the thumbnail
+        fmt: Output format, 'webp' or 'png'
+
+    Returns:
+        Absolute path of the cached thumbnail, or None if the file is not an image
+    """
+    path = Path(path)
+    if not path.is_file() or not is_previewable(path.name):
+        return None
+
+    digest = content_hash(path)
+    THUMBNAIL_PATH.mkdir(parents=True, exist_ok=True)
+    thumbnail_path = THUMBNAIL_PATH / f"{digest}_{size[0]}x{size[1]}.{fmt}"
+    if thumbnail_path.exists():
+        return thumbnail_path.resolve()
+
+    try:
+        image = Image.open(path)
+    except OSError:
+        # Not a readable image despite the extension
+        return None
+
+    with image:
+        image.thumbnail(size, Image.LANCZOS)
+        if fmt == 'webp':
+            preview = image.convert('RGBA') if image.mode in ('RGBA', 'LA', 'P') else image.convert('RGB')
+            options = {'quality': THUMBNAIL_QUALITY, 'method': 4}
+        else:
+            preview = image
+            options = {'optimize': True}
+
+        # Write under a temporary name so concurrent requests never serve a partial file
+        temp_path = thumbnail_path.with_name(f"{thumbnail_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        preview.save(temp_path, format=fmt.upper(), **options)
+    os.replace(temp_path, thumbnail_path)
+
+    return thumbnail_path.resolve()
+
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Work Queue Module
+Lease-based distribution of Input files across dashboard nodes on shared storage
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from admission import AdmissionRejected
+from catalog import file_fingerprint
+from dashboard_config import (DEFAULT_INPUT_DIR, WORK_LEASE_TTL, WORK_MAX_ATTEMPTS, WORK_POLL_INTERVAL,
+                              WORK_QUEUE_DB)
+from main_processor import scan_input_files
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    job_id TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks(status, lease_expires);
+CREATE INDEX IF NOT EXISTS idx_tasks_owner ON tasks(owner, status);
+"""
+
+
+def default_node_id() -> str:
+    """Identify this node by host name and process id (unique per container)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def task_key(path: Path, fingerprint: str) -> str:
+    """Key a task by file path and content, so a replaced file is processed again"""
+    return hashlib.sha1(f"{Path(path).as_posix()}|{fingerprint}".encode('utf-8')).hexdigest()
+
+
+class LeaseQueue:
+    """
+    Work queue in a SQLite file on the shared Output volume
+
+    A node claims tasks by taking a time-limited lease inside an IMMEDIATE
+    transaction, so exactly one node wins each task. Owners renew leases
+    while they work; a lease that is not renewed in time (node crashed or
+    was stopped) becomes claimable again. A task that keeps failing is
+    marked failed after max_attempts claims.
+
+    The database uses a rollback journal rather than WAL: it is shared by
+    containers through a bind mount, and rollback-journal locking only needs
+    POSIX file locks. Do not put it on a network filesystem without working
+    file locks.
+    """
+
+    def __init__(self, db_path: str = WORK_QUEUE_DB, node_id: Optional[str] = None,
+                 lease_ttl: float = WORK_LEASE_TTL, max_attempts: int = WORK_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.node_id = node_id or default_node_id()
+        self.lease_ttl = lease_ttl
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, creating the schema on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA busy_timeout=30000')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def enqueue(self, paths: List[Path]) -> int:
+        """
+        Add files to the queue; files already known with the same content are ignored
+
+        Args:
+            paths: Input file paths
+
+        Returns:
+            Number of new tasks
+        """
+        now = time.time()
+        rows = []
+        for path in paths:
+            try:
+                fingerprint = file_fingerprint(Path(path))
+            except OSError:
+                continue
+            rows.append((task_key(path, fingerprint), Path(path).as_posix(), fingerprint, now, now))
+        if not rows:
+            return 0
+
+        connection = self._connection()
+        before = connection.total_changes
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT OR IGNORE INTO tasks (key, path, fingerprint, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return connection.total_changes - before
+
+    def claim(self, limit: int = 1) -> List[Dict[str, Any]]:
+        """
+        Lease up to limit pending or expired tasks to this node
+
+        Args:
+            limit: Maximum number of tasks to claim
+
+        Returns:
+            Claimed task dictionaries
+        """
+        if limit <= 0:
+            return []
+        now = time.time()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            # Expired leases that have used up their attempts are given up on
+            connection.execute(
+                """UPDATE tasks SET status = 'failed', owner = NULL, lease_expires = NULL, updated_at = ?,
+                       error = COALESCE(error, 'Lease expired too many times')
+                   WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+                (now, now, self.max_attempts)
+            )
+            rows = connection.execute(
+                """SELECT * FROM tasks
+                   WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                   ORDER BY created_at LIMIT ?""",
+                (now, limit)
+            ).fetchall()
+            for row in rows:
+                if row['status'] == 'leased':
+                    logger.warning(f"Reclaiming expired lease on {row['path']} from {row['owner']}")
+            connection.executemany(
+                """UPDATE tasks SET status = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1,
+                       job_id = NULL, updated_at = ?
+                   WHERE key = ?""",
+                [(self.node_id, now + self.lease_ttl, now, row['key']) for row in rows]
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return [dict(row, owner=self.node_id, attempts=row['attempts'] + 1) for row in rows]
+
+    def renew(self, keys: List[str]) -> List[str]:
+        """
+        Extend this node's leases
+
+        Args:
+            keys: Task keys held by this node
+
+        Returns:
+            Keys still held; a missing key means the lease was lost to another node
+        """
+        if not keys:
+            return []
+        now = time.time()
+        connection = self._connection()
+        held = []
+        for key in keys:
+            cursor = connection.execute(
+                """UPDATE tasks SET lease_expires = ?, updated_at = ?
+                   WHERE key = ? AND owner = ? AND status = 'leased'""",
+                (now + self.lease_ttl, now, key, self.node_id)
+            )
+            if cursor.rowcount:
+                held.append(key)
+        return held
+
+    def set_job(self, key: str, job_id: str):
+        """Record the local job id processing a leased task"""
+        self._connection().execute('UPDATE tasks SET job_id = ? WHERE key = ? AND owner = ?',
+                                   (job_id, key, self.node_id))
+
+    def complete(self, key: str, succeeded: bool, error: Optional[str] = None) -> bool:
+        """
+        Finish a leased task
+
+        A failed task goes back to pending until it has used max_attempts.
+
+        Args:
+            key: Task key
+            succeeded: Whether processing succeeded
+            error: Error message for failed tasks
+
+        Returns:
+            False if this node no longer held the lease
+        """
+        cursor = self._connection().execute(
+            """UPDATE tasks SET
+                   status = CASE WHEN ? THEN 'done' WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                   owner = NULL, lease_expires = NULL, error = ?, updated_at = ?
+               WHERE key = ? AND owner = ? AND status = 'leased'""",
+            (succeeded, self.max_attempts, error, time.time(), key, self.node_id)
+        )
+        return cursor.rowcount > 0
+
+    def release(self, key: str) -> bool:
+        """Give a leased task back without counting the attempt (e.g. the node is busy)"""
+        cursor = self._connection().execute(
+            """UPDATE tasks SET status = 'pending', owner = NULL, lease_expires = NULL,
+                   attempts = MAX(attempts - 1, 0), updated_at = ?
+               WHERE key = ? AND owner = ? AND status = 'leased'""",
+            (time.time(), key, self.node_id)
+        )
+        return cursor.rowcount > 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Task counts by status and leases held per node"""
+        connection = self._connection()
+        counts = {row['status']: row['n'] for row in
+                  connection.execute('SELECT status, COUNT(*) AS n FROM tasks GROUP BY status')}
+        owners = {row['owner']: row['n'] for row in connection.execute(
+            "SELECT owner, COUNT(*) AS n FROM tasks WHERE status = 'leased' GROUP BY owner")}
+        return {'node_id': self.node_id, 'tasks': counts, 'leases': owners}
+
+
+class WorkNode:
+    """
+    Background loop that feeds a JobManager from the shared queue
+
+    Every poll the node enqueues new Input files, renews its leases, and
+    claims as many tasks as it has free workers. Claimed files run through
+    the local JobManager, so admission control, deadlines and cancellation
+    apply as for jobs started from the web interface.
+    """
+
+    def __init__(self, manager, queue: Optional[LeaseQueue] = None, input_dir: str = DEFAULT_INPUT_DIR,
+                 poll_interval: float = WORK_POLL_INTERVAL):
+        self.manager = manager
+        self.queue = queue or LeaseQueue()
+        self.input_dir = input_dir
+        # Renew often enough that one missed poll never lets a lease lapse
+        self.poll_interval = min(poll_interval, self.queue.lease_ttl / 3)
+        self._active: Dict[str, str] = {}  # job id -> task key
+        # Jobs that finished while poll was still submitting them: job id -> (status, error)
+        self._finished_early: Dict[str, tuple] = {}
+        self._submitting = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        manager.add_listener(self._job_finished)
+
+    def start(self):
+        """Start the polling thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='work-node', daemon=True)
+            self._thread.start()
+            logger.info(f"Work node {self.queue.node_id} started")
+
+    def stop(self):
+        """Stop polling; running jobs keep their leases until they expire"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def poll(self) -> int:
+        """
+        Run one scan, renew and claim cycle
+
+        Returns:
+            Number of tasks started
+        """
+        self.queue.enqueue(scan_input_files(self.input_dir))
+
+        with self._lock:
+            active = dict(self._active)
+        lost = set(active.values()) - set(self.queue.renew(list(active.values())))
+        for job_id, key in active.items():
+            if key in lost:
+                logger.warning(f"Lost lease for job {job_id}; cancelling it")
+                self.manager.cancel(job_id)
+
+        started = 0
+        for task in self.queue.claim(self.manager.max_workers - len(active)):
+            # Submitted without holding the lock: the manager may report the job
+            # finished (e.g. it failed to start) before submit_files returns
+            with self._lock:
+                self._submitting = True
+            try:
+                job_id = self.manager.submit_files([task['path']], client=f"node:{self.queue.node_id}")[0]
+            except AdmissionRejected:
+                self.queue.release(task['key'])
+                break
+            except Exception as e:
+                logger.error(f"Could not start queued file {task['path']}: {e}")
+                self.queue.complete(task['key'], succeeded=False, error=str(e))
+                continue
+            finally:
+                with self._lock:
+                    self._submitting = False
+            self.queue.set_job(task['key'], job_id)
+            with self._lock:
+                early = self._finished_early.pop(job_id, None)
+                if early is None:
+                    self._active[job_id] = task['key']
+            if early is not None:
+                self._settle(job_id, task['key'], *early)
+            started += 1
+
+        with self._lock:
+            # Anything left belongs to jobs this node did not start
+            self._finished_early.clear()
+        return started
+
+    def _settle(self, job_id: str, key: str, status: str, error: Optional[str]):
+        if not self.queue.complete(key, succeeded=status == 'succeeded', error=error):
+            logger.warning(f"Job {job_id} finished after its lease was lost")
+        self._wake.set()
+
+    def _job_finished(self, job_id: str, status: str, error: Optional[str] = None):
+        """JobManager listener: settle the lease of a finished job and look for more work"""
+        with self._lock:
+            key = self._active.pop(job_id, None)
+            if key is None:
+                if self._submitting:
+                    # poll settles it once submit_files has returned the id
+                    self._finished_early[job_id] = (status, error)
+                return
+        self._settle(job_id, key, status, error)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Work node poll failed: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+_node: Optional[WorkNode] = None
+
+
+def start_work_node(manager) -> WorkNode:
+    """Start the process-wide work node for a JobManager"""
+    global _node
+    if _node is None:
+        _node = WorkNode(manager)
+        _node.start()
+    return _node
+
+
+def main():
+    """Run a headless processing node"""
+    from jobs import get_job_manager
+    from logging_config import setup_logging
+
+    parser = argparse.ArgumentParser(description="Process Input files from the shared work queue")
+    parser.add_argument('--input-dir', default=DEFAULT_INPUT_DIR, help="Directory containing input workbooks")
+    parser.add_argument('--once', action='store_true', help="Process the current backlog and exit")
+    args = parser.parse_args()
+
+    setup_logging()
+    manager = get_job_manager()
+    node = WorkNode(manager, input_dir=args.input_dir)
+    print(f"🔗 Work node {node.queue.node_id} polling {args.input_dir}")
+
+    try:
+        if args.once:
+            while node.poll() or node._active:
+                node._wake.wait(node.poll_interval)
+                node._wake.clear()
+            print(f"✅ Backlog processed: {node.queue.stats()['tasks']}")
+        else:
+            node.start()
+            while True:
+                time.sleep(60)
+    except KeyboardInterrupt:
+        print("\n🛑 Work node stopped")
+    finally:
+        node.stop()
+        manager.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
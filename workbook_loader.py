@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Workbook Loader Module
+Parses the sheets of one workbook concurrently in forked processes
+"""
+
+import argparse
+import logging
+import os
+import pickle
+import select
+import signal
+import statistics
+import sys
+import time
+import uuid
+import zipfile
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dashboard_config import SHEET_PARSE_MIN_BYTES, SHEET_PARSE_WORKERS
+from logging_config import direct_logging_in_children
+
+logger = logging.getLogger(__name__)
+
+# Column dtypes copied into shared memory as raw buffers; anything else is pickled into it
+RAW_KINDS = set('biufcmM')
+
+
+def _open_book(path: Path) -> Any:
+    """
+    Open a workbook once, parsing its index and shared strings but no sheet
+
+    Forked parsers inherit the opened book, so each of them only parses its
+    own sheet instead of re-reading the whole archive.
+    """
+    if path.suffix.lower() == '.xls':
+        import xlrd
+
+        return xlrd.open_workbook(str(path), on_demand=True)
+
+    from openpyxl import load_workbook
+
+    return load_workbook(str(path), read_only=True, data_only=True, keep_links=False)
+
+
+def _book_sheet_names(book: Any) -> List[str]:
+    return list(book.sheetnames) if hasattr(book, 'sheetnames') else book.sheet_names()
+
+
+def _close_book(book: Any):
+    if hasattr(book, 'release_resources'):
+        book.release_resources()
+    else:
+        book.close()
+
+
+def _export_frame(frame: pd.DataFrame, name: str) -> Dict[str, Any]:
+    """
+    Copy a frame's columns into one shared memory segment
+
+    Numeric, boolean and datetime columns are stored as raw buffers; object
+    columns (text, mixed) are pickled into the segment.
+
+    Returns:
+        Layout of the segment: column names, dtypes, offsets and sizes
+    """
+    columns = []
+    payloads = []
+    offset = 0
+    for position in range(frame.shape[1]):
+        values = frame.iloc[:, position].to_numpy()
+        if values.dtype.kind in RAW_KINDS:
+            data = np.ascontiguousarray(values)
+            entry = {'encoding': 'raw', 'dtype': data.dtype.str}
+            payload = data.view(np.uint8).reshape(-1)
+        else:
+            entry = {'encoding': 'pickle', 'dtype': None}
+            payload = pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)
+        entry.update(name=frame.columns[position], offset=offset, size=len(payload))
+        columns.append(entry)
+        payloads.append(payload)
+        offset += len(payload)
+
+    segment = shared_memory.SharedMemory(name=name, create=True, size=max(offset, 1))
+    try:
+        for entry, payload in zip(columns, payloads):
+            segment.buf[entry['offset']:entry['offset'] + entry['size']] = payload
+    finally:
+        segment.close()
+    # The parent owns the segment from here on and unlinks it after reading
+    resource_tracker.unregister(segment._name, 'shared_memory')
+    return {'rows': len(frame), 'columns': columns}
+
+
+def _import_frame(name: str, layout: Dict[str, Any]) -> pd.DataFrame:
+    """Rebuild a frame from a shared memory segment and release the segment"""
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        data = {}
+        names = []
+        for position, entry in enumerate(layout['columns']):
+            view = segment.buf[entry['offset']:entry['offset'] + entry['size']]
+            if entry['encoding'] == 'raw':
+                values = np.frombuffer(view, dtype=np.dtype(entry['dtype'])).copy()
+            else:
+                values = pickle.loads(view)
+            view.release()
+            data[position] = values
+            names.append(entry['name'])
+        frame = pd.DataFrame(data, index=pd.RangeIndex(layout['rows']))
+        frame.columns = names
+        return frame
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+def _discard_segment(name: str):
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    segment.unlink()
+
+
+def _parse_in_child(path: Path, book: Any, sheet: str, segment_name: str, write_fd: int):
+    """Body of a forked sheet parser; never returns"""
+    status = 0
+    try:
+        try:
+            if hasattr(book, 'sheetnames'):
+                # The inherited archive handle shares its file offset with the sibling parsers
+                book._archive = zipfile.ZipFile(path)
+                frame = pd.read_excel(book, sheet_name=sheet, engine='openpyxl')
+            else:
+                frame = pd.read_excel(book, sheet_name=sheet, engine='xlrd')
+            message = {'layout': _export_frame(frame, segment_name)}
+        except Exception as e:
+            message = {'error': f"{type(e).__name__}: {e}"}
+        data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            with os.fdopen(write_fd, 'wb') as pipe:
+                pipe.write(data)
+        except OSError:
+            # The loader is gone; nobody will read the segment
+            _discard_segment(segment_name)
+            status = 1
+    except BaseException:
+        status = 1
+    finally:
+        os._exit(status)
+
+
+def _start_child(path: Path, book: Any, sheet: str, segment_name: str) -> Tuple[int, int]:
+    read_fd, write_fd = os.pipe()
+    # Parsers live for one sheet; a log listener thread is not worth starting in them
+    with direct_logging_in_children():
+        pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        # Only the loader reacts to Ctrl-C; it kills its children
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        _parse_in_child(path, book, sheet, segment_name, write_fd)
+    os.close(write_fd)
+    return pid, read_fd
+
+
+def load_sheets_parallel(path: Path, sheet_names: Optional[List[str]] = None,
+                         workers: int = SHEET_PARSE_WORKERS, min_bytes: int = SHEET_PARSE_MIN_BYTES,
+                         cancel_check: Optional[Callable[[], None]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Parse the sheets of a workbook, several at a time
+
+    The workbook is opened once (index and shared strings) and each sheet is
+    parsed by its own forked process, which inherits the opened book, parses
+    only that sheet and copies the columns into a shared memory segment.
+    Only the small segment layout travels back over a pipe, so large frames
+    are never pickled through it. At most `workers` sheets are parsed at
+    once. Small workbooks, single sheets and platforms without fork are
+    parsed in process. The parallel path is opt-in (SHEET_PARSE_WORKERS);
+    measure it on the target hardware with `python workbook_loader.py`.
+
+    Args:
+        path: Workbook path
+        sheet_names: Sheets to parse, or None for every sheet
+        workers: Maximum concurrent parser processes (1 disables)
+        min_bytes: Workbooks smaller than this are parsed in process
+        cancel_check: Called while waiting; raising stops and reaps the parsers
+
+    Returns:
+        Dictionary mapping sheet name to DataFrame, in the requested order
+    """
+    path = Path(path)
+    if workers <= 1 or not hasattr(os, 'fork') or path.stat().st_size < min_bytes:
+        return pd.read_excel(path, sheet_name=sheet_names)
+    if sheet_names is not None and len(sheet_names) < 2:
+        return pd.read_excel(path, sheet_name=sheet_names)
+    book = _open_book(path)
+    try:
+        names = list(sheet_names) if sheet_names is not None else _book_sheet_names(book)
+        if len(names) < 2:
+            return pd.read_excel(path, sheet_name=sheet_names)
+        results = _parse_children(path, book, names, workers, cancel_check)
+    finally:
+        _close_book(book)
+    logger.debug(f"Parsed {len(names)} sheets of {path.name} with up to {workers} processes")
+    return {sheet: results[sheet] for sheet in names}
+
+
+def _parse_children(path: Path, book: Any, names: List[str], workers: int,
+                    cancel_check: Optional[Callable[[], None]]) -> Dict[str, pd.DataFrame]:
+    """Fork up to `workers` sheet parsers at a time and collect their frames"""
+    # Children unregister their segments, so the tracker must exist before they fork
+    resource_tracker.ensure_running()
+    token = uuid.uuid4().hex[:12]
+    pending = list(enumerate(names))
+    running: Dict[int, Dict[str, Any]] = {}
+    results: Dict[str, pd.DataFrame] = {}
+    errors: List[str] = []
+
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                index, sheet = pending.pop(0)
+                segment_name = f"wb_{token}_{index}"
+                pid, read_fd = _start_child(path, book, sheet, segment_name)
+                running[read_fd] = {'pid': pid, 'sheet': sheet, 'segment': segment_name, 'chunks': []}
+
+            if cancel_check is not None:
+                cancel_check()
+            ready, _, _ = select.select(list(running), [], [], 1.0)
+            for read_fd in ready:
+                child = running[read_fd]
+                chunk = os.read(read_fd, 1 << 16)
+                if chunk:
+                    child['chunks'].append(chunk)
+                    continue
+                # EOF: the child has written its message and is exiting
+                del running[read_fd]
+                os.close(read_fd)
+                os.waitpid(child['pid'], 0)
+                message = pickle.loads(b''.join(child['chunks'])) if child['chunks'] else {'error': 'parser died'}
+                if 'error' in message:
+                    _discard_segment(child['segment'])
+                    errors.append(f"{child['sheet']}: {message['error']}")
+                else:
+                    results[child['sheet']] = _import_frame(child['segment'], message['layout'])
+    finally:
+        for read_fd, child in running.items():
+            try:
+                os.kill(child['pid'], signal.SIGKILL)
+                os.waitpid(child['pid'], 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            os.close(read_fd)
+            _discard_segment(child['segment'])
+
+    if errors:
+        raise ValueError(f"Could not parse {path.name}: {'; '.join(errors)}")
+    return results
+
+
+def benchmark(path: Path, workers: List[int], repeat: int = 3) -> Dict[int, float]:
+    """
+    Median seconds to load every sheet of a workbook per worker count
+
+    Args:
+        path: Workbook path
+        workers: Worker counts to time (1 parses in process)
+        repeat: Timed runs per worker count
+
+    Returns:
+        Worker count to median seconds
+    """
+    timings = {}
+    for count in workers:
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            load_sheets_parallel(path, workers=count, min_bytes=0)
+            runs.append(time.perf_counter() - started)
+        timings[count] = statistics.median(runs)
+    return timings
+
+
+def main():
+    """Command line entry point: time in-process against parallel sheet parsing"""
+    parser = argparse.ArgumentParser(description="Benchmark parallel sheet parsing")
+    parser.add_argument('workbooks', nargs='+', help="Workbooks to load")
+    parser.add_argument('--workers', default='1,2,4', help="Comma-separated worker counts")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per worker count")
+    args = parser.parse_args()
+
+    counts = [int(c) for c in args.workers.split(',')]
+    print(f"{'workbook':<40} {'MB':>7} " + ' '.join(f"{f'{c} workers':>11}" for c in counts))
+    for name in args.workbooks:
+        path = Path(name)
+        timings = benchmark(path, counts, args.repeat)
+        cells = ' '.join(f"{timings[c]:>10.2f}s" for c in counts)
+        print(f"{path.name:<40} {path.stat().st_size / 1e6:>7.1f} {cells}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
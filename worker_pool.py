@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Worker Pool Module
+Supervised worker processes with enforced deadlines and cancellation
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+import traceback
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dashboard_config import JOB_KILL_GRACE, JOB_STAGE_TIMEOUTS, MAX_WORKERS, TIMEOUT
+from profiling import JobProfiler
+
+logger = logging.getLogger(__name__)
+
+# How often the supervisor checks deadlines and worker health (seconds)
+SUPERVISOR_INTERVAL = 0.2
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled or timed out"""
+
+
+class JobContext:
+    """
+    Handle passed to job functions running in a worker
+
+    Jobs call stage() when they enter a pipeline stage, check() between
+    chunks of work so cancellation takes effect promptly, and add_output()
+    before writing a file so partial outputs can be cleaned up.
+    """
+
+    def __init__(self, job_id: str, cancel_event, connection, profiler: Optional[JobProfiler] = None):
+        self.job_id = job_id
+        self._cancel_event = cancel_event
+        self._connection = connection
+        self.profiler = profiler
+
+    def stage(self, name: str):
+        """Report entry into a named stage (starts that stage's deadline and profile)"""
+        self.check()
+        if self.profiler is not None:
+            self.profiler.stage(name)
+        self._connection.send(('stage', self.job_id, name))
+
+    def check(self):
+        """Raise JobCancelled if the supervisor asked this job to stop"""
+        if self._cancel_event.is_set():
+            raise JobCancelled(self.job_id)
+
+    def add_output(self, path: str):
+        """Register a file the job is about to write"""
+        self._connection.send(('output', self.job_id, str(path)))
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+
+def _worker_main(tasks, connection, cancel_event):
+    """Worker process loop: run tasks until a None sentinel arrives"""
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        job_id, function, args, profile = task
+        profiler = JobProfiler(job_id, **profile) if profile else None
+        context = JobContext(job_id, cancel_event, connection, profiler)
+        try:
+            if profiler is not None:
+                profiler.start()
+            result = function(*args, context=context)
+            message = ('done', job_id, result)
+        except JobCancelled:
+            message = ('cancelled', job_id, None)
+        except Exception as e:
+            message = ('error', job_id, f"{e}\n{traceback.format_exc()}")
+
+        # The profile is sent first so it is recorded before the job is reported finished
+        if profiler is not None:
+            try:
+                connection.send(('profile', job_id, profiler.finish()))
+            except Exception as e:
+                logger.error(f"Could not profile job {job_id}: {e}")
+        connection.send(message)
+
+
+class WorkerPool:
+    """
+    Fixed-size pool of worker processes watched by a supervisor thread
+
+    Each worker runs one job at a time. The supervisor enforces the job
+    deadline and per-stage deadlines: on expiry it first signals cooperative
+    cancellation, then terminates the worker process if it has not stopped
+    within the grace period and starts a fresh replacement. Workers that die
+    on their own (crash, OOM kill) are replaced the same way.
+
+    on_finish(job_id, status, payload, outputs) is called from the supervisor
+    thread with status 'succeeded', 'failed', 'cancelled' or 'timeout'.
+    on_stage(job_id, stage) is called whenever a job enters a new stage and
+    on_profile(job_id, report) when a profiled job has finished.
+    """
+
+    def __init__(self, on_finish: Callable[[str, str, Any, List[str]], None],
+                 on_stage: Optional[Callable[[str, str], None]] = None, workers: int = MAX_WORKERS,
+                 timeout: float = TIMEOUT, stage_timeouts: Optional[Dict[str, float]] = None,
+                 kill_grace: float = JOB_KILL_GRACE,
+                 on_profile: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        self.on_finish = on_finish
+        self.on_stage = on_stage
+        self.on_profile = on_profile
+        self.size = max(1, workers)
+        self.timeout = timeout
+        self.stage_timeouts = JOB_STAGE_TIMEOUTS if stage_timeouts is None else stage_timeouts
+        self.kill_grace = kill_grace
+
+        self._context = multiprocessing.get_context()
+        self._lock = threading.Lock()
+        self._slots: List[Dict[str, Any]] = []
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._supervisor: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def _spawn_slot(self) -> Dict[str, Any]:
+        """
+        Start one worker process with its own task queue, event pipe and cancel flag
+
+        Each worker reports over a private pipe, so terminating a stuck worker
+        can never corrupt a channel other workers are using.
+        """
+        tasks = self._context.Queue()
+        cancel_event = self._context.Event()
+        reader, writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(target=_worker_main, args=(tasks, writer, cancel_event), daemon=True)
+        process.start()
+        writer.close()
+        return {'process': process, 'tasks': tasks, 'events': reader, 'cancel': cancel_event, 'job': None}
+
+    def _ensure_started(self):
+        """Start the workers and supervisor on first use (lock must be held)"""
+        if self._supervisor is None:
+            self._slots = [self._spawn_slot() for _ in range(self.size)]
+            self._supervisor = threading.Thread(target=self._supervise, name='worker-pool-supervisor', daemon=True)
+            self._supervisor.start()
+
+    def submit(self, job_id: str, function: Callable, args: Tuple = (), profile: Optional[Dict[str, Any]] = None):
+        """
+        Start a job on an idle worker
+
+        The function must be importable (module level) and accept a
+        `context` keyword argument.
+
+        Args:
+            job_id: Job id
+            function: Job function
+            args: Positional arguments
+            profile: JobProfiler options to profile the job, or None
+
+        Raises:
+            RuntimeError: If every worker is busy
+        """
+        with self._lock:
+            self._ensure_started()
+            slot = next((s for s in self._slots if s['job'] is None), None)
+            if slot is None:
+                raise RuntimeError('No idle worker available')
+
+            now = time.time()
+            slot['cancel'].clear()
+            slot['job'] = job_id
+            self._jobs[job_id] = {
+                'slot': slot,
+                'deadline': now + self.timeout if self.timeout else None,
+                'stage': None,
+                'stage_deadline': None,
+                'outputs': [],
+                'stop_requested': None,
+                'stop_reason': None
+            }
+            slot['tasks'].put((job_id, function, args, profile))
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Ask a running job to stop; it is terminated if it does not comply in time
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            True if the job was running
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            self._request_stop(job, 'cancelled')
+            return True
+
+    def _request_stop(self, job: Dict[str, Any], reason: str):
+        """Signal cooperative cancellation once (lock must be held)"""
+        if job['stop_requested'] is None:
+            job['stop_requested'] = time.time()
+            job['stop_reason'] = reason
+            job['slot']['cancel'].set()
+
+    def _finish(self, job_id: str, status: str, payload: Any, replace_worker: bool = False):
+        """Detach a finished job from its worker and report it"""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return
+            slot = job['slot']
+            if replace_worker:
+                process = slot['process']
+                process.terminate()
+                process.join(1)
+                if process.is_alive():
+                    process.kill()
+                    process.join(1)
+                slot['events'].close()
+                slot['tasks'].cancel_join_thread()
+                if slot in self._slots and not self._stopping.is_set():
+                    self._slots[self._slots.index(slot)] = self._spawn_slot()
+            else:
+                slot['job'] = None
+            # A job stopped by the supervisor reports why it was stopped
+            if status == 'cancelled' and job['stop_reason']:
+                status = job['stop_reason']
+
+        try:
+            self.on_finish(job_id, status, payload, job['outputs'])
+        except Exception as e:
+            logger.error(f"Job completion handler failed for {job_id}: {e}")
+
+    def _handle_event(self, event: Tuple[str, str, Any]):
+        """Apply one message from a worker"""
+        kind, job_id, payload = event
+        if kind == 'stage':
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return
+                job['stage'] = payload
+                limit = self.stage_timeouts.get(payload)
+                job['stage_deadline'] = time.time() + limit if limit else None
+            if self.on_stage:
+                self.on_stage(job_id, payload)
+        elif kind == 'output':
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job['outputs'].append(payload)
+        elif kind == 'profile':
+            if self.on_profile:
+                self.on_profile(job_id, payload)
+        elif kind == 'done':
+            self._finish(job_id, 'succeeded', payload)
+        elif kind == 'cancelled':
+            self._finish(job_id, 'cancelled', None)
+        elif kind == 'error':
+            self._finish(job_id, 'failed', payload)
+
+    def _check_deadlines(self):
+        """Signal, then terminate, jobs past their deadlines; replace dead workers"""
+        now = time.time()
+        expired = []
+        with self._lock:
+            for job_id, job in self._jobs.items():
+                if job['stop_requested'] is None:
+                    if job['deadline'] and now > job['deadline']:
+                        self._request_stop(job, 'timeout')
+                    elif job['stage_deadline'] and now > job['stage_deadline']:
+                        self._request_stop(job, 'timeout')
+                        logger.warning(f"Job {job_id} exceeded the deadline for stage {job['stage']}")
+                if job['stop_requested'] is not None and now - job['stop_requested'] > self.kill_grace:
+                    expired.append((job_id, job['stop_reason'], 'worker terminated after grace period'))
+                elif not job['slot']['process'].is_alive():
+                    expired.append((job_id, 'failed', 'worker process died'))
+            # Replace idle workers that exited unexpectedly
+            for index, slot in enumerate(self._slots):
+                if slot['job'] is None and not slot['process'].is_alive() and not self._stopping.is_set():
+                    slot['events'].close()
+                    self._slots[index] = self._spawn_slot()
+
+        for job_id, status, message in expired:
+            logger.warning(f"Job {job_id}: {message}")
+            self._finish(job_id, status, message, replace_worker=True)
+
+    def _supervise(self):
+        """Supervisor loop: drain worker messages and enforce deadlines"""
+        while not self._stopping.is_set():
+            with self._lock:
+                connections = [slot['events'] for slot in self._slots]
+            try:
+                for connection in wait(connections, timeout=SUPERVISOR_INTERVAL):
+                    try:
+                        while connection.poll():
+                            self._handle_event(connection.recv())
+                    except (EOFError, OSError):
+                        # Worker exited or was replaced; _check_deadlines handles its job
+                        pass
+            except Exception as e:
+                logger.error(f"Worker pool supervisor error: {e}")
+            self._check_deadlines()
+
+    def busy(self) -> int:
+        """Number of workers currently running a job"""
+        with self._lock:
+            return len(self._jobs)
+
+    def shutdown(self):
+        """Stop the supervisor and all worker processes"""
+        self._stopping.set()
+        with self._lock:
+            for slot in self._slots:
+                slot['tasks'].put(None)
+            for slot in self._slots:
+                slot['process'].join(1)
+                if slot['process'].is_alive():
+                    slot['process'].terminate()
+            self._slots = []
+            self._supervisor = None